@@ -1,19 +1,49 @@
-import grpc
-from fastapi import FastAPI, status
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from google.protobuf.empty_pb2 import Empty
 
-from protos import health_pb2, health_pb2_grpc
+from protos import health_pb2_grpc
 from routes.orders import router
-from schema.orders import HealthCheck
+from schema.orders import HealthCheck, HealthStatus
+from settings.utils import secret_store
+from utils.dependencies.grpc_channels import grpc_channels
+from utils.dependencies.health_monitor import health_monitor
+from utils.dependencies.redis_cache import redis_master
+from utils.middleware.rate_limit import RateLimit, RateLimitMiddleware
 
 origin = ["*"]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+	grpc_channels.open()
+	health_monitor.start()
+	secret_store.start()
+	yield
+	await asyncio.to_thread(secret_store.stop, 5.0)
+	await health_monitor.stop()
+	await grpc_channels.close(grace=5.0)
+
+
 app = FastAPI(
 	docs_url="/docs",
 	redoc_url="/redoc",
 	version="0.0.1",
 	root_path="/orders".lower(),
+	lifespan=lifespan,
 )
 
+# Added before CORS so the rejections also get the CORS headers
+app.add_middleware(
+	RateLimitMiddleware,
+	redis=redis_master,
+	default=RateLimit(rate=50, period=1, burst=100),
+	routes={"/health": None},
+)
 app.add_middleware(
 	CORSMiddleware,
 	allow_origins=origin,
@@ -33,7 +63,7 @@ app.include_router(router)
 	status_code=status.HTTP_200_OK,
 	response_model=HealthCheck,
 )
-def get_health() -> HealthCheck:
+async def get_health() -> HealthCheck:
 	"""
 	## Perform a Health Check
 	Endpoint to perform a healthcheck on. This endpoint can primarily be used Docker
@@ -43,8 +73,36 @@ def get_health() -> HealthCheck:
 	Returns:
 	    HealthCheck: Returns a JSON response with the health status
 	"""
-	with grpc.insecure_channel("localhost:50051") as channel:
-		stub = health_pb2_grpc.GetHealtStub(channel)
-		request = health_pb2.SendHealth(health="Ok")
-		response = stub.Health(request)
-		return HealthCheck(status=response.health)
+	stub = grpc_channels.stub(health_pb2_grpc.GetHealtStub)
+	response = await stub.Health(Empty())
+	return HealthCheck(status=response.health)
+
+
+@app.get(
+	"/health/live",
+	tags=["healthcheck"],
+	summary="Liveness of the service",
+	response_description="200 while the service works, 503 if it must be restarted",
+	response_model=HealthCheck,
+)
+async def get_liveness(response: Response) -> HealthCheck:
+	"""Alive while the event loop runs the background probes, the
+	dependencies are not checked: a database down must not restart the pods"""
+	if not health_monitor.alive:
+		response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+		return HealthCheck(status="UNAVAILABLE")
+	return HealthCheck(status="OK")
+
+
+@app.get(
+	"/health/ready",
+	tags=["healthcheck"],
+	summary="Readiness of the service",
+	response_description="200 if every dependency is available, 503 if not",
+	response_model=HealthStatus,
+)
+async def get_readiness(response: Response) -> HealthStatus:
+	"""Last status of the dependencies, probed in the background"""
+	if not health_monitor.ready:
+		response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+	return HealthStatus(**health_monitor.snapshot())
@@ -1,6 +1,8 @@
+import asyncio
+
 from protos import health_service
 
 if __name__ == "__main__":
 	print("Starting gRPC server...")
-	health_service.serve()
+	asyncio.run(health_service.serve())
 	print("gRPC server stopped.")
@@ -1,15 +1,31 @@
-from concurrent import futures
+import asyncio
+import signal
 
 import grpc
-from fastapi import Request
-from grpc_interceptor import ExceptionToStatusInterceptor
+from google.protobuf.empty_pb2 import Empty
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+from grpc_interceptor import AsyncExceptionToStatusInterceptor
+from loguru import logger
 
 from protos.health_pb2 import SendHealth
 from protos.health_pb2_grpc import GetHealtServicer, add_GetHealtServicer_to_server
+from settings.grpc_settings import ReadEnvGrpcSettings
+from utils.dependencies.health_monitor import health_monitor
+from utils.health.monitor import Listener
+
+COMPRESSION = {
+	"none": grpc.Compression.NoCompression,
+	"gzip": grpc.Compression.Gzip,
+	"deflate": grpc.Compression.Deflate,
+}
+# Services of the standard health protocol, "" is the whole server
+HEALTH_SERVICES = ("", "health.GetHealt")
 
 
 class HealtServicer(GetHealtServicer):
-	def Health(self, request: Request, context):
+	async def Health(
+		self, request: Empty, context: grpc.aio.ServicerContext
+	) -> SendHealth:
 		"""
 		## Perform a Health Check
 		Endpoint to perform a healthcheck on. This endpoint can primarily be used Docker
@@ -17,21 +33,78 @@ class HealtServicer(GetHealtServicer):
 		services which rely on proper functioning of the API service will not deploy if this
 		endpoint returns any other HTTP status code except 200 (OK).
 		Returns:
-		    HealthCheck: Returns a JSON response with the health status
+			HealthCheck: Returns a JSON response with the health status
 		"""
 		return SendHealth(health="OK")
 
 
-def serve():
-	interceptors = [ExceptionToStatusInterceptor()]
-	server = grpc.server(
-		futures.ThreadPoolExecutor(max_workers=10), interceptors=interceptors
+def publish_health(health_servicer: health.aio.HealthServicer) -> Listener:
+	"""Listener of the health monitor that sets the status of the services"""
+
+	async def publish(ready: bool) -> None:
+		status = (
+			health_pb2.HealthCheckResponse.SERVING
+			if ready
+			else health_pb2.HealthCheckResponse.NOT_SERVING
+		)
+		for service in HEALTH_SERVICES:
+			await health_servicer.set(service, status)
+
+	return publish
+
+
+def create_server(
+	settings: ReadEnvGrpcSettings,
+	health_servicer: health.aio.HealthServicer | None = None,
+) -> grpc.aio.Server:
+	"""Asyncio gRPC server with the limits of the settings, the servicers run
+	in the event loop and share its clients (SQLAlchemy, Redis). With a
+	``health_servicer`` it also serves ``grpc.health.v1.Health``"""
+	server = grpc.aio.server(
+		interceptors=[AsyncExceptionToStatusInterceptor()],
+		maximum_concurrent_rpcs=settings.max_concurrent_rpcs,
+		compression=COMPRESSION[settings.compression],
+		options=[
+			("grpc.max_send_message_length", settings.max_message_bytes),
+			("grpc.max_receive_message_length", settings.max_message_bytes),
+			("grpc.keepalive_time_ms", settings.keepalive_time_ms),
+			("grpc.keepalive_timeout_ms", settings.keepalive_timeout_ms),
+			("grpc.keepalive_permit_without_calls", 1),
+			("grpc.http2.max_pings_without_data", 0),
+		],
 	)
 	add_GetHealtServicer_to_server(HealtServicer(), server)
-	server.add_insecure_port("[::]:50051")
-	server.start()
-	server.wait_for_termination()
+	if health_servicer is not None:
+		health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+	server.add_insecure_port(settings.address)
+	return server
+
+
+async def serve(settings: ReadEnvGrpcSettings | None = None) -> None:
+	"""Serve until SIGINT/SIGTERM, then report ``NOT_SERVING``, stop accepting
+	RPCs and drain the ones in flight for ``grace_period`` seconds. The health
+	status follows the probes of ``health_monitor``"""
+	settings = settings or ReadEnvGrpcSettings()
+	health_servicer = health.aio.HealthServicer()
+	publish = publish_health(health_servicer)
+	await publish(health_monitor.ready)
+	health_monitor.subscribe(publish)
+	server = create_server(settings, health_servicer)
+	await server.start()
+	health_monitor.start()
+	logger.info(f"gRPC server listening on {settings.address}")
+
+	stop = asyncio.Event()
+	loop = asyncio.get_running_loop()
+	for signum in (signal.SIGINT, signal.SIGTERM):
+		loop.add_signal_handler(signum, stop.set)
+	await stop.wait()
+
+	logger.info(f"gRPC server draining ({settings.grace_period}s)")
+	await health_servicer.enter_graceful_shutdown()
+	await server.stop(settings.grace_period)
+	await health_monitor.stop()
 
 
 if __name__ == "__main__":
-	serve()
+	asyncio.run(serve())
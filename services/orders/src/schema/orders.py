@@ -1,5 +1,11 @@
+from typing import Any
+
 from pydantic import BaseModel
 
 
 class HealthCheck(BaseModel):
 	status: str
+
+
+class HealthStatus(HealthCheck):
+	checks: dict[str, dict[str, Any]]
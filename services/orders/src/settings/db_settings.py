@@ -45,6 +45,8 @@ class DBSettings(BaseSettings):
 
 
 def db_setting() -> Iterator[DBSettings]:
+	"""Settings built on every call, read through ``secret_store`` so the next
+	call after a rotation gets the new secret"""
 	try:
 		yield DBSettings()  # type: ignore
 	except Exception:
@@ -0,0 +1,82 @@
+from typing import Literal
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class ReadEnvGrpcSettings(BaseSettings):
+	"""
+	Read Environment variables to get the configuration of the gRPC
+	server. Every value has a default, the `.env` file is optional.
+
+	If you want to use other file
+	.. code-block:: python
+	    ReadEnvGrpcSettings(_env_file="name_of_env_file")
+
+	"""  # noqa: E101
+
+	address: str = Field(
+		"[::]:50051", description="Address of the server", alias="GRPC_ADDRESS"
+	)
+	max_concurrent_rpcs: int = Field(
+		1000,
+		description="RPCs served at the same time, the rest are rejected",
+		alias="GRPC_MAX_CONCURRENT_RPCS",
+	)
+	max_message_bytes: int = Field(
+		4 * 1024 * 1024,
+		description="Max size of a received or sent message",
+		alias="GRPC_MAX_MESSAGE_BYTES",
+	)
+	keepalive_time_ms: int = Field(
+		30_000,
+		description="Interval of the keepalive pings",
+		alias="GRPC_KEEPALIVE_TIME_MS",
+	)
+	keepalive_timeout_ms: int = Field(
+		10_000,
+		description="Wait for the ack of a keepalive ping",
+		alias="GRPC_KEEPALIVE_TIMEOUT_MS",
+	)
+	compression: Literal["none", "gzip", "deflate"] = Field(
+		"gzip", description="Compression of the responses", alias="GRPC_COMPRESSION"
+	)
+	grace_period: float = Field(
+		10.0,
+		description="Seconds to finish the RPCs in flight on shutdown",
+		alias="GRPC_GRACE_PERIOD",
+	)
+
+	model_config = SettingsConfigDict(
+		env_file=".env", env_file_encoding="utf-8", case_sensitive=True, extra="ignore"
+	)
+
+
+class ReadEnvGrpcClientSettings(BaseSettings):
+	"""
+	Read Environment variables to get the configuration of the gRPC
+	channels used by the HTTP app. Every value has a default, the `.env`
+	file is optional.
+
+	If you want to use other file
+	.. code-block:: python
+	    ReadEnvGrpcClientSettings(_env_file="name_of_env_file")
+
+	"""  # noqa: E101
+
+	target: str = Field(
+		"localhost:50051", description="Target of the channels", alias="GRPC_TARGET"
+	)
+	channels: int = Field(2, description="Channels opened", alias="GRPC_CHANNELS")
+	deadline: float = Field(
+		1.0, description="Default deadline (seconds) of a call", alias="GRPC_DEADLINE"
+	)
+	max_attempts: int = Field(
+		3,
+		description="Attempts of an unavailable call, retries included",
+		alias="GRPC_MAX_ATTEMPTS",
+	)
+
+	model_config = SettingsConfigDict(
+		env_file=".env", env_file_encoding="utf-8", case_sensitive=True, extra="ignore"
+	)
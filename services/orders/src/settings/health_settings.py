@@ -0,0 +1,25 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class ReadEnvHealthSettings(BaseSettings):
+	"""
+	Read Environment variables to get how often the dependencies are
+	probed. Every value has a default, the `.env` file is optional.
+
+	If you want to use other file
+	.. code-block:: python
+	    ReadEnvHealthSettings(_env_file="name_of_env_file")
+
+	"""  # noqa: E101
+
+	interval: float = Field(
+		5.0, description="Seconds between rounds of probes", alias="HEALTH_INTERVAL"
+	)
+	timeout: float = Field(
+		2.0, description="Seconds that a probe can take", alias="HEALTH_TIMEOUT"
+	)
+
+	model_config = SettingsConfigDict(
+		env_file=".env", env_file_encoding="utf-8", case_sensitive=True, extra="ignore"
+	)
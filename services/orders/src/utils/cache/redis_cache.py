@@ -1,15 +1,58 @@
+import asyncio
 import hashlib
 import json
+import time
+from collections import OrderedDict
 from collections.abc import Callable
-from typing import Annotated, Any
+from functools import lru_cache
+from typing import Annotated, Any, Literal
 
 from fastapi import Depends
 from graphql import parse, print_ast
+from loguru import logger
 from redis.asyncio import Redis
+from redis.client import NEVER_DECODE
+from redis.exceptions import RedisError
 from strawberry import Info
 
 from utils.dependencies.redis_cache import get_master, get_replica
 
+from .codec import Codec, CodecError
+from .local_cache import CacheStats, LocalCache
+from .stampede import SingleFlight, acquire_lease, release_lease, should_refresh
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+LOCAL_TTL = 5
+LEASE_POLL_INTERVAL = 0.05
+QUERY_CACHE_SIZE = 1024
+ENTRY_KEYS = frozenset(("value", "delta", "expires_at"))
+
+# Drops the members of every tag set (UNLINK in batches, the memory is freed
+# in background) and bumps the tag version, atomically in one round trip.
+# KEYS: tag sets, ARGV: version keys (same order).
+INVALIDATE_TAGS_SCRIPT = """
+local total = 0
+for index, tag_key in ipairs(KEYS) do
+	local keys = redis.call('SMEMBERS', tag_key)
+	for i = 1, #keys, 1000 do
+		redis.call('UNLINK', unpack(keys, i, math.min(i + 999, #keys)))
+	end
+	total = total + #keys
+	redis.call('UNLINK', tag_key)
+	redis.call('INCR', ARGV[index])
+end
+return total
+"""
+
+InvalidationStrategy = Literal["delete", "version"]
+
+local_cache = LocalCache()
+cache_stats = CacheStats()
+single_flight = SingleFlight()
+default_codec = Codec()
+_persisted_queries: OrderedDict[str, str] = OrderedDict()
+_invalidation_listener: asyncio.Task[None] | None = None
+
 
 def normalize_query(query: str) -> str:
 	"""
@@ -19,30 +62,149 @@ def normalize_query(query: str) -> str:
 	return print_ast(parsed_query)
 
 
-def generate_cache_key(query: str, variables: dict[str, Any]) -> str:
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def query_hash(query: str) -> str:
+	"""
+	Hash of the normalized query, memoized by the raw text so a query is parsed
+	once per process instead of on every resolver call.
+	"""
+	return hashlib.sha256(normalize_query(query).encode()).hexdigest()
+
+
+def register_persisted_query(query_id: str, query: str) -> None:
+	"""
+	Map a persisted query id (APQ ``sha256Hash``) to the hash of its normalized
+	query, the requests that only send the id share the keys of the full query.
+	"""
+	_persisted_queries[query_id] = query_hash(query)
+	_persisted_queries.move_to_end(query_id)
+	if len(_persisted_queries) > QUERY_CACHE_SIZE:
+		_persisted_queries.popitem(last=False)
+
+
+def persisted_query_id(extensions: dict[str, Any] | None) -> str | None:
+	persisted_query = (extensions or {}).get("persistedQuery") or {}
+	return persisted_query.get("sha256Hash")
+
+
+def generate_cache_key(
+	query: str | None,
+	variables: dict[str, Any] | None,
+	extensions: dict[str, Any] | None = None,
+) -> str:
 	"""
-	Generate a unique key based from query normalize/variables
+	Generate a unique key based from query normalize/variables.
+
+	The query is identified by the memoized hash of its normalized text, or by
+	its persisted query id (APQ) when the client only sends the id. An APQ id
+	sent with the query is verified once and then resolved with a dict lookup.
 	"""
-	normalized_query = normalize_query(query)
-	key_data = {"query": normalized_query, "variables": variables}
-	return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+	query_id = persisted_query_id(extensions)
+	if query is not None:
+		digest = query_hash(query)
+		if (
+			query_id is not None
+			and query_id not in _persisted_queries
+			and hashlib.sha256(query.encode()).hexdigest() == query_id
+		):
+			register_persisted_query(query_id, query)
+	elif query_id is not None:
+		digest = _persisted_queries.get(query_id) or f"persisted:{query_id}"
+	else:
+		raise ValueError("A query or a persisted query id is needed")
+	if not variables:
+		return digest
+	key_data = f"{digest}:{json.dumps(variables, sort_keys=True)}"
+	return hashlib.sha256(key_data.encode()).hexdigest()
+
 
+def tag_version_key(tag: str) -> str:
+	return f"tag:{tag}:version"
 
-def tag_cache_key(key: str, tag: str, redis_master: Redis) -> None:
+
+async def get_tag_version(tag: str, redis_master: Redis) -> str:
+	"""
+	Current generation of a tag, read from the master so a bump is seen at once
+	"""
+	return await redis_master.get(tag_version_key(tag)) or "0"
+
+
+async def tag_cache_key(key: str, tag: str, redis_master: Redis) -> None:
 	"""
 	Associate a cache key with tags for invalidation (mutations)
 	"""
-	redis_master.sadd(f"tag:{tag}", key)
+	await redis_master.sadd(f"tag:{tag}", key)  # type: ignore
 
 
 async def invalidate_tag(
-	tags: list[str], redis_master: Redis, redis_replica: Redis
-) -> None:
-	for tag in tags:
-		keys = await redis_replica.smembers(f"tag:{tag}")  # type: ignore # this is ignored 'cause the response can be an Awaitable or not
-		for key in keys:
-			redis_master.delete(key)
-		redis_master.delete(f"tag:{tag}")
+	tags: list[str], redis_master: Redis, redis_replica: Redis | None = None
+) -> int:
+	"""
+	Invalidate the cached results of the tags, in a single server-side operation:
+	the keys of the tags (``delete`` strategy) are unlinked and the version of
+	the tags (``version`` strategy) is bumped. The tag sets are read on the master,
+	``redis_replica`` is kept for compatibility.
+
+	Returns:
+		int: How many keys were unlinked.
+	"""
+	script = redis_master.register_script(INVALIDATE_TAGS_SCRIPT)
+	deleted: int = await script(
+		keys=[f"tag:{tag}" for tag in tags],
+		args=[tag_version_key(tag) for tag in tags],
+	)
+	local_cache.invalidate_tags(tags)
+	await redis_master.publish(INVALIDATION_CHANNEL, json.dumps(tags))
+	return deleted
+
+
+async def listen_invalidations(redis: Redis, retry_delay: float = 1.0) -> None:
+	"""
+	Drop the local entries of the tags invalidated by any pod (Redis pub/sub).
+	While disconnected invalidations are lost, so the local cache is cleared
+	after every reconnection.
+	"""
+	while True:
+		try:
+			async with redis.pubsub() as pubsub:
+				await pubsub.subscribe(INVALIDATION_CHANNEL)
+				local_cache.clear()
+				async for message in pubsub.listen():
+					if message["type"] == "message":
+						local_cache.invalidate_tags(json.loads(message["data"]))
+		except RedisError as redis_error:
+			logger.warning(f"Cache invalidation channel lost: {redis_error}")
+			local_cache.clear()
+			await asyncio.sleep(retry_delay)
+
+
+async def get_payload(redis: Redis, key: str) -> bytes | None:
+	"""``GET`` without decoding the response, the payloads are binary"""
+	return await redis.execute_command("GET", key, **{NEVER_DECODE: True})
+
+
+def decode_entry(codec: Codec, payload: bytes | str) -> dict[str, Any] | None:
+	"""
+	Entry (``value``, ``delta`` and ``expires_at``) of a cached payload, ``None``
+	(a miss) if it can't be decoded or it isn't an entry, like the legacy
+	payloads that only have the result.
+	"""
+	try:
+		entry = codec.decode(payload)
+	except (CodecError, ValueError) as error:
+		logger.warning(f"Cached payload discarded: {error}")
+		return None
+	if not isinstance(entry, dict) or not ENTRY_KEYS <= entry.keys():
+		return None
+	return entry
+
+
+def start_invalidation_listener(redis: Redis) -> asyncio.Task[None]:
+	"""Start (once per process) the task that listens the invalidations"""
+	global _invalidation_listener
+	if _invalidation_listener is None or _invalidation_listener.done():
+		_invalidation_listener = asyncio.create_task(listen_invalidations(redis))
+	return _invalidation_listener
 
 
 def cache_resolver(
@@ -50,21 +212,121 @@ def cache_resolver(
 	redis_master: Annotated[Redis, Depends(get_master)],
 	tag: str,
 	ttl: int = 3600,
+	local_ttl: int = LOCAL_TTL,
+	invalidation: InvalidationStrategy = "delete",
+	stale_ttl: int = 60,
+	beta: float = 1.0,
+	lease_ttl: float = 10.0,
+	codec: Codec | None = None,
 ) -> Callable[..., Any]:
+	"""
+	Cache the result of a resolver in two tiers, an in-process LRU (L1, ``local_ttl``
+	seconds) in front of Redis (L2, ``ttl`` seconds).
+
+	With ``invalidation="delete"`` every key is added to the tag set and
+	``invalidate_tag`` unlinks them. With ``invalidation="version"`` the key
+	embeds the tag version, invalidating is O(1) (bump the version) and the old
+	keys expire with their TTL, at the cost of reading the version on L1 misses.
+	The L1 doesn't need the version, its entries are dropped by the pub/sub
+	invalidation.
+
+	Expiration never releases a thundering herd against the database:
+
+	- Concurrent misses of a key in the process share one execution (single-flight).
+	- Across pods only the holder of the Redis lease (``lease_ttl`` seconds) runs
+		the resolver, the rest wait for its result.
+	- Values are kept ``stale_ttl`` seconds after they expire, and are refreshed
+		early with a probability that grows near the expiry (``beta``). The caller
+		that gets the lease refreshes, the rest are served the stale value.
+
+	Values are encoded with ``codec`` (``default_codec`` if not given), big
+	payloads are compressed. A payload that can't be decoded, or written
+	without the entry (the bare result of older versions), is a miss.
+	"""
+	codec = codec or default_codec
+
+	def decode(payload: bytes | str) -> dict[str, Any] | None:
+		return decode_entry(codec, payload)
+
 	def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+		async def store(redis_key: str, cache_key: str, args: Any, kwargs: Any) -> Any:
+			start = time.time()
+			result = await func(*args, **kwargs)
+			now = time.time()
+			payload = codec.encode(
+				{"value": result, "delta": now - start, "expires_at": now + ttl}
+			)
+			if invalidation == "version":
+				await redis_master.setex(redis_key, ttl + stale_ttl, payload)
+			else:
+				async with redis_master.pipeline(transaction=False) as pipe:
+					pipe.setex(redis_key, ttl + stale_ttl, payload)
+					pipe.sadd(f"tag:{tag}", redis_key)
+					await pipe.execute()
+			local_cache.set(cache_key, payload, min(ttl, local_ttl), tag)
+			return result
+
+		async def load(redis_key: str, cache_key: str, args: Any, kwargs: Any) -> Any:
+			"""Run the resolver holding the lease, or wait the pod that holds it"""
+			token = await acquire_lease(redis_master, redis_key, lease_ttl)
+			if token is None:
+				deadline = time.monotonic() + lease_ttl
+				while time.monotonic() < deadline:
+					await asyncio.sleep(LEASE_POLL_INTERVAL)
+					cached_response = await get_payload(redis_master, redis_key)
+					if cached_response and (entry := decode(cached_response)):
+						return entry["value"]
+				# The holder didn't finish in time, don't wait any longer
+				return await store(redis_key, cache_key, args, kwargs)
+			try:
+				return await store(redis_key, cache_key, args, kwargs)
+			finally:
+				await release_lease(redis_master, redis_key, token)
+
 		async def wrapper(*args: tuple[Any, Any], **kwargs: dict[str, Any]) -> Any:
 			info: Info[Any, Any] = kwargs.get("info")  #  type: ignore
-			query = info.context["query"]
+			query = info.context.get("query")
 			variables = info.context.get("variables", {})
+			extensions = info.context.get("extensions")
+			start_invalidation_listener(redis_master)
 
-			cache_key = generate_cache_key(query, variables)
-			cached_response = await redis_client.get(cache_key)
-			if cached_response:
+			cache_key = generate_cache_key(query, variables, extensions)
+			cached_response = local_cache.get(cache_key)
+			if cached_response is not None and (entry := decode(cached_response)):
+				cache_stats.l1_hits += 1
 				info.context["cache_source"] = "cache"
-				return json.loads(cached_response)
-			result = await func(*args, **kwargs)
-			await redis_master.setex(cache_key, ttl, json.dumps(result))
-			tag_cache_key(cache_key, tag, redis_master)
+				return entry["value"]
+			cache_stats.l1_misses += 1
+
+			redis_key = cache_key
+			if invalidation == "version":
+				redis_key = f"{cache_key}:{await get_tag_version(tag, redis_master)}"
+			cached_response = await get_payload(redis_client, redis_key)
+			if cached_response and (entry := decode(cached_response)):
+				cache_stats.l2_hits += 1
+				if not should_refresh(entry["expires_at"], entry["delta"], beta):
+					local_cache.set(
+						cache_key, cached_response, min(ttl, local_ttl), tag
+					)
+					info.context["cache_source"] = "cache"
+					return entry["value"]
+				# Stale or picked for early refresh: the lease holder refreshes,
+				# everybody else keeps serving the stale value meanwhile.
+				token = await acquire_lease(redis_master, redis_key, lease_ttl)
+				if token is None:
+					info.context["cache_source"] = "cache"
+					return entry["value"]
+				try:
+					result = await store(redis_key, cache_key, args, kwargs)
+				finally:
+					await release_lease(redis_master, redis_key, token)
+				info.context["cache_source"] = "database"
+				return result
+			cache_stats.l2_misses += 1
+
+			result = await single_flight.do(
+				redis_key, lambda: load(redis_key, cache_key, args, kwargs)
+			)
 			info.context["cache_source"] = "database"
 			return result
 
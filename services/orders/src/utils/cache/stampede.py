@@ -0,0 +1,77 @@
+import asyncio
+import math
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+from uuid import uuid4
+
+from redis.asyncio import Redis
+
+# Deletes the lease only if it is still owned by the token that acquired it
+RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+	return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+	"""Coalesce the concurrent calls of the same key in the process: the first
+	caller runs the function, the rest await its result."""
+
+	def __init__(self) -> None:
+		self._calls: dict[str, asyncio.Future[Any]] = {}
+
+	async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+		if (call := self._calls.get(key)) is not None:
+			try:
+				return await asyncio.shield(call)
+			except asyncio.CancelledError:
+				# Only the leader was cancelled (e.g. client gone), run it here
+				if not call.cancelled():
+					raise
+		call = asyncio.get_running_loop().create_future()
+		self._calls[key] = call
+		try:
+			result = await func()
+		except asyncio.CancelledError:
+			call.cancel()
+			raise
+		except Exception as error:
+			call.set_exception(error)
+			# Mark the exception as retrieved, there may be no followers
+			call.exception()
+			raise
+		else:
+			call.set_result(result)
+			return result
+		finally:
+			if self._calls.get(key) is call:
+				del self._calls[key]
+
+
+async def acquire_lease(redis: Redis, key: str, lease_ttl: float) -> str | None:
+	"""Acquire the distributed lease of a key (``SET NX PX``), returns the token"""
+	token = uuid4().hex
+	acquired = await redis.set(f"lease:{key}", token, nx=True, px=int(lease_ttl * 1000))
+	return token if acquired else None
+
+
+async def release_lease(redis: Redis, key: str, token: str) -> None:
+	script = redis.register_script(RELEASE_LEASE_SCRIPT)
+	await script(keys=[f"lease:{key}"], args=[token])
+
+
+def should_refresh(
+	expires_at: float, delta: float, beta: float = 1.0, now: float | None = None
+) -> bool:
+	"""Probabilistic early expiration (XFetch).
+
+	The closer to ``expires_at`` and the longer the recomputation (``delta``)
+	the more likely a caller refreshes the value before it expires, spreading
+	the refreshes instead of all the callers missing at the same time.
+	"""
+	now = time.time() if now is None else now
+	return now - delta * beta * math.log(1.0 - random.random()) >= expires_at
@@ -15,6 +15,7 @@ from sqlalchemy.ext.asyncio import (
 from utils.exceptions import ServiceError
 
 from .general import AsyncDatabaseSessionManager, DefineGeneralDb
+from .statement_cache import StatementCacheStats, instrument_statement_cache
 
 
 class AsyncDatabaseManager(AsyncDatabaseSessionManager):
@@ -41,8 +42,25 @@ class AsyncDatabaseManager(AsyncDatabaseSessionManager):
 		"""
 		super().__init__(db_params)
 		url = self.create_url()
+		# Only asyncpg keeps a cache of prepared statements
+		connect_args = (
+			{
+				"prepared_statement_cache_size": db_params.HEALTHNEXUS_DB_PREPARED_STATEMENT_CACHE_SIZE
+			}
+			if url.get_driver_name() == "asyncpg"
+			else {}
+		)
 		self.engine: AsyncEngine | None = create_async_engine(
-			url, pool_size=50, max_overflow=0, pool_recycle=1800, pool_timeout=10
+			url,
+			pool_size=50,
+			max_overflow=0,
+			pool_recycle=1800,
+			pool_timeout=10,
+			query_cache_size=db_params.HEALTHNEXUS_DB_QUERY_CACHE_SIZE,
+			connect_args=connect_args,
+		)
+		self.statement_cache: StatementCacheStats = instrument_statement_cache(
+			self.engine
 		)
 		self._sessionmaker: async_sessionmaker[AsyncSession] = async_sessionmaker(
 			autocommit=False, bind=self.engine
@@ -88,12 +106,20 @@ class AsyncDatabaseManager(AsyncDatabaseSessionManager):
 
 	@override
 	@contextlib.asynccontextmanager
-	async def async_session(self) -> AsyncIterator[AsyncSession]:
+	async def async_session(
+		self, expire_on_commit: bool = True
+	) -> AsyncIterator[AsyncSession]:
+		"""Open a session, closed when the block ends.
+
+		Args:
+			expire_on_commit (bool): Expire the loaded entities on commit, False
+			keeps them usable after the commit without being selected again.
+		"""
 		if not self._sessionmaker:
 			logger.error("Sessionmaker is not available.")
 			raise ServiceError
 
-		session = self._sessionmaker()
+		session = self._sessionmaker(expire_on_commit=expire_on_commit)
 		try:
 			yield session
 		except SQLAlchemyError as e:
@@ -22,7 +22,10 @@ sessionmanager = AsyncDatabaseManager(_database)
 
 
 async def get_db_session() -> AsyncIterator[AsyncSession]:
-	async with sessionmanager.async_session() as session:
+	# The routes answer with the entities of INSERT/UPDATE ... RETURNING after
+	# the commit, expiring them would select them again (or fail under asyncio).
+	# The session only lives for the request, nothing reads stale entities.
+	async with sessionmanager.async_session(expire_on_commit=False) as session:
 		yield session
 
 
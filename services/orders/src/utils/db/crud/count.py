@@ -0,0 +1,126 @@
+import hashlib
+import json
+from typing import Any, Literal
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import Executable, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ClauseElement
+
+CountStrategy = Literal["exact", "estimate", "cached", "none"]
+"""How the total of a paginated query is computed:
+
+- exact: ``COUNT(*)`` over the filtered rows.
+- estimate: planner estimate, ``pg_class.reltuples`` without filters or the
+  rows of ``EXPLAIN`` with filters.
+- cached: exact count stored in Redis, keyed by the normalized filter.
+- none: the count is skipped.
+"""
+
+
+class Explain(Executable, ClauseElement):
+	"""``EXPLAIN (FORMAT JSON)`` of a statement, compiled with the statement so
+	its values stay bound parameters (nothing is rendered in the SQL)"""
+
+	# Not cached, the results of a cached statement are adapted to its columns
+	inherit_cache = False
+
+	def __init__(self, statement: Any) -> None:
+		self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+	return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+def count_statement(model: Any, filter: tuple[Any]) -> Any:
+	"""Build the ``SELECT count(*)`` of the model with the filter applied"""
+	return select(func.count()).select_from(model).filter(*filter)
+
+
+async def exact_count(db: AsyncSession, model: Any, filter: tuple[Any]) -> int:
+	return (await db.scalar(count_statement(model, filter))) or 0
+
+
+async def estimate_count(db: AsyncSession, model: Any, filter: tuple[Any]) -> int:
+	"""Return the planner estimate of rows, without touching the table rows.
+
+	Without filter the estimate comes from ``pg_class.reltuples`` (kept by
+	ANALYZE/autovacuum), with filters from the ``Plan Rows`` of ``EXPLAIN``.
+	If the table was never analyzed the exact count is used instead.
+	"""
+	if not filter:
+		stmt = text(
+			"SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"
+		).bindparams(table=model.__table__.fullname)
+		estimate = await db.scalar(stmt)
+		if estimate is None or estimate < 0:
+			return await exact_count(db, model, filter)
+		return int(estimate)
+
+	plan = await db.scalar(Explain(select(model).filter(*filter)))
+	if isinstance(plan, str):
+		plan = json.loads(plan)
+	return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def filter_cache_key(db: AsyncSession, filter: tuple[Any]) -> str:
+	"""Hash the filter expressions (SQL + bound values), independent of their order"""
+	dialect = db.get_bind().dialect
+	parts = []
+	for expression in filter:
+		compiled = expression.compile(dialect=dialect)
+		parts.append(
+			[str(compiled), {key: str(value) for key, value in compiled.params.items()}]
+		)
+	parts.sort(key=lambda part: json.dumps(part, sort_keys=True))
+	return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class CountCache:
+	"""Redis cache of exact counts.
+
+	Every key embeds a per table generation counter, invalidating the counts
+	of a table (after a create/delete) is a single ``INCR`` and the old keys
+	simply expire with their TTL.
+
+	Args:
+		redis (Redis): Redis client where the counts are stored.
+		ttl (int): Seconds that a count lives in the cache.
+	"""
+
+	def __init__(self, redis: Redis, ttl: int = 60) -> None:
+		self.redis = redis
+		self.ttl = ttl
+
+	@staticmethod
+	def _generation_key(table: str) -> str:
+		return f"count:{table}:generation"
+
+	async def count(self, db: AsyncSession, model: Any, filter: tuple[Any]) -> int:
+		table = model.__table__.fullname
+		try:
+			generation = await self.redis.get(self._generation_key(table)) or 0
+			key = f"count:{table}:{generation}:{filter_cache_key(db, filter)}"
+			if (cached := await self.redis.get(key)) is not None:
+				return int(cached)
+		except RedisError as redis_error:
+			logger.warning(f"Count cache unavailable, using exact count: {redis_error}")
+			return await exact_count(db, model, filter)
+
+		total = await exact_count(db, model, filter)
+		try:
+			await self.redis.setex(key, self.ttl, total)
+		except RedisError as redis_error:
+			logger.warning(f"Count could not be cached: {redis_error}")
+		return total
+
+	async def invalidate(self, model: Any) -> None:
+		try:
+			await self.redis.incr(self._generation_key(model.__table__.fullname))
+		except RedisError as redis_error:
+			logger.warning(f"Count cache could not be invalidated: {redis_error}")
@@ -1,10 +1,22 @@
-from datetime import datetime
+from collections.abc import Callable, Collection
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache, partial
 from json import loads
 from typing import Any
+from uuid import UUID
 
+from sqlalchemy import bindparam, inspect
 from sqlalchemy.sql import operators
 from sqlalchemy.sql.operators import Operators
 
+from utils.exceptions import InvalidParameter
+
+FILTER_CACHE_SIZE = 1024
+
+Coerce = Callable[[Any], Any]
+Condition = Callable[[Any], Any]
+
 operator_map = {
 	"=": operators.eq,
 	"!=": operators.ne,
@@ -13,12 +25,160 @@ operator_map = {
 	"<": operators.lt,
 	"<=": operators.le,
 	"like": operators.like_op,
+	"ilike": operators.ilike_op,
 	"in": operators.in_op,
+	"not_in": operators.not_in_op,
 	"btw": operators.between_op,
+	"is_null": operators.is_,
+}
+
+
+class InvalidFilter(InvalidParameter, ValueError):
+	"""The filter string can't be applied to the model (a 400 response)"""
+
+
+def _identity(value: Any) -> Any:
+	return value
+
+
+def _to_datetime(value: Any) -> Any:
+	return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_date(value: Any) -> Any:
+	return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_bool(value: Any) -> Any:
+	if isinstance(value, str) and value.lower() in ("true", "false"):
+		return value.lower() == "true"
+	return value
+
+
+def _to_int(value: Any) -> Any:
+	# ``int(1.5)`` would truncate the value silently
+	if isinstance(value, str):
+		return int(value)
+	if isinstance(value, bool) or not isinstance(value, (int, float, Decimal)):
+		raise TypeError(f"{value!r} is not an integer")
+	if value != int(value):
+		raise ValueError(f"{value!r} is not an integer")
+	return int(value)
+
+
+def _to_type(python_type: type, value: Any) -> Any:
+	return value if isinstance(value, python_type) else python_type(value)
+
+
+def _coerce_for(column: Any) -> Coerce:
+	"""Convert the JSON values to the Python type of the column"""
+	try:
+		python_type = column.type.python_type
+	except NotImplementedError:
+		return _identity
+	if python_type is datetime:
+		return _to_datetime
+	if python_type is date:
+		return _to_date
+	if python_type is bool:
+		return _to_bool
+	if python_type is int:
+		return _to_int
+	if python_type in (float, Decimal, UUID):
+		return partial(_to_type, python_type)
+	return _identity
+
+
+def _bind(column: Any, value: Any) -> Any:
+	# Always a bound parameter (``= true`` would be inlined in the SQL)
+	return bindparam(column.key, value, type_=column.type, unique=True)
+
+
+def _scalar(operator: Any, column: Any, coerce: Coerce, value: Any) -> Any:
+	return operator(column, _bind(column, coerce(value)))
+
+
+def _pattern(operator: Any, column: Any, coerce: Coerce, value: Any) -> Any:
+	if not isinstance(value, str):
+		raise InvalidFilter(f"{column.key}: the pattern should be a string")
+	return operator(column, value)
+
+
+def _many(operator: Any, column: Any, coerce: Coerce, value: Any) -> Any:
+	if not isinstance(value, list):
+		raise InvalidFilter(f"{column.key}: the values should be a list")
+	return operator(column, [coerce(item) for item in value])
+
+
+def _between(operator: Any, column: Any, coerce: Coerce, value: Any) -> Any:
+	if not isinstance(value, list) or len(value) != 2:
+		raise InvalidFilter(f"{column.key}: btw needs a list with two values")
+	return operator(
+		column, _bind(column, coerce(value[0])), _bind(column, coerce(value[1]))
+	)
+
+
+def _is_null(operator: Any, column: Any, coerce: Coerce, value: Any) -> Any:
+	if not isinstance(value, bool):
+		raise InvalidFilter(f"{column.key}: is_null needs true or false")
+	return operator(column, None) if value else operators.is_not(column, None)
+
+
+_builders = {
+	"=": _scalar,
+	"!=": _scalar,
+	">": _scalar,
+	">=": _scalar,
+	"<": _scalar,
+	"<=": _scalar,
+	"like": _pattern,
+	"ilike": _pattern,
+	"in": _many,
+	"not_in": _many,
+	"btw": _between,
+	"is_null": _is_null,
 }
 
 
-def get_filters(filters: str, model_db: Any) -> tuple[Any] | tuple[Operators]:
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def compile_filters(
+	model_db: Any,
+	shape: tuple[tuple[str, str], ...],
+	allowed: frozenset[str] | None = None,
+) -> tuple[Condition, ...]:
+	"""
+	Compile the shape of a filter (its ``(column, operator)`` pairs) once per
+	process: the column lookup, the whitelist and the coercion are resolved
+	here, the conditions returned only take the values. The expressions built
+	from a shape only differ in their bound values, so SQLAlchemy reuses the
+	compiled SQL of the statement.
+	"""
+	columns = inspect(model_db).columns
+	conditions: list[Condition] = []
+	for column_name, operator in shape:
+		if (
+			column_name not in columns
+			or columns[column_name].info.get("secret")
+			or (allowed is not None and column_name not in allowed)
+		):
+			raise InvalidFilter(f"The column {column_name} can't be filtered")
+		if operator not in _builders:
+			raise InvalidFilter(f"The operator {operator} doesn't exist")
+		column = getattr(model_db, column_name)
+		conditions.append(
+			partial(
+				_builders[operator],
+				operator_map[operator],
+				column,
+				_coerce_for(column),
+			)
+		)
+	return tuple(conditions)
+
+
+def get_filters(
+	filters: str, model_db: Any, allowed: Collection[str] | None = None
+) -> tuple[Any] | tuple[Operators]:
 	"""
 	Convert a string of filters to a tuple with the real Operations.
 	The operations available are:
@@ -27,43 +187,53 @@ def get_filters(filters: str, model_db: Any) -> tuple[Any] | tuple[Operators]:
 		- !=
 		- >
 		- >=
+		- <
 		- <=
 		- like
+		- ilike
 		- in
+		- not_in
 		- btw
+		- is_null (``true`` or ``false``)
+
+	The values are converted to the type of the column (``"2024-01-31"`` for a
+	date, ``"1"`` for an integer...), only the columns of the model (and of
+	``allowed`` if given) can be filtered. The columns marked as secret
+	(``mapped_column(..., info={"secret": True})``, e.g. a password hash) are
+	never filtered, a ``like`` on them would reveal their values.
+
 	Args:
 		filters (str): A string with `n` filters used in any operation in the db.
 		model_db (Any): Model where the filter should be applied
+		allowed (Collection[str] | None): Columns that can be filtered, all by default.
 	Returns:
 		tuple[Any] | tuple[Operators] :A tuple with the applied filters.
+	Raises:
+		InvalidFilter: The string is malformed, or has a column or operator not allowed.
 
 	Examples:
 
 	.. code-block:: python
-		filter = "[["id", "=", 1]]"
+		filter = "[["id", "=", 1], ["email", "is_null", false]]"
 		get_filters(filters=filter, model_db: Employee)"""
-	filter_ = ()
-	if filters != "":
+	if filters == "":
+		return ()  # type: ignore
+	try:
 		filter: list[Any] = loads(filters)
-		for _filter in filter:
-			column_name, operator, value = _filter
-			column = getattr(model_db, column_name, None)  # Get the column dynamically
-			if column is not None:
-				if isinstance(value, str) and operator in [
-					"=",
-					"!=",
-					">",
-					">=",
-					"<",
-					"<=",
-				]:
-					try:
-						value = datetime.strptime(value, "%Y-%m-%d")
-					except ValueError:
-						pass  # It wasn't a datetime, leave it as a string
-				filter_ += (
-					(operator_map[operator](column, value),)
-					if operator != "btw"
-					else (operator_map[operator](column, value[0], value[1]),)  # type: ignore
-				)
-	return filter_  # type: ignore
+		shape = tuple((column, operator) for column, operator, _ in filter)
+		conditions = compile_filters(
+			model_db, shape, frozenset(allowed) if allowed is not None else None
+		)
+	except InvalidFilter:
+		raise
+	except (ValueError, TypeError) as error:
+		raise InvalidFilter(f"Malformed filter: {error}") from error
+	try:
+		return tuple(
+			condition(value)
+			for condition, (_, _, value) in zip(conditions, filter, strict=True)
+		)  # type: ignore
+	except InvalidFilter:
+		raise
+	except (ValueError, TypeError, ArithmeticError) as error:
+		raise InvalidFilter(f"Invalid filter value: {error}") from error
@@ -1,19 +1,54 @@
+from importlib.util import find_spec
 from typing import Annotated, Any
 
 import strawberry
 from fastapi import Depends, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from graphql.error import GraphQLError
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits, Timeout
+from jwt import PyJWTError
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from strawberry.fastapi import BaseContext
 from strawberry.permission import BasePermission
 
+from utils.cache.permission_cache import PermissionCache, Permissions
 from utils.db.async_db_conf import get_db_session
+from utils.dependencies.redis_cache import redis_master
 from utils.exceptions import ServiceError
+from utils.jwt.settings import ReadEnvJWTSettings
+from utils.jwt.verifier import JWKSCache, JWKSUnavailable, JWTVerifier
 
 security = HTTPBearer()
 
+# Long-lived client, the connections (HTTP/2 when h2 is installed) are reused
+auth_client = AsyncClient(
+	base_url="https://api.dev.keewel.co/",
+	http2=find_spec("h2") is not None,
+	limits=Limits(max_connections=100, max_keepalive_connections=20),
+	timeout=Timeout(5.0),
+)
+permission_cache = PermissionCache(ttl=60, negative_ttl=10, redis=redis_master)
+
+jwt_settings = ReadEnvJWTSettings()
+jwt_verifier = (
+	JWTVerifier(
+		JWKSCache(
+			auth_client,
+			jwt_settings.jwks_url,  # type: ignore
+			refresh_interval=jwt_settings.jwks_refresh_interval,
+		),
+		algorithms=jwt_settings.algorithms,
+		issuer=jwt_settings.issuer,
+		audience=jwt_settings.audience,
+		leeway=jwt_settings.leeway,
+		permissions_claim=jwt_settings.permissions_claim,
+		role_claim=jwt_settings.role_claim,
+	)
+	if jwt_settings.mode == "local"
+	else None
+)
+
 
 class AuthenticationFailedGraphQL(GraphQLError):
 	"""Custom exception for authentication failed"""
@@ -45,23 +80,52 @@ class IsAuthenticated(BasePermission):
 			) from e
 
 
+async def fetch_back_permission(credentials: str) -> Permissions | None:
+	"""Permissions of the token from the auth service, ``None`` if it rejects the token"""
+	response = await auth_client.get(
+		"auth/api/v1/users/me", headers={"Authorization": f"Bearer {credentials}"}
+	)
+	if response.status_code in (401, 403):
+		return None
+	if response.status_code != 200:
+		raise ServiceError(message="Server Error")
+	json_response = response.json()
+	if json_response["user_rol"]["rol_name"] == "NEW_USER":
+		return False, [{}]
+	json_return: list[dict[str, Any]] = json_response["user_permissions"][
+		"back_permission"
+	]
+	return True, json_return
+
+
+async def get_local_permissions(credentials: str) -> Permissions | None:
+	"""Permissions of the claims of the token, verified locally. ``None`` if the
+	claims don't have them or the keys are unavailable (the auth service is asked)"""
+	if jwt_verifier is None:
+		return None
+	try:
+		claims = await jwt_verifier.verify(credentials)
+	except PyJWTError as error:
+		raise AuthenticationFailedGraphQL(
+			message="Invalid token", extensions={"code": "UNAUTHORIZED"}
+		) from error
+	except JWKSUnavailable as error:
+		logger.warning(f"Local verification unavailable: {error}")
+		return None
+	return jwt_verifier.permissions(claims)
+
+
 async def get_back_permission_client(
 	credentials: str,
 ) -> tuple[bool, list[dict[str, Any]]]:
-	headers = {"Authorization": f"Bearer {credentials}"}
-	async with AsyncClient(
-		base_url="https://api.dev.keewel.co/", headers=headers
-	) as client:
-		response = await client.get("auth/api/v1/users/me")
-		if response.status_code != 200:
-			raise ServiceError(message="Server Error")
-		json_response = response.json()
-		if json_response["user_rol"]["rol_name"] == "NEW_USER":
-			return False, [{}]
-		json_return: list[dict[str, Any]] = json_response["user_permissions"][
-			"back_permission"
-		]
-		return True, json_return
+	if (permissions := await get_local_permissions(credentials)) is not None:
+		return permissions
+	permissions = await permission_cache.get(
+		credentials, lambda: fetch_back_permission(credentials)
+	)
+	if permissions is None:
+		raise ServiceError(message="Server Error")
+	return permissions
 
 
 async def get_permissions_by_table(
@@ -0,0 +1,15 @@
+from settings.grpc_settings import ReadEnvGrpcClientSettings
+from utils.grpc.channel_pool import GrpcChannelPool
+
+grpc_settings = ReadEnvGrpcClientSettings()
+
+grpc_channels = GrpcChannelPool(
+	grpc_settings.target,
+	size=grpc_settings.channels,
+	deadline=grpc_settings.deadline,
+	max_attempts=grpc_settings.max_attempts,
+)
+
+
+async def get_grpc_channels() -> GrpcChannelPool:
+	return grpc_channels
@@ -0,0 +1,28 @@
+from sqlalchemy import text
+
+from settings.health_settings import ReadEnvHealthSettings
+from utils.db.async_db_conf import sessionmanager
+from utils.dependencies.redis_cache import redis_master
+from utils.health.monitor import HealthMonitor
+
+health_settings = ReadEnvHealthSettings()
+
+
+async def postgres_probe() -> None:
+	async with sessionmanager.async_connect() as connection:
+		await connection.execute(text("SELECT 1"))
+
+
+async def redis_probe() -> None:
+	await redis_master.ping()
+
+
+health_monitor = HealthMonitor(
+	{"postgres": postgres_probe, "redis": redis_probe},
+	interval=health_settings.interval,
+	timeout=health_settings.timeout,
+)
+
+
+async def get_health_monitor() -> HealthMonitor:
+	return health_monitor
@@ -0,0 +1,169 @@
+import bisect
+import itertools
+import json
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any, TypeVar
+
+import grpc
+
+Stub = TypeVar("Stub")
+
+# Upper bounds (ms) of the latency histogram, the last bucket is the overflow
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+@dataclass
+class CallStats:
+	"""Calls, errors and latency (seconds) of a gRPC method"""
+
+	calls: int = 0
+	errors: int = 0
+	total_seconds: float = 0.0
+	max_seconds: float = 0.0
+	buckets: list[int] = field(
+		default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1)
+	)
+
+	def record(self, seconds: float, ok: bool) -> None:
+		self.calls += 1
+		self.errors += not ok
+		self.total_seconds += seconds
+		self.max_seconds = max(self.max_seconds, seconds)
+		self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+
+	def as_dict(self) -> dict[str, Any]:
+		return asdict(self) | {
+			"avg_seconds": self.total_seconds / self.calls if self.calls else 0.0
+		}
+
+
+class UnaryCallInterceptor(grpc.aio.UnaryUnaryClientInterceptor):
+	"""Apply the default deadline to the calls without one and record the
+	latency and the status of every unary call by method"""
+
+	def __init__(self, deadline: float, stats: dict[str, CallStats]) -> None:
+		self.deadline = deadline
+		self.stats = stats
+
+	async def intercept_unary_unary(
+		self,
+		continuation: Callable[..., Any],
+		client_call_details: grpc.aio.ClientCallDetails,
+		request: Any,
+	) -> Any:
+		if client_call_details.timeout is None:
+			client_call_details = client_call_details._replace(timeout=self.deadline)  # type: ignore
+		method = client_call_details.method
+		if isinstance(method, bytes):
+			method = method.decode()
+		start = time.perf_counter()
+		call = await continuation(client_call_details, request)
+		ok = True
+		try:
+			await call
+		except grpc.aio.AioRpcError:
+			ok = False
+		self.stats.setdefault(method, CallStats()).record(
+			time.perf_counter() - start, ok
+		)
+		return call
+
+
+def service_config(max_attempts: int) -> str:
+	"""Round robin between the subchannels and retries of the unavailable
+	calls with exponential backoff. The deadline is not set here, it would
+	cap the deadline of every call"""
+	method_config: dict[str, Any] = {"name": [{}]}
+	if max_attempts > 1:
+		method_config["retryPolicy"] = {
+			"maxAttempts": max_attempts,
+			"initialBackoff": "0.05s",
+			"maxBackoff": "1s",
+			"backoffMultiplier": 2,
+			"retryableStatusCodes": ["UNAVAILABLE"],
+		}
+	return json.dumps(
+		{
+			"loadBalancingConfig": [{"round_robin": {}}],
+			"methodConfig": [method_config],
+		}
+	)
+
+
+class GrpcChannelPool:
+	"""Long-lived gRPC channels to a target, used in round robin.
+
+	Each channel has its own subchannels (connections), inside a channel the
+	calls are balanced between the addresses of the target. The service
+	config retries the ``UNAVAILABLE`` calls, the calls without a deadline
+	get ``deadline`` and the latency of every call is recorded in ``stats``.
+
+	The channels belong to the event loop that opens them, open them in the
+	lifespan of the app.
+
+	Args:
+		target (str): Target of the channels (``dns:///orders-grpc:50051``).
+		size (int): Channels opened.
+		deadline (float): Default deadline (seconds) of a call.
+		max_attempts (int): Attempts of a call, retries included.
+		options (list[tuple[str, Any]] | None): Extra options of the channels.
+
+	.. code-block:: python
+
+	        grpc_channels = GrpcChannelPool("localhost:50051", size=2)
+	        grpc_channels.open()
+	        stub = grpc_channels.stub(health_pb2_grpc.GetHealtStub)
+	        response = await stub.Health(Empty())
+	        await grpc_channels.close()
+	"""  # noqa: E101
+
+	def __init__(
+		self,
+		target: str,
+		size: int = 2,
+		deadline: float = 1.0,
+		max_attempts: int = 3,
+		options: list[tuple[str, Any]] | None = None,
+	) -> None:
+		self.target = target
+		self.size = size
+		self.deadline = deadline
+		self.options = [
+			("grpc.service_config", service_config(max_attempts)),
+			("grpc.enable_retries", int(max_attempts > 1)),
+			# Otherwise the channels with the same options share the connections
+			("grpc.use_local_subchannel_pool", 1),
+			("grpc.keepalive_time_ms", 30_000),
+			*(options or []),
+		]
+		self.stats: dict[str, CallStats] = {}
+		self._channels: list[grpc.aio.Channel] = []
+		self._next: itertools.cycle[int] = itertools.cycle(range(size))
+		self._stubs: dict[tuple[int, Any], Any] = {}
+
+	def open(self) -> None:
+		if self._channels:
+			return
+		interceptors = [UnaryCallInterceptor(self.deadline, self.stats)]
+		self._channels = [
+			grpc.aio.insecure_channel(
+				self.target, options=self.options, interceptors=interceptors
+			)
+			for _ in range(self.size)
+		]
+
+	async def close(self, grace: float | None = None) -> None:
+		channels, self._channels = self._channels, []
+		self._stubs.clear()
+		for channel in channels:
+			await channel.close(grace)
+
+	def stub(self, stub_class: Callable[[grpc.aio.Channel], Stub]) -> Stub:
+		"""Stub of the next channel, the stubs are created once per channel"""
+		self.open()
+		index = next(self._next)
+		if (stub := self._stubs.get((index, stub_class))) is None:
+			stub = self._stubs[index, stub_class] = stub_class(self._channels[index])
+		return stub
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from loguru import logger
+
+# Raises (or times out) if the dependency is unavailable
+Probe = Callable[[], Awaitable[Any]]
+Listener = Callable[[bool], Awaitable[None]]
+
+
+@dataclass
+class ProbeResult:
+	"""Result of the last probe of a dependency"""
+
+	healthy: bool = False
+	latency_seconds: float = 0.0
+	error: str | None = "Not checked yet"
+	checked_at: float = 0.0
+
+
+class HealthMonitor:
+	"""Probe the dependencies in the background and cache the status.
+
+	Every ``interval`` seconds all the probes run concurrently (each one up
+	to ``timeout`` seconds), the health checks only read the cached results.
+	The service is ready when every probe succeeded in the last round, and
+	alive while the rounds keep running (the event loop isn't blocked and the
+	task didn't die). The listeners are awaited when the readiness changes.
+
+	Args:
+		probes (Mapping[str, Probe]): Probes by dependency name.
+		interval (float): Seconds between rounds.
+		timeout (float): Seconds that a probe can take.
+
+	.. code-block:: python
+
+	        health_monitor = HealthMonitor({"redis": redis_master.ping}, interval=5)
+	        health_monitor.start()
+	        health_monitor.ready, health_monitor.snapshot()
+	"""  # noqa: E101
+
+	def __init__(
+		self, probes: Mapping[str, Probe], interval: float = 5.0, timeout: float = 2.0
+	) -> None:
+		self.probes = dict(probes)
+		self.interval = interval
+		self.timeout = timeout
+		self.ready = False
+		self.results = {name: ProbeResult() for name in self.probes}
+		self._listeners: list[Listener] = []
+		self._checked_at: float | None = None
+		self._task: asyncio.Task[None] | None = None
+
+	def subscribe(self, listener: Listener) -> None:
+		self._listeners.append(listener)
+
+	async def _probe(self, probe: Probe) -> ProbeResult:
+		start = time.perf_counter()
+		try:
+			async with asyncio.timeout(self.timeout):
+				await probe()
+		except Exception as error:
+			return ProbeResult(
+				healthy=False,
+				latency_seconds=time.perf_counter() - start,
+				error=repr(error),
+				checked_at=time.time(),
+			)
+		return ProbeResult(
+			healthy=True,
+			latency_seconds=time.perf_counter() - start,
+			error=None,
+			checked_at=time.time(),
+		)
+
+	async def check(self) -> bool:
+		"""Run a round of probes, returns if the service is ready"""
+		results = await asyncio.gather(*map(self._probe, self.probes.values()))
+		self.results = dict(zip(self.probes, results, strict=True))
+		self._checked_at = time.monotonic()
+		ready = all(result.healthy for result in results)
+		if ready != self.ready:
+			self.ready = ready
+			failing = [
+				name for name, result in self.results.items() if not result.healthy
+			]
+			logger.info(f"Service {'ready' if ready else f'not ready: {failing}'}")
+			for listener in self._listeners:
+				try:
+					await listener(ready)
+				except Exception as error:
+					logger.warning(f"Health listener failed: {error}")
+		return ready
+
+	@property
+	def alive(self) -> bool:
+		if self._task is None or self._task.done():
+			return False
+		if self._checked_at is None:
+			# The first round is running
+			return True
+		stale_after = 3 * self.interval + self.timeout
+		return time.monotonic() - self._checked_at <= stale_after
+
+	def snapshot(self) -> dict[str, Any]:
+		return {
+			"status": "OK" if self.ready else "UNAVAILABLE",
+			"checks": {name: asdict(result) for name, result in self.results.items()},
+		}
+
+	async def run(self) -> None:
+		while True:
+			await self.check()
+			await asyncio.sleep(self.interval)
+
+	def start(self) -> asyncio.Task[None]:
+		"""Start (once per process) the task that probes the dependencies"""
+		if self._task is None or self._task.done():
+			self._task = asyncio.create_task(self.run())
+		return self._task
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
@@ -0,0 +1,55 @@
+from typing import Literal, Self
+
+from pydantic import Field, model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class ReadEnvJWTSettings(BaseSettings):
+	"""
+	Read Environment variables to choose how the bearer tokens are verified:
+	``remote`` asks the auth service (default), ``local`` verifies the JWT
+	with the keys of the JWKS and takes the permissions from its claims.
+
+	If you want to use other file
+	.. code-block:: python
+	    ReadEnvJWTSettings(_env_file="name_of_env_file")
+
+	"""  # noqa: E101
+
+	mode: Literal["remote", "local"] = Field(
+		"remote", description="Verification of the tokens", alias="AUTH_VERIFICATION"
+	)
+	jwks_url: str | None = Field(
+		None, description="URL of the JWKS of the auth service", alias="JWT_JWKS_URL"
+	)
+	algorithms: list[str] = Field(
+		["RS256"], description="Algorithms accepted", alias="JWT_ALGORITHMS"
+	)
+	issuer: str | None = Field(None, description="Expected iss", alias="JWT_ISSUER")
+	audience: str | None = Field(None, description="Expected aud", alias="JWT_AUDIENCE")
+	leeway: float = Field(
+		30.0, description="Seconds of clock skew allowed", alias="JWT_LEEWAY"
+	)
+	jwks_refresh_interval: float = Field(
+		300.0,
+		description="Seconds between refreshes of the JWKS",
+		alias="JWKS_REFRESH_INTERVAL",
+	)
+	permissions_claim: str = Field(
+		"back_permission",
+		description="Claim with the permissions",
+		alias="JWT_PERMISSIONS_CLAIM",
+	)
+	role_claim: str = Field(
+		"rol_name", description="Claim with the role", alias="JWT_ROLE_CLAIM"
+	)
+
+	model_config = SettingsConfigDict(
+		env_file=".env", env_file_encoding="utf-8", case_sensitive=True, extra="ignore"
+	)
+
+	@model_validator(mode="after")
+	def check_jwks_url(self) -> Self:
+		if self.mode == "local" and not self.jwks_url:
+			raise ValueError("JWT_JWKS_URL is required when AUTH_VERIFICATION=local")
+		return self
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from typing import Any
+
+import jwt
+from httpx import AsyncClient, HTTPError
+from jwt import PyJWK, PyJWKSet
+from loguru import logger
+
+from utils.cache.permission_cache import Permissions
+from utils.cache.stampede import SingleFlight
+
+
+class JWKSUnavailable(Exception):
+	"""The keys of the JWKS could not be fetched"""
+
+
+class JWKSCache:
+	"""Signing keys of a JWKS, fetched once and refreshed in the background.
+
+	A token signed with an unknown ``kid`` (a rotation) fetches the JWKS
+	again, at most once every ``min_refresh_interval`` seconds. A failed
+	refresh keeps the known keys.
+
+	Args:
+		client (AsyncClient): Client used to fetch the JWKS.
+		url (str): URL of the JWKS.
+		refresh_interval (float): Seconds between background refreshes.
+		min_refresh_interval (float): Seconds between refreshes of unknown keys.
+	"""
+
+	def __init__(
+		self,
+		client: AsyncClient,
+		url: str,
+		refresh_interval: float = 300.0,
+		min_refresh_interval: float = 30.0,
+	) -> None:
+		self.client = client
+		self.url = url
+		self.refresh_interval = refresh_interval
+		self.min_refresh_interval = min_refresh_interval
+		self._keys: dict[str | None, PyJWK] = {}
+		self._refreshed_at = float("-inf")
+		self._single_flight = SingleFlight()
+		self._task: asyncio.Task[None] | None = None
+
+	async def refresh(self) -> None:
+		await self._single_flight.do(self.url, self._fetch)
+
+	async def _fetch(self) -> None:
+		self._refreshed_at = time.monotonic()
+		try:
+			response = await self.client.get(self.url)
+			response.raise_for_status()
+			jwks = PyJWKSet.from_dict(response.json())
+		except (HTTPError, ValueError, jwt.PyJWTError) as error:
+			raise JWKSUnavailable(f"JWKS {self.url} unavailable: {error}") from error
+		self._keys = {key.key_id: key for key in jwks.keys}
+
+	async def get_key(self, kid: str | None) -> PyJWK:
+		self.start()
+		if (key := self._keys.get(kid)) is not None:
+			return key
+		if time.monotonic() - self._refreshed_at >= self.min_refresh_interval:
+			await self.refresh()
+			if (key := self._keys.get(kid)) is not None:
+				return key
+		if not self._keys:
+			raise JWKSUnavailable(f"JWKS {self.url} has no keys")
+		raise jwt.InvalidKeyError(f"Unknown signing key {kid}")
+
+	async def run(self) -> None:
+		while True:
+			try:
+				await self.refresh()
+			except JWKSUnavailable as error:
+				logger.warning(str(error))
+			await asyncio.sleep(self.refresh_interval)
+
+	def start(self) -> asyncio.Task[None]:
+		"""Start (once per process) the task that refreshes the keys"""
+		if self._task is None or self._task.done():
+			self._task = asyncio.create_task(self.run())
+		return self._task
+
+
+class JWTVerifier:
+	"""Verify the bearer tokens locally (signature, ``exp``, ``iss``, ``aud``).
+
+	The permissions are read from the claims, in the shape returned by the
+	auth service (``(has_permission, back_permission)``), a role ``NEW_USER``
+	has no permission.
+
+	Args:
+		jwks (JWKSCache): Signing keys.
+		algorithms (list[str]): Algorithms accepted.
+		issuer (str | None): Expected ``iss``, not checked if ``None``.
+		audience (str | None): Expected ``aud``, not checked if ``None``.
+		leeway (float): Seconds of clock skew allowed.
+		permissions_claim (str): Claim with the permissions.
+		role_claim (str): Claim with the role.
+
+	.. code-block:: python
+
+	        verifier = JWTVerifier(JWKSCache(client, jwks_url), algorithms=["RS256"])
+	        claims = await verifier.verify(token)
+	        permissions = verifier.permissions(claims)
+	"""  # noqa: E101
+
+	def __init__(
+		self,
+		jwks: JWKSCache,
+		algorithms: list[str],
+		issuer: str | None = None,
+		audience: str | None = None,
+		leeway: float = 30.0,
+		permissions_claim: str = "back_permission",
+		role_claim: str = "rol_name",
+	) -> None:
+		self.jwks = jwks
+		self.algorithms = algorithms
+		self.issuer = issuer
+		self.audience = audience
+		self.leeway = leeway
+		self.permissions_claim = permissions_claim
+		self.role_claim = role_claim
+
+	async def verify(self, token: str) -> dict[str, Any]:
+		"""Claims of a valid token, raises ``jwt.PyJWTError`` if it is not valid
+		and ``JWKSUnavailable`` if the keys can't be fetched"""
+		header = jwt.get_unverified_header(token)
+		key = await self.jwks.get_key(header.get("kid"))
+		return jwt.decode(
+			token,
+			key.key,
+			algorithms=self.algorithms,
+			audience=self.audience,
+			issuer=self.issuer,
+			leeway=self.leeway,
+			options={"require": ["exp"], "verify_aud": self.audience is not None},
+		)
+
+	def permissions(self, claims: dict[str, Any]) -> Permissions | None:
+		"""Permissions of the claims, ``None`` if the token doesn't embed them"""
+		if claims.get(self.role_claim) == "NEW_USER":
+			return False, [{}]
+		if not isinstance(permissions := claims.get(self.permissions_claim), list):
+			return None
+		return True, permissions
@@ -1,25 +1,131 @@
+import json
 from collections.abc import Awaitable, Callable
 from typing import Any
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from strawberry.fastapi import GraphQLRouter
+from strawberry.fastapi.router import StarletteRequestAdapter
+from strawberry.types.unset import UNSET
 
+Scope = dict[str, Any]
+Message = dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
 
-class AddGraphQLContextMiddleware(BaseHTTPMiddleware):
-	async def dispatch(
-		self, request: Request, call_next: Callable[[Request], Awaitable[Any]]
+
+class ParsedBody(bytes):
+	"""Body of a GraphQL request and its JSON, parsed once by the middleware"""
+
+	data: Any
+
+
+class AddGraphQLContextMiddleware:
+	"""Share the query, variables and extensions of the GraphQL requests (pure ASGI).
+
+	The body of a ``POST`` to ``path`` is read and parsed once, the context is
+	stored in the scope state (``request.state.context``) and the body is
+	replayed to the application. ``GraphQLContextRouter`` takes the parsed
+	body from the scope instead of parsing it again. The response is streamed
+	untouched, only the cache headers of ``cache_source`` are added.
+
+	Args:
+		app (ASGIApp): Application.
+		path (str): Path of the GraphQL endpoint.
+	"""
+
+	def __init__(self, app: ASGIApp, path: str = "/graphql") -> None:
+		self.app = app
+		self.path = path
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		path: str = scope.get("path", "")
+		root_path: str = scope.get("root_path", "")
+		if root_path and path.startswith(root_path):
+			path = path[len(root_path) :]
+		if scope["type"] != "http" or path != self.path or scope["method"] != "POST":
+			await self.app(scope, receive, send)
+			return
+
+		chunks: list[bytes] = []
+		while True:
+			message = await receive()
+			if message["type"] != "http.request":
+				await self.app(scope, receive, send)
+				return
+			chunks.append(message.get("body", b""))
+			if not message.get("more_body", False):
+				break
+		body = ParsedBody(b"".join(chunks))
+		state: dict[str, Any] = scope.setdefault("state", {})
+		try:
+			body.data = json.loads(body)
+		except ValueError:
+			# Strawberry answers the invalid body
+			pass
+		else:
+			state["graphql_body"] = body
+			if isinstance(body.data, dict):
+				state["context"] = {
+					"query": body.data.get("query"),
+					"variables": body.data.get("variables") or {},
+					"extensions": body.data.get("extensions") or {},
+				}
+
+		replayed = False
+
+		async def replay() -> Message:
+			nonlocal replayed
+			if replayed:
+				return await receive()
+			replayed = True
+			return {"type": "http.request", "body": bytes(body), "more_body": False}
+
+		async def send_with_cache_headers(message: Message) -> None:
+			if message["type"] == "http.response.start":
+				cache_source = state.get("context", {}).get("cache_source")
+				if cache_source:
+					headers = list(message.get("headers", []))
+					headers.append((b"x-cache-source", cache_source.encode()))
+					if cache_source == "cache":
+						headers.append((b"cache-control", b"max-age=3600"))
+					message = message | {"headers": headers}
+			await send(message)
+
+		await self.app(scope, replay, send_with_cache_headers)
+
+
+class ScopeRequestAdapter(StarletteRequestAdapter):
+	async def get_body(self) -> bytes:
+		if (
+			body := self._request.scope.get("state", {}).get("graphql_body")
+		) is not None:
+			return body
+		return await super().get_body()
+
+
+class GraphQLContextRouter(GraphQLRouter):
+	"""``GraphQLRouter`` that reuses the body parsed by ``AddGraphQLContextMiddleware``.
+
+	The context of the resolvers (a copy of the one of ``context_getter``) is
+	stored in the scope, the middleware reads its ``cache_source``.
+
+	.. code-block:: python
+
+	        app.add_middleware(AddGraphQLContextMiddleware)
+	        app.include_router(GraphQLContextRouter(schema, context_getter=get_context))
+	"""  # noqa: E101
+
+	request_adapter_class = ScopeRequestAdapter
+
+	def parse_json(self, data: str | bytes) -> Any:
+		if isinstance(data, ParsedBody):
+			return data.data
+		return super().parse_json(data)
+
+	async def run(
+		self, request: Any, context: Any = UNSET, root_value: Any = UNSET
 	) -> Any:
-		if request.url.path == "/graphql":
-			# Extract query and variables
-			body = await request.json()
-			request.state.context = {
-				"query": body.get("query"),
-				"variables": body.get("variables", {}),
-			}
-		response = await call_next(request)
-		cache_source = getattr(request.state, "context", {}).get("cache_source")
-		if cache_source:
-			response.headers["X-Cache-Source"] = cache_source
-			if cache_source == "cache":
-				response.headers["Cache-Control"] = "max-age=3600"
-		return response
+		state = request.scope.get("state", {})
+		if isinstance(context, dict) and "graphql_body" in state:
+			state["context"] = context
+		return await super().run(request, context=context, root_value=root_value)
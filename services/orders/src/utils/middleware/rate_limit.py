@@ -0,0 +1,176 @@
+import json
+import math
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .client_ip import client_ip
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+# GCRA (token bucket without refill writes): the key stores the theoretical
+# arrival time (TAT) of the next request. A request is allowed while the TAT
+# is at most ``tolerance`` ahead of now, each one moves it ``emission`` ms.
+# ARGV: emission interval (ms), tolerance (ms)
+# Returns {allowed, retry after (ms), remaining}
+GCRA_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + tonumber(time[2]) / 1000
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local new_tat = tat + emission
+if new_tat - now > tolerance then
+	return {0, math.ceil(new_tat - now - tolerance), 0}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, 0, math.floor((tolerance - (new_tat - now)) / emission)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+	"""``rate`` requests every ``period`` seconds, up to ``burst`` at once
+	(``rate`` by default)"""
+
+	rate: int
+	period: float = 1.0
+	burst: int | None = None
+
+	@property
+	def emission_ms(self) -> float:
+		return self.period * 1000 / self.rate
+
+	@property
+	def tolerance_ms(self) -> float:
+		return self.emission_ms * (self.burst or self.rate)
+
+
+class RateLimitMiddleware:
+	"""Rate limit the requests per client and route (pure ASGI).
+
+	Every request is one call of the GCRA script in Redis. The clients
+	rejected are remembered in memory until their ``Retry-After``, their next
+	requests are rejected without calling Redis. A rejected request gets a
+	429 with ``Retry-After``. If Redis is unavailable the requests pass.
+
+	Args:
+		app (ASGIApp): Application.
+		redis (Redis): Client of the master (the script writes).
+		default (RateLimit): Limit of the paths without a specific one.
+		routes (Mapping[str, RateLimit | None]): Limits by path prefix (the longest
+			prefix wins), ``None`` disables the limit of the prefix.
+		key_func (Callable[[Scope], str]): Identifies the client, by default its ip
+			(``X-Forwarded-For`` behind ``TRUSTED_PROXY_DEPTH`` proxies).
+		max_blocked (int): Clients remembered as rejected in memory.
+
+	.. code-block:: python
+
+	        app.add_middleware(
+	            RateLimitMiddleware,
+	            redis=redis_master,
+	            default=RateLimit(rate=50, period=1, burst=100),
+	            routes={"/auth/login": RateLimit(rate=10, period=60), "/health": None},
+	        )
+	"""  # noqa: E101
+
+	def __init__(
+		self,
+		app: ASGIApp,
+		redis: Redis,
+		default: RateLimit,
+		routes: Mapping[str, RateLimit | None] | None = None,
+		key_func: Callable[[Scope], str] = client_ip,
+		max_blocked: int = 10_000,
+	) -> None:
+		self.app = app
+		self.default = default
+		self.routes = sorted((routes or {}).items(), key=lambda item: -len(item[0]))
+		self.key_func = key_func
+		self.max_blocked = max_blocked
+		self._script = redis.register_script(GCRA_SCRIPT)
+		self._blocked: dict[str, float] = {}
+
+	def _limit(self, path: str) -> tuple[str, RateLimit | None]:
+		for prefix, limit in self.routes:
+			if path.startswith(prefix):
+				return prefix, limit
+		return "*", self.default
+
+	def _blocked_for(self, key: str) -> float:
+		"""Seconds that the key is still rejected locally"""
+		if (until := self._blocked.get(key)) is None:
+			return 0.0
+		if (remaining := until - time.monotonic()) <= 0:
+			del self._blocked[key]
+			return 0.0
+		return remaining
+
+	def _block(self, key: str, seconds: float) -> None:
+		if len(self._blocked) >= self.max_blocked:
+			now = time.monotonic()
+			self._blocked = {k: v for k, v in self._blocked.items() if v > now}
+			if len(self._blocked) >= self.max_blocked:
+				return
+		self._blocked[key] = time.monotonic() + seconds
+
+	async def _retry_after(self, key: str, limit: RateLimit) -> float:
+		"""Seconds to wait if the request is rejected, 0 if it is allowed"""
+		if retry_after := self._blocked_for(key):
+			return retry_after
+		try:
+			allowed, retry_after_ms, _ = await self._script(
+				keys=[key], args=[limit.emission_ms, limit.tolerance_ms]
+			)
+		except RedisError as redis_error:
+			logger.warning(f"Rate limit unavailable: {redis_error}")
+			return 0.0
+		if allowed:
+			return 0.0
+		self._block(key, retry_after_ms / 1000)
+		return retry_after_ms / 1000
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		path: str = scope["path"]
+		root_path: str = scope.get("root_path", "")
+		if root_path and path.startswith(root_path):
+			path = path[len(root_path) :]
+		prefix, limit = self._limit(path)
+		if limit is not None:
+			key = f"ratelimit:{prefix}:{self.key_func(scope)}"
+			if retry_after := await self._retry_after(key, limit):
+				await self._reject(scope, send, math.ceil(retry_after))
+				return
+		await self.app(scope, receive, send)
+
+	@staticmethod
+	async def _reject(scope: Scope, send: Send, retry_after: int) -> None:
+		body = json.dumps(
+			{
+				"_embedded": {"message": "Too many requests, try again later"},
+				"_links": {"self": f"{scope.get('root_path', '')}{scope['path']}"},
+			}
+		).encode()
+		await send(
+			{
+				"type": "http.response.start",
+				"status": 429,
+				"headers": [
+					(b"content-type", b"application/json"),
+					(b"content-length", str(len(body)).encode()),
+					(b"retry-after", str(retry_after).encode()),
+				],
+			}
+		)
+		await send({"type": "http.response.body", "body": body})
@@ -1,21 +1,45 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from routes.products import router
 from schema.products import HealthCheck
+from settings.utils import secret_store
+from utils.dependencies.redis_cache import redis_master
+from utils.middleware.rate_limit import RateLimit, RateLimitMiddleware
 
 
 
 
 
 origin = ["*"]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    secret_store.start()
+    yield
+    await asyncio.to_thread(secret_store.stop, 5.0)
+
+
 app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     version="0.0.1",
     root_path="/products".lower(),
+    lifespan=lifespan,
 )
 
+# Added before CORS so the rejections also get the CORS headers
+app.add_middleware(
+    RateLimitMiddleware,
+    redis=redis_master,
+    default=RateLimit(rate=50, period=1, burst=100),
+    routes={"/health": None},
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origin,
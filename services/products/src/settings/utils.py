@@ -1,7 +1,13 @@
 import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
 from typing import Any
 
 from boto3 import Session
+from loguru import logger
 from pydantic import Field
 from pydantic_settings import (
 	BaseSettings,
@@ -20,9 +26,11 @@ class AWSSettings(BaseSettings):
 		BaseSettings
 	"""
 
-	aws_access_key_id: str = Field(...)
-	aws_secret_access_key: str = Field(...)
+	aws_access_key_id: str | None = Field(default=None)
+	aws_secret_access_key: str | None = Field(default=None)
 	region_name: str = Field(default="us-east-2")
+	secrets_ttl: float = Field(default=300.0)
+	secrets_file: str | None = Field(default=None)
 	model_config = SettingsConfigDict(
 		env_file=".env",
 		env_file_encoding="utf-8",
@@ -32,6 +40,135 @@ class AWSSettings(BaseSettings):
 aws_settings = AWSSettings()  # type: ignore
 
 
+class SecretStore:
+	"""Secrets of AWS Secret Manager fetched once per process.
+
+	The client is created once and shared, every secret is fetched once and
+	kept ``ttl`` seconds. Between ``start()`` and ``stop()`` a background
+	thread fetches every secret read again each ``ttl / 2`` seconds, so a
+	rotation is picked up without a read. Otherwise an expired secret is still
+	returned while a thread fetches it again, a rotation never blocks a read.
+
+	A local stand-in replaces AWS: the environment variable
+	``SECRET_<NAME>`` (e.g. ``SECRET_BACKEND_VARS``) or the JSON file
+	``secrets_file`` (``{"backend_vars": {...}}``).
+
+	Args:
+		client_factory (Callable[[], Any]): Creates the secretsmanager client.
+		ttl (float): Seconds to keep a secret before refreshing it.
+		secrets_file (str | None): JSON file with the secrets, used instead of AWS.
+	"""
+
+	def __init__(
+		self,
+		client_factory: Callable[[], Any],
+		ttl: float = 300.0,
+		secrets_file: str | None = None,
+	) -> None:
+		self.client_factory = client_factory
+		self.ttl = ttl
+		self.secrets_file = secrets_file
+		self._client: Any = None
+		self._secrets: dict[str, tuple[float, str | dict[str, Any]]] = {}
+		self._refreshing: set[str] = set()
+		self._lock = threading.Lock()
+		self._stopped = threading.Event()
+		self._refresher: threading.Thread | None = None
+
+	@property
+	def client(self) -> Any:
+		with self._lock:
+			if self._client is None:
+				self._client = self.client_factory()
+			return self._client
+
+	@staticmethod
+	def _parse(secret_string: str) -> str | dict[str, Any]:
+		try:
+			return json.loads(secret_string)  # type: ignore
+		except json.decoder.JSONDecodeError:
+			return secret_string
+
+	def fetch(self, secret_name: str) -> str | dict[str, Any]:
+		if (local := os.environ.get(f"SECRET_{secret_name.upper()}")) is not None:
+			return self._parse(local)
+		if self.secrets_file is not None:
+			secrets: dict[str, Any] = json.loads(Path(self.secrets_file).read_text())
+			return secrets[secret_name]
+		secret_string: str = self.client.get_secret_value(SecretId=secret_name)[
+			"SecretString"
+		]
+		return self._parse(secret_string)
+
+	def _refresh(self, secret_name: str) -> None:
+		try:
+			secret = self.fetch(secret_name)
+		except Exception as error:
+			logger.warning(f"Secret {secret_name} could not be refreshed: {error}")
+		else:
+			with self._lock:
+				self._secrets[secret_name] = (time.monotonic() + self.ttl, secret)
+		finally:
+			with self._lock:
+				self._refreshing.discard(secret_name)
+
+	def refresh_all(self) -> None:
+		"""Fetch again every secret read, a failed fetch keeps the old value"""
+		with self._lock:
+			names = [name for name in self._secrets if name not in self._refreshing]
+			self._refreshing.update(names)
+		for secret_name in names:
+			self._refresh(secret_name)
+
+	def _run(self) -> None:
+		# Half the TTL, the secrets are fetched again before they expire
+		while not self._stopped.wait(self.ttl / 2):
+			self.refresh_all()
+
+	def start(self) -> None:
+		"""Start (once) the thread that refreshes the secrets"""
+		if self._refresher is None or not self._refresher.is_alive():
+			self._stopped.clear()
+			self._refresher = threading.Thread(target=self._run, daemon=True)
+			self._refresher.start()
+
+	def stop(self, timeout: float | None = None) -> None:
+		self._stopped.set()
+		if self._refresher is not None:
+			self._refresher.join(timeout)
+			self._refresher = None
+
+	def get(self, secret_name: str) -> str | dict[str, Any]:
+		with self._lock:
+			cached = self._secrets.get(secret_name)
+			if cached is not None and (
+				cached[0] > time.monotonic() or secret_name in self._refreshing
+			):
+				return cached[1]
+			if cached is not None:
+				self._refreshing.add(secret_name)
+		if cached is not None:
+			threading.Thread(
+				target=self._refresh, args=(secret_name,), daemon=True
+			).start()
+			return cached[1]
+		secret = self.fetch(secret_name)
+		with self._lock:
+			self._secrets[secret_name] = (time.monotonic() + self.ttl, secret)
+		return secret
+
+
+secret_store = SecretStore(
+	lambda: Session(
+		aws_access_key_id=aws_settings.aws_access_key_id,
+		aws_secret_access_key=aws_settings.aws_secret_access_key,
+		region_name=aws_settings.region_name,
+	).client("secretsmanager"),
+	ttl=aws_settings.secrets_ttl,
+	secrets_file=aws_settings.secrets_file,
+)
+
+
 class SecretManagerCofig(PydanticBaseSettingsSource):
 	"""Class that retrieve all the data from AWS Secret Manager.
 
@@ -75,22 +212,18 @@ class SecretManagerCofig(PydanticBaseSettingsSource):
 		Returns:
 			str | dict[str, Any]: Return a dict with the values finded in the vault.
 		"""
-		session = Session(
-			aws_access_key_id=aws_settings.aws_access_key_id,
-			aws_secret_access_key=aws_settings.aws_secret_access_key,
-			region_name=aws_settings.region_name,
-		)
-		client = session.client("secretsmanager")
-		secret_string: str = client.get_secret_value(SecretId=secret_name)[
-			"SecretString"
-		]
-		try:
-			return json.loads(secret_string)  # type: ignore
-		except json.decoder.JSONDecodeError:
-			return secret_string
+		return secret_store.get(secret_name)
 
 	def __call__(self) -> dict[str, Any]:
+		# A single (cached) lookup for every field, missing fields are left
+		# to the next sources
+		secret = self.get_field_value()
+		if not isinstance(secret, dict):
+			# A plain string secret has no fields
+			logger.warning("The secret is not a JSON object, no settings are read")
+			return {}
 		return {
-			name: self.get_field_value()[name]  # type: ignore
-			for name, _ in self.settings_cls.model_fields.items()
+			name: secret[name]  # type: ignore
+			for name in self.settings_cls.model_fields
+			if name in secret
 		}
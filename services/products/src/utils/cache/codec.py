@@ -0,0 +1,174 @@
+import json
+import zlib
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any, Literal
+
+try:
+	import orjson
+except ImportError:
+	orjson = None  # type: ignore
+
+try:
+	import msgpack  # type: ignore
+except ImportError:
+	msgpack = None
+
+try:
+	import zstandard  # type: ignore
+except ImportError:
+	zstandard = None
+
+try:
+	import lz4.frame  # type: ignore
+except ImportError:
+	lz4 = None
+
+Serializer = Literal["json", "orjson", "msgpack"]
+Compression = Literal["none", "zlib", "zstd", "lz4"]
+
+# The first byte of every payload: serializer in the high nibble, compression
+# in the low one. Legacy payloads (JSON text) start with ``{``, that never
+# collides with a header, so both formats can be read during a rollout.
+SERIALIZERS: dict[Serializer, int] = {"json": 0, "orjson": 1, "msgpack": 2}
+COMPRESSIONS: dict[Compression, int] = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+LEGACY_JSON = ord("{")
+
+
+class CodecError(Exception):
+	"""The payload can't be decoded (unknown format or library not installed)"""
+
+
+@dataclass
+class CodecStats:
+	"""Size of the encoded payloads, before and after compression"""
+
+	encoded: int = 0
+	compressed: int = 0
+	raw_bytes: int = 0
+	stored_bytes: int = 0
+
+	@property
+	def bytes_saved(self) -> int:
+		return self.raw_bytes - self.stored_bytes
+
+	def as_dict(self) -> dict[str, int]:
+		return asdict(self) | {"bytes_saved": self.bytes_saved}
+
+
+def _dumps(serializer: Serializer) -> Callable[[Any], bytes]:
+	if serializer == "orjson" and orjson is not None:
+		return orjson.dumps
+	if serializer == "msgpack" and msgpack is not None:
+		return msgpack.packb
+	if serializer == "json":
+		return lambda value: json.dumps(value, separators=(",", ":")).encode()
+	raise CodecError(f"Serializer {serializer} is not installed")
+
+
+def _loads(serializer: int) -> Callable[[bytes], Any]:
+	if serializer == SERIALIZERS["json"]:
+		return json.loads
+	if serializer == SERIALIZERS["orjson"] and orjson is not None:
+		return orjson.loads
+	if serializer == SERIALIZERS["msgpack"] and msgpack is not None:
+		return msgpack.unpackb
+	raise CodecError(f"Serializer {serializer} is not supported")
+
+
+def _compress(compression: Compression, level: int | None) -> Callable[[bytes], bytes]:
+	if compression == "zlib":
+		return lambda data: zlib.compress(data, -1 if level is None else level)
+	if compression == "zstd" and zstandard is not None:
+		compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+		return compressor.compress
+	if compression == "lz4" and lz4 is not None:
+		return lambda data: lz4.frame.compress(data, compression_level=level or 0)
+	raise CodecError(f"Compression {compression} is not installed")
+
+
+def _decompress(compression: int) -> Callable[[bytes], bytes]:
+	if compression == COMPRESSIONS["zlib"]:
+		return zlib.decompress
+	if compression == COMPRESSIONS["zstd"] and zstandard is not None:
+		return zstandard.ZstdDecompressor().decompress
+	if compression == COMPRESSIONS["lz4"] and lz4 is not None:
+		return lz4.frame.decompress
+	raise CodecError(f"Compression {compression} is not supported")
+
+
+def best_serializer() -> Serializer:
+	return "orjson" if orjson is not None else "json"
+
+
+def best_compression() -> Compression:
+	if zstandard is not None:
+		return "zstd"
+	if lz4 is not None:
+		return "lz4"
+	return "zlib"
+
+
+class Codec:
+	"""Serialize the cached values to bytes with a one byte format header.
+
+	Payloads bigger than ``threshold`` bytes are compressed. Every format
+	known is decoded, whatever the codec used to write, so the serializer or
+	the compression can be changed pod by pod.
+
+	Args:
+		serializer (Serializer): Format of the values, defaults to orjson if installed.
+		compression (Compression): Algorithm used above the threshold, defaults
+			to zstd (or lz4) if installed, zlib otherwise.
+		threshold (int): Min size in bytes of a payload to be compressed.
+		level (int | None): Compression level, ``None`` is the default of the algorithm.
+
+	.. code-block:: python
+
+	        codec = Codec(serializer="msgpack", compression="lz4", threshold=512)
+	        payload = codec.encode({"value": [1, 2, 3]})
+	        codec.decode(payload)
+	"""  # noqa: E101
+
+	def __init__(
+		self,
+		serializer: Serializer | None = None,
+		compression: Compression | None = None,
+		threshold: int = 1024,
+		level: int | None = None,
+	) -> None:
+		self.serializer = serializer or best_serializer()
+		self.compression = compression or best_compression()
+		self.threshold = threshold
+		self.stats = CodecStats()
+		self._dumps = _dumps(self.serializer)
+		self._compress = (
+			_compress(self.compression, level) if self.compression != "none" else None
+		)
+
+	def encode(self, value: Any) -> bytes:
+		data = self._dumps(value)
+		self.stats.raw_bytes += len(data)
+		compression: Compression = "none"
+		if self._compress is not None and len(data) >= self.threshold:
+			compressed = self._compress(data)
+			if len(compressed) < len(data):
+				data, compression = compressed, self.compression
+				self.stats.compressed += 1
+		header = SERIALIZERS[self.serializer] << 4 | COMPRESSIONS[compression]
+		self.stats.encoded += 1
+		self.stats.stored_bytes += len(data)
+		return bytes((header,)) + data
+
+	def decode(self, payload: bytes | str) -> Any:
+		if isinstance(payload, str) or payload[0] == LEGACY_JSON:
+			return json.loads(payload)
+		header, data = payload[0], payload[1:]
+		try:
+			if compression := header & 0x0F:
+				data = _decompress(compression)(data)
+			return _loads(header >> 4)(data)
+		except CodecError:
+			raise
+		except Exception as error:
+			raise CodecError(f"Payload can't be decoded: {error}") from error
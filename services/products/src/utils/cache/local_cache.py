@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class CacheStats:
+	"""Hit/miss counters of every tier of the resolver cache"""
+
+	l1_hits: int = 0
+	l1_misses: int = 0
+	l2_hits: int = 0
+	l2_misses: int = 0
+
+	def as_dict(self) -> dict[str, int]:
+		return asdict(self)
+
+
+class LocalCache:
+	"""In-process LRU cache with TTL, bounded by entries and by bytes.
+
+	Values are the serialized payloads (``str`` or ``bytes``), their length is
+	the size accounted against ``max_bytes``. Entries are indexed by tag so an
+	invalidation of a tag (local or received from other pod) only drops the
+	keys of that tag.
+
+	Args:
+		max_bytes (int): Max size of all the payloads kept in memory.
+		max_items (int): Max number of entries.
+		clock (Callable[[], float]): Monotonic clock, used to expire the entries.
+	"""
+
+	def __init__(
+		self,
+		max_bytes: int = 32 * 1024 * 1024,
+		max_items: int = 10_000,
+		clock: Callable[[], float] = time.monotonic,
+	) -> None:
+		self.max_bytes = max_bytes
+		self.max_items = max_items
+		self._clock = clock
+		self._entries: OrderedDict[str, tuple[float, str | bytes, str | None]] = (
+			OrderedDict()
+		)
+		self._tags: dict[str, set[str]] = {}
+		self._size = 0
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	@property
+	def size(self) -> int:
+		return self._size
+
+	def get(self, key: str) -> str | bytes | None:
+		if (entry := self._entries.get(key)) is None:
+			return None
+		expires_at, value, _ = entry
+		if expires_at <= self._clock():
+			self.delete(key)
+			return None
+		self._entries.move_to_end(key)
+		return value
+
+	def set(
+		self, key: str, value: str | bytes, ttl: float, tag: str | None = None
+	) -> None:
+		size = len(value)
+		if size > self.max_bytes or ttl <= 0:
+			return
+		self.delete(key)
+		self._entries[key] = (self._clock() + ttl, value, tag)
+		self._size += size
+		if tag is not None:
+			self._tags.setdefault(tag, set()).add(key)
+		while self._size > self.max_bytes or len(self._entries) > self.max_items:
+			self.delete(next(iter(self._entries)))
+
+	def delete(self, key: str) -> None:
+		if (entry := self._entries.pop(key, None)) is None:
+			return
+		_, value, tag = entry
+		self._size -= len(value)
+		if tag is not None and (keys := self._tags.get(tag)) is not None:
+			keys.discard(key)
+			if not keys:
+				del self._tags[tag]
+
+	def invalidate_tags(self, tags: Iterable[str]) -> None:
+		for tag in tags:
+			for key in list(self._tags.get(tag, ())):
+				self.delete(key)
+
+	def clear(self) -> None:
+		self._entries.clear()
+		self._tags.clear()
+		self._size = 0
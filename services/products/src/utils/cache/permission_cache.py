@@ -0,0 +1,104 @@
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .local_cache import LocalCache
+from .stampede import SingleFlight
+
+Permissions = tuple[bool, list[dict[str, Any]]]
+
+
+class PermissionCache:
+	"""Cache the permissions of the bearer tokens, keyed by the token hash.
+
+	A lookup is served from memory, then from Redis (if any) and only then
+	from ``fetch``, the concurrent lookups of a token share the same fetch.
+	Tokens without permission and rejected tokens (``fetch`` returns ``None``)
+	are cached for ``negative_ttl`` so a bad token doesn't reach the auth
+	service on every field. A revoked token is accepted for up to ``ttl``.
+
+	Args:
+		ttl (float): Seconds to keep the permissions of a token.
+		negative_ttl (float): Seconds to keep a token without permission or rejected.
+		max_items (int): Tokens kept in memory.
+		redis (Redis | None): Shared cache between the pods, optional.
+	"""
+
+	def __init__(
+		self,
+		ttl: float = 60.0,
+		negative_ttl: float = 10.0,
+		max_items: int = 10_000,
+		redis: Redis | None = None,
+	) -> None:
+		self.ttl = ttl
+		self.negative_ttl = negative_ttl
+		self.redis = redis
+		self.local = LocalCache(max_items=max_items)
+		self._single_flight = SingleFlight()
+
+	@staticmethod
+	def key(token: str) -> str:
+		return f"permissions:{hashlib.sha256(token.encode()).hexdigest()}"
+
+	@staticmethod
+	def _decode(payload: str | bytes) -> Permissions | None:
+		# Decoded on every hit, the callers never share the cached lists
+		if (value := json.loads(payload)) is None:
+			return None
+		has_permission, permissions = value
+		return has_permission, permissions
+
+	async def get(
+		self, token: str, fetch: Callable[[], Awaitable[Permissions | None]]
+	) -> Permissions | None:
+		key = self.key(token)
+		if (payload := self.local.get(key)) is not None:
+			return self._decode(payload)
+		return await self._single_flight.do(key, lambda: self._load(key, fetch))
+
+	async def _load(
+		self, key: str, fetch: Callable[[], Awaitable[Permissions | None]]
+	) -> Permissions | None:
+		if self.redis is not None:
+			try:
+				payload = await self.redis.get(key)
+			except RedisError as redis_error:
+				logger.warning(f"Permission cache unavailable: {redis_error}")
+				payload = None
+			if payload is not None:
+				permissions = self._decode(payload)
+				self.local.set(key, payload, self._ttl(permissions))
+				return permissions
+
+		permissions = await fetch()
+		payload = json.dumps(permissions)
+		ttl = self._ttl(permissions)
+		self.local.set(key, payload, ttl)
+		if self.redis is not None:
+			try:
+				await self.redis.set(key, payload, px=int(ttl * 1000))
+			except RedisError as redis_error:
+				logger.warning(f"Permission cache unavailable: {redis_error}")
+		return permissions
+
+	def _ttl(self, permissions: Permissions | None) -> float:
+		return (
+			self.ttl
+			if permissions is not None and permissions[0]
+			else self.negative_ttl
+		)
+
+	async def invalidate(self, token: str) -> None:
+		key = self.key(token)
+		self.local.delete(key)
+		if self.redis is not None:
+			try:
+				await self.redis.delete(key)
+			except RedisError as redis_error:
+				logger.warning(f"Permission cache unavailable: {redis_error}")
@@ -5,6 +5,17 @@ from typing import Any, Literal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import InstrumentedAttribute
 
+from ..statement_cache import StatementCacheStats, statement_cache_stats
+from .bulk import (
+	DEFAULT_CHUNK_SIZE,
+	chunks,
+	delete_statement,
+	dump_rows,
+	insert_statement,
+	update_statements,
+)
+from .count import CountCache, CountStrategy, estimate_count, exact_count
+
 
 class GeneralCrudAsync[T](ABC):
 	"""Class that define the factory to create a crud for any Entity
@@ -17,10 +28,156 @@ class GeneralCrudAsync[T](ABC):
 		- delete_entity
 		- get_entity_by_id
 		- get_entity_by_args
+		- count_entity
+		- invalidate_count
+		- statement_cache_stats
+		- create_entities
+		- update_entities
+		- delete_entities
+
+	Args:
+		model (T): SQLAlchemy model of the entity.
+		count_cache (CountCache | None): Cache used by the ``cached`` count strategy,
+		without it the ``cached`` strategy does an exact count.
+		chunk_size (int): Rows sent per statement by the bulk methods.
 	"""
 
-	def __init__(self, model: T) -> None:
+	def __init__(
+		self,
+		model: T,
+		count_cache: CountCache | None = None,
+		chunk_size: int = DEFAULT_CHUNK_SIZE,
+	) -> None:
 		self.model = model
+		self.count_cache = count_cache
+		self.chunk_size = chunk_size
+
+	async def count_entity(
+		self,
+		db: AsyncSession,
+		filter: tuple[Any],
+		strategy: CountStrategy = "exact",
+	) -> int | None:
+		"""Count the entities of the Model that match the filter.
+
+		Args:
+			db (AsyncSession): Async Session from the context o Dependencies.
+			filter (tuple[Any]): Filter the data to count.
+			strategy (CountStrategy): exact, estimate, cached or none.
+
+		Returns:
+			int | None: The total of entities, None when the strategy is ``none``.
+		"""
+		match strategy:
+			case "none":
+				return None
+			case "estimate":
+				return await estimate_count(db, self.model, filter)
+			case "cached" if self.count_cache is not None:
+				return await self.count_cache.count(db, self.model, filter)
+			case _:
+				return await exact_count(db, self.model, filter)
+
+	async def invalidate_count(self) -> None:
+		"""Drop the cached counts of the Model, call it after creating or deleting rows"""
+		if self.count_cache is not None:
+			await self.count_cache.invalidate(self.model)
+
+	@staticmethod
+	def statement_cache_stats(db: AsyncSession) -> StatementCacheStats | None:
+		"""Hit/miss counters of the statement caches of the engine of the session,
+		``None`` if the engine isn't instrumented"""
+		return statement_cache_stats(db.get_bind())
+
+	async def create_entities(
+		self,
+		entities_schema: Sequence[Any],
+		db: AsyncSession,
+		chunk_size: int | None = None,
+	) -> Sequence[T]:
+		"""Create many entities with multi-row ``INSERT ... RETURNING``, in a single commit.
+
+		Args:
+			entities_schema (Sequence[Any]): Valid Pydantic Schemas (or dicts).
+			db (AsyncSession): Async Session from the Context or dependencies.
+			chunk_size (int | None): Rows per statement, defaults to ``self.chunk_size``.
+
+		Returns:
+			Sequence[T]: The created entities, in the same order of the schemas.
+
+		.. code-block:: python
+
+		        users = await repository.create_entities([UserSave(...), UserSave(...)], db=db)
+		"""  # noqa: E101
+		rows = dump_rows(entities_schema)
+		created: list[T] = []
+		for chunk in chunks(rows, chunk_size or self.chunk_size):
+			result = await db.scalars(insert_statement(self.model), list(chunk))
+			created.extend(result.all())
+		await db.commit()
+		await self.invalidate_count()
+		return created
+
+	async def update_entities(
+		self,
+		entities_schema: Sequence[Any],
+		db: AsyncSession,
+		chunk_size: int | None = None,
+		returning: bool = True,
+	) -> Sequence[T]:
+		"""Update many entities with ``UPDATE ... FROM (VALUES ...)``, in a single commit.
+
+		Every row needs the ``id`` of the entity and the columns to update,
+		rows updating the same columns share the statement.
+
+		Args:
+			entities_schema (Sequence[Any]): Dicts (or Pydantic Schemas) with ``id`` and the new values.
+			db (AsyncSession): Async session from the context or dependencies.
+			chunk_size (int | None): Rows per statement, defaults to ``self.chunk_size``.
+			returning (bool): Return the updated entities, when False nothing is read back.
+
+		Returns:
+			Sequence[T]: The updated entities (empty when ``returning`` is False).
+
+		.. code-block:: python
+
+		        await repository.update_entities(
+		            [{"id": id_1, "is_active": False}, {"id": id_2, "is_active": False}], db=db
+		        )
+		"""  # noqa: E101
+		rows = dump_rows(entities_schema)
+		updated: list[T] = []
+		for chunk in chunks(rows, chunk_size or self.chunk_size):
+			for stmt in update_statements(self.model, chunk, returning=returning):
+				result = await db.execute(stmt)
+				if returning:
+					updated.extend(result.scalars().all())
+		await db.commit()
+		return updated
+
+	async def delete_entities(
+		self,
+		entities_id: Sequence[int | str],
+		db: AsyncSession,
+		chunk_size: int | None = None,
+	) -> int:
+		"""Delete many entities with ``DELETE ... WHERE id = ANY(:ids)``, in a single commit.
+
+		Args:
+			entities_id (Sequence[int | str]): ids of the entities to delete.
+			db (AsyncSession): Async session from the context or dependencies.
+			chunk_size (int | None): ids per statement, defaults to ``self.chunk_size``.
+
+		Returns:
+			int: How many entities were deleted.
+		"""
+		deleted = 0
+		stmt = delete_statement(self.model)
+		for chunk in chunks(entities_id, chunk_size or self.chunk_size):
+			deleted += (await db.execute(stmt, {"ids": list(chunk)})).rowcount  # type: ignore
+		await db.commit()
+		await self.invalidate_count()
+		return deleted
 
 	@abstractmethod
 	async def get_entity(self, db: AsyncSession, filter: tuple[Any]) -> Sequence[T]:
@@ -34,11 +191,14 @@ class GeneralCrudAsync[T](ABC):
 		offset: int,
 		order_by: Literal["asc", "desc"],
 		filter: tuple[Any],
-	) -> tuple[Sequence[T], int]:
+		count: CountStrategy = "exact",
+	) -> tuple[Sequence[T], int | None]:
 		pass
 
 	@abstractmethod
-	async def create_entity(self, entity_schema: Any, db: AsyncSession) -> T:
+	async def create_entity(
+		self, entity_schema: Any, db: AsyncSession, returning: bool = True
+	) -> T | None:
 		pass
 
 	@abstractmethod
@@ -48,7 +208,8 @@ class GeneralCrudAsync[T](ABC):
 		entity_schema: Any,
 		db: AsyncSession,
 		filter: tuple[Any],
-	) -> T:
+		returning: bool = True,
+	) -> T | None:
 		pass
 
 	@abstractmethod
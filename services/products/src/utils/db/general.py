@@ -29,6 +29,13 @@ class ReadEnvDatabaseSettings(BaseSettings):
 	HEALTHNEXUS_DB_HOST: str = Field(..., description="Database Host")
 	HEALTHNEXUS_DB_SCHEMA: str = Field(..., description="Database Name")
 	HEALTHNEXUS_DB_PORT: int = Field(..., description="Database Port")
+	HEALTHNEXUS_DB_QUERY_CACHE_SIZE: int = Field(
+		500, description="Statements compiled by SQLAlchemy per engine"
+	)
+	HEALTHNEXUS_DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(
+		100,
+		description="Statements prepared by asyncpg per connection, 0 disables it",
+	)
 
 	model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -49,6 +56,13 @@ class DefineGeneralDb(BaseModel):
 	HEALTHNEXUS_DB_HOST: str = Field(..., description="Database Host")
 	HEALTHNEXUS_DB_SCHEMA: str = Field(..., description="Database Name")
 	HEALTHNEXUS_DB_PORT: int = Field(..., description="Database Port")
+	HEALTHNEXUS_DB_QUERY_CACHE_SIZE: int = Field(
+		500, description="Statements compiled by SQLAlchemy per engine"
+	)
+	HEALTHNEXUS_DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(
+		100,
+		description="Statements prepared by asyncpg per connection, 0 disables it",
+	)
 
 
 class BaseSessionManager:
@@ -94,7 +108,9 @@ class AsyncDatabaseSessionManager(BaseSessionManager, ABC):
 
 	@abstractmethod
 	@asynccontextmanager
-	def async_session(self) -> AsyncIterator[AsyncSession]: ...
+	def async_session(
+		self, expire_on_commit: bool = True
+	) -> AsyncIterator[AsyncSession]: ...
 
 
 class MixInNameTable:
@@ -0,0 +1,60 @@
+from typing import Any
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+Scope = dict[str, Any]
+
+
+class ReadEnvProxySettings(BaseSettings):
+	"""
+	Read Environment variables to know how many proxies (the ingress) are in
+	front of the service. Each one appends the address of its peer to
+	``X-Forwarded-For``, so the client is the entry ``depth`` from the right.
+
+	If you want to use other file
+	.. code-block:: python
+	    ReadEnvProxySettings(_env_file="name_of_env_file")
+
+	"""  # noqa: E101
+
+	trusted_proxy_depth: int = Field(
+		1,
+		description="Trusted proxies in front of the service, 0 ignores X-Forwarded-For",
+		alias="TRUSTED_PROXY_DEPTH",
+	)
+
+	model_config = SettingsConfigDict(
+		env_file=".env", env_file_encoding="utf-8", case_sensitive=True, extra="ignore"
+	)
+
+
+def forwarded_client_ip(scope: Scope, depth: int) -> str:
+	"""Address of the client behind ``depth`` trusted proxies.
+
+	The entries left of the trusted ones are written by the client and can't
+	be trusted. A request without ``X-Forwarded-For`` (a probe that doesn't go
+	through the ingress) is identified by its peer.
+	"""
+	client = scope.get("client")
+	peer = client[0] if client else "unknown"
+	if depth <= 0:
+		return peer
+	forwarded = [
+		address.strip()
+		for name, value in scope.get("headers", ())
+		if name == b"x-forwarded-for"
+		for address in value.decode("latin-1").split(",")
+		if address.strip()
+	]
+	if not forwarded:
+		return peer
+	return forwarded[-depth] if len(forwarded) >= depth else forwarded[0]
+
+
+_settings = ReadEnvProxySettings()
+
+
+def client_ip(scope: Scope) -> str:
+	"""Address of the client of the request, ``TRUSTED_PROXY_DEPTH`` proxies deep"""
+	return forwarded_client_ip(scope, _settings.trusted_proxy_depth)
@@ -5,7 +5,7 @@ from alembic import context
 from sqlalchemy import URL, pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
-from src.models import users
+from src.models import outbox, users  # noqa: F401
 from src.utils.db.general import DefineGeneralDb, ReadEnvDatabaseSettings
 
 # this is the Alembic Config object, which provides
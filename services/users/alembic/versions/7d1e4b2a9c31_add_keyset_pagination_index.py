@@ -0,0 +1,26 @@
+"""add keyset pagination index
+
+Revision ID: 7d1e4b2a9c31
+Revises: 3c5b554084ec
+Create Date: 2026-10-17 10:12:41.204311
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7d1e4b2a9c31'
+down_revision: str | None = '3c5b554084ec'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_created_at_id', table_name='users')
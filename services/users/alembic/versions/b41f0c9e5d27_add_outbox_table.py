@@ -0,0 +1,35 @@
+"""add outbox table
+
+Revision ID: b41f0c9e5d27
+Revises: 7d1e4b2a9c31
+Create Date: 2026-10-17 14:03:52.118402
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41f0c9e5d27'
+down_revision: str | None = '7d1e4b2a9c31'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('topic', sa.VARCHAR(length=255), nullable=False),
+    sa.Column('key', sa.VARCHAR(length=255), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('outbox')
@@ -1,6 +1,10 @@
+from typing import Any
+
 from faststream.kafka.fastapi import KafkaRouter
 from faststream.kafka.opentelemetry import KafkaTelemetryMiddleware
 
+from utils.db.async_db_conf import sessionmanager
+from utils.kafka.outbox import OutboxRelay
 from utils.kafka.settings import ReadEnvKafkaSettings
 
 settings = ReadEnvKafkaSettings()
@@ -11,7 +15,29 @@ kafka_router = KafkaRouter(
 	],
 	middlewares=(KafkaTelemetryMiddleware(),),
 	prefix="/kafka",
+	# Producer retries don't duplicate events, the relay publishes in batches
+	acks="all",
+	enable_idempotence=True,
+	linger_ms=settings.linger_ms,
+	max_batch_size=settings.max_batch_size,
 )
 
 
 broker = kafka_router.broker
+
+outbox_relay = OutboxRelay(
+	sessionmanager.async_session,
+	broker,
+	batch_size=settings.outbox_batch_size,
+	interval=settings.outbox_interval,
+)
+
+
+@kafka_router.after_startup
+async def start_outbox_relay(app: Any) -> None:
+	outbox_relay.start()
+
+
+@kafka_router.on_broker_shutdown
+async def stop_outbox_relay(app: Any) -> None:
+	await outbox_relay.stop()
@@ -1,20 +1,53 @@
 import base64
+import binascii
 import json
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
+from utils.exceptions import InvalidParameter
+
 
 @dataclass
 class Cursor:
+	"""Opaque position used by the keyset pagination.
+
+	The cursor stores the seek key ``(created_at, id)`` of the last (or first)
+	row of a page and the direction to walk from it.
+	"""
+
 	last_id: UUID
+	created_at: datetime
+	direction: Literal["next", "prev"] = "next"
 
 	def to_b64(self) -> str:
-		cursor_dict = asdict(self)
-		cursor_json = json.dumps(cursor_dict)
+		cursor_dict = {
+			"last_id": str(self.last_id),
+			"created_at": self.created_at.isoformat(),
+			"direction": self.direction,
+		}
+		cursor_json = json.dumps(cursor_dict, separators=(",", ":"))
 		return base64.urlsafe_b64encode(cursor_json.encode()).decode()
 
 	@classmethod
 	def from_b64(cls, cursor_str: str) -> "Cursor":
-		cursor_json = base64.urlsafe_b64decode(cursor_str.encode()).decode()
-		cursor_dict = json.loads(cursor_json)
-		return cls(**cursor_dict)
+		try:
+			cursor_json = base64.urlsafe_b64decode(cursor_str.encode()).decode()
+			cursor_dict = json.loads(cursor_json)
+			direction = cursor_dict.get("direction", "next")
+			if direction not in ("next", "prev"):
+				raise ValueError(direction)
+			return cls(
+				last_id=UUID(cursor_dict["last_id"]),
+				created_at=datetime.fromisoformat(cursor_dict["created_at"]),
+				direction=direction,
+			)
+		except (
+			binascii.Error,
+			UnicodeDecodeError,
+			ValueError,
+			KeyError,
+			TypeError,
+		) as err:
+			raise InvalidParameter("The cursor is invalid or malformed") from err
@@ -0,0 +1,17 @@
+from argon2 import PasswordHasher
+
+from utils.password.hasher import PasswordHashingService
+from utils.password.settings import ReadEnvPasswordSettings
+
+settings = ReadEnvPasswordSettings()
+
+password_hasher = PasswordHashingService(
+	PasswordHasher(
+		time_cost=settings.time_cost,
+		memory_cost=settings.memory_cost,
+		parallelism=settings.parallelism,
+	),
+	workers=settings.workers,
+	max_pending=settings.max_pending,
+	queue_timeout=settings.queue_timeout,
+)
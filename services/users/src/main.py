@@ -1,3 +1,6 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import icecream
 import logfire
 from fastapi import FastAPI, status
@@ -7,15 +10,27 @@ from logfire import instrument_fastapi, instrument_system_metrics
 from common.broker import kafka_router
 from exception.handler_exception import CreateHandlerExceptions
 from routes import kafka_user
+from routes.auth import login_counters
 from routes.auth import router as auth_router
 from routes.profile import profile_router
 from routes.users import router
 from schema.users import HealthCheck
+from utils.dependencies.redis_cache import redis_master
 from utils.fastapi.observability.logfire_settings import _env
 from utils.fastapi.observability.otel import server_request_hook
+from utils.middleware.rate_limit import RateLimit, RateLimitMiddleware
 
 origin = ["*"]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+	login_counters.start()
+	yield
+	# Writes the login counters still buffered before the pod goes away
+	await login_counters.stop()
+
+
 app = FastAPI(
 	docs_url="/docs",
 	redoc_url="/redoc",
@@ -23,9 +38,17 @@ app = FastAPI(
 	root_path="/users".lower(),
 	title="User Service API",
 	description="This is the User Service API, which provides endpoints for user management.",
+	lifespan=lifespan,
 )
 
-
+# Added before CORS so the rejections also get the CORS headers. The logins
+# are limited per ip (and per email) by the LoginThrottle of the route.
+app.add_middleware(
+	RateLimitMiddleware,
+	redis=redis_master,
+	default=RateLimit(rate=50, period=1, burst=100),
+	routes={"/auth/login": None, "/health": None},
+)
 app.add_middleware(
 	CORSMiddleware,
 	allow_origins=origin,
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import BigInteger, Identity, func
+from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP, VARCHAR
+from sqlalchemy.orm import Mapped, mapped_column
+
+from utils.db.general import MixInNameTable
+
+from .base import Base
+
+
+class Outbox(Base, MixInNameTable):
+	"""Events written in the same transaction as the change that produces them,
+	published to Kafka (and deleted) by the ``OutboxRelay``"""
+
+	id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+	topic: Mapped[str] = mapped_column(VARCHAR(255), nullable=False)
+	key: Mapped[str | None] = mapped_column(VARCHAR(255), nullable=True)
+	payload: Mapped[Any] = mapped_column(JSONB, nullable=False)
+	created_at: Mapped[datetime] = mapped_column(
+		TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+	)
@@ -2,6 +2,7 @@ from datetime import UTC, datetime
 from uuid import UUID, uuid4
 
 from sqlalchemy import Enum as sql_enum
+from sqlalchemy import Index
 from sqlalchemy.dialects.postgresql import BOOLEAN, INTEGER, TIMESTAMP, VARCHAR
 from sqlalchemy.dialects.postgresql import UUID as pg_uuid
 from sqlalchemy.orm import Mapped, mapped_column
@@ -13,6 +14,11 @@ from .base import Base
 
 
 class Users(Base, MixInNameTable):
+	__table_args__ = (
+		# Seek key of the keyset pagination (see UserRepository.get_entity_keyset)
+		Index("ix_users_created_at_id", "created_at", "id"),
+	)
+
 	id: Mapped[UUID] = mapped_column(
 		pg_uuid(as_uuid=True), primary_key=True, nullable=False, default=uuid4
 	)
@@ -20,7 +26,10 @@ class Users(Base, MixInNameTable):
 	email: Mapped[str] = mapped_column(
 		VARCHAR(255), nullable=False, unique=True, index=True
 	)
-	password_hash: Mapped[str] = mapped_column(VARCHAR(255), unique=False)
+	# Never filtered (see get_filters) nor cached
+	password_hash: Mapped[str] = mapped_column(
+		VARCHAR(255), unique=False, info={"secret": True}
+	)
 	role: Mapped[str] = mapped_column(sql_enum(Role), index=True)
 	email_verified: Mapped[bool] = mapped_column(BOOLEAN, nullable=False, default=False)
 	created_at: Mapped[datetime] = mapped_column(
@@ -0,0 +1,160 @@
+import asyncio
+import contextlib
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import case, cast, column, func, update, values
+from sqlalchemy.dialects.postgresql import BOOLEAN, INTEGER, TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID as pg_uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.users import Users
+from utils.cache.entity_cache import EntityCache
+
+
+@dataclass
+class _Counter:
+	failures: int = 0
+	reset: bool = False
+	last_login_at: datetime | None = None
+
+
+def counters_statement(rows: list[tuple[UUID, int, bool, datetime | None]]) -> Any:
+	"""``UPDATE users ... FROM (VALUES ...)`` of the buffered counters: a
+	successful login resets ``login_attempts`` (to the failures after it),
+	failures are added to the current value"""
+	data = values(
+		column("id", pg_uuid(as_uuid=True)),
+		column("failures", INTEGER),
+		column("reset", BOOLEAN),
+		column("last_login_at", TIMESTAMP(timezone=True)),
+		name="data",
+	).data(rows)
+	return (
+		update(Users)
+		.where(Users.id == data.c.id)
+		.values(
+			login_attempts=case(
+				(data.c.reset, data.c.failures),
+				else_=Users.login_attempts + data.c.failures,
+			),
+			# A VALUES column of only NULLs would be text, hence the cast
+			last_login_at=func.coalesce(
+				cast(data.c.last_login_at, TIMESTAMP(timezone=True)),
+				Users.last_login_at,
+			),
+		)
+		.execution_options(synchronize_session=False)
+	)
+
+
+class LoginCounters:
+	"""Buffer ``login_attempts``/``last_login_at`` and write them in batches.
+
+	The logins only touch memory, a background task writes the counters of
+	every user with a single ``UPDATE`` each ``interval`` seconds (or when
+	``max_pending`` users are buffered). The counters of a failed write are
+	kept for the next one.
+
+	Args:
+		session_factory (Callable): Opens a session, e.g. ``sessionmanager.async_session``.
+		entity_cache (EntityCache | None): Cache of the users, invalidated after a write.
+		interval (float): Seconds between writes.
+		max_pending (int): Users buffered that trigger a write.
+	"""
+
+	def __init__(
+		self,
+		session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+		entity_cache: EntityCache | None = None,
+		interval: float = 5.0,
+		max_pending: int = 1000,
+	) -> None:
+		self.session_factory = session_factory
+		self.entity_cache = entity_cache
+		self.interval = interval
+		self.max_pending = max_pending
+		self._pending: dict[UUID, _Counter] = {}
+		self._full = asyncio.Event()
+		self._task: asyncio.Task[None] | None = None
+
+	def _counter(self, user_id: UUID) -> _Counter:
+		if (counter := self._pending.get(user_id)) is None:
+			counter = self._pending[user_id] = _Counter()
+			if len(self._pending) >= self.max_pending:
+				self._full.set()
+		return counter
+
+	def failed(self, user_id: UUID) -> None:
+		self._counter(user_id).failures += 1
+
+	def succeeded(self, user_id: UUID) -> None:
+		counter = self._counter(user_id)
+		counter.failures = 0
+		counter.reset = True
+		counter.last_login_at = datetime.now(UTC)
+
+	async def flush(self) -> int:
+		"""Write the buffered counters, returns how many users were updated"""
+		if not self._pending:
+			return 0
+		pending, self._pending = self._pending, {}
+		self._full.clear()
+		rows = [
+			(user_id, counter.failures, counter.reset, counter.last_login_at)
+			for user_id, counter in pending.items()
+		]
+		try:
+			async with self.session_factory() as db:
+				await db.execute(counters_statement(rows))
+				await db.commit()
+		except BaseException:
+			# Also when cancelled by stop(), the final flush writes them
+			self._merge(pending)
+			raise
+		if self.entity_cache is not None:
+			for user_id in pending:
+				await self.entity_cache.invalidate(Users, user_id)
+		return len(rows)
+
+	def _merge(self, pending: dict[UUID, _Counter]) -> None:
+		"""Put back the counters of a failed write, before the newer ones"""
+		for user_id, counter in pending.items():
+			if (newer := self._pending.get(user_id)) is None:
+				self._pending[user_id] = counter
+			elif not newer.reset:
+				newer.failures += counter.failures
+				newer.reset = counter.reset
+				newer.last_login_at = counter.last_login_at
+
+	async def run(self) -> None:
+		while True:
+			with contextlib.suppress(TimeoutError):
+				async with asyncio.timeout(self.interval):
+					await self._full.wait()
+			try:
+				await self.flush()
+			except Exception as error:
+				logger.warning(f"Login counters could not be written: {error}")
+
+	def start(self) -> asyncio.Task[None]:
+		"""Start (once per process) the task that writes the counters"""
+		if self._task is None or self._task.done():
+			self._task = asyncio.create_task(self.run())
+		return self._task
+
+	async def stop(self) -> None:
+		"""Stop the task and write the counters still buffered"""
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+		try:
+			await self.flush()
+		except Exception as error:
+			logger.warning(f"Login counters could not be written: {error}")
@@ -1,16 +1,38 @@
 from collections.abc import Sequence
 from typing import Any, Literal, override
 
-from sqlalchemy import delete, func, lambda_stmt, select, update
+from sqlalchemy import delete, insert, lambda_stmt, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import InstrumentedAttribute
 
+from common.cursor import Cursor
 from models.users import Users
+from utils.cache.entity_cache import EntityCache
+from utils.db.crud.bulk import dump_rows
+from utils.db.crud.count import CountCache, CountStrategy
 from utils.db.crud.entity import GeneralCrudAsync
 from utils.exceptions import EntityDoesNotExistError
 
 
 class UserRepository(GeneralCrudAsync[Users]):
+	"""Crud of the users.
+
+	Args:
+		model (Users): Users model.
+		count_cache (CountCache | None): Cache used by the ``cached`` count strategy.
+		entity_cache (EntityCache | None): Read-through cache of ``get_entity_by_id``
+		and ``get_entity_by_args`` (unique columns), kept in sync by the writes.
+	"""
+
+	def __init__(
+		self,
+		model: type[Users],
+		count_cache: CountCache | None = None,
+		entity_cache: EntityCache | None = None,
+	) -> None:
+		super().__init__(model, count_cache)  # type: ignore
+		self.entity_cache = entity_cache
+
 	@override
 	async def get_entity(
 		self,
@@ -56,7 +78,8 @@ class UserRepository(GeneralCrudAsync[Users]):
 		offset: int,
 		order_by: Literal["asc", "desc"],
 		filter: tuple[Any],
-	) -> tuple[Sequence[Users], int]:
+		count: CountStrategy = "exact",
+	) -> tuple[Sequence[Users], int | None]:
 		"""Function that retrieves and paginates the entities of a Model
 
 		Args:
@@ -65,9 +88,10 @@ class UserRepository(GeneralCrudAsync[Users]):
 			offser (int): From which index return
 			order_by (Literal ["asc", "desc"]): How the data should be ordered.
 			filter (tuple[Any]): Filter the data to get.
+			count (CountStrategy): How the total is computed (exact, estimate, cached or none).
 
 		Returns:
-			tuple[Sequence[T], int]: Return a tuple with the Sequence o List of the data, and the count of the data selected.
+			tuple[Sequence[T], int | None]: Return a tuple with the Sequence o List of the data, and the count of the data selected.
 
 		.. code-block:: python
 
@@ -97,16 +121,100 @@ class UserRepository(GeneralCrudAsync[Users]):
 
 		stmt += lambda s: s.filter(*filter)  # type: ignore
 
-		count_query = lambda_stmt(
-			lambda: select(func.count()).select_from(stmt.subquery())  # type: ignore
-		)
-		total_count = await db.scalar(count_query)
+		total_count = await self.count_entity(db=db, filter=filter, strategy=count)
 
 		stmt += lambda s: s.limit(limit)  # type: ignore
 		stmt += lambda s: s.offset(offset)  # type: ignore
 		result = await db.execute(stmt)
 		return (result.scalars().all(), total_count)
 
+	async def get_entity_keyset(
+		self,
+		db: AsyncSession,
+		limit: int,
+		order_by: Literal["asc", "desc"],
+		filter: tuple[Any],
+		cursor: Cursor | None = None,
+	) -> tuple[Sequence[Users], Cursor | None, Cursor | None]:
+		"""Function that paginates the entities of a Model using keyset (seek) pagination.
+
+		Instead of skipping ``offset`` rows, the query seeks on ``(created_at, id)``
+		starting from the position stored in the cursor, so every page costs the
+		same as the first one (backed by the ``ix_users_created_at_id`` index).
+
+		Args:
+			db (AsyncSession): Async Session from the context o Dependencie.
+			limit (int): How many results want to retrieve
+			order_by (Literal ["asc", "desc"]): How the data should be ordered.
+			filter (tuple[Any]): Filter the data to get.
+			cursor (Cursor | None): Position to start from, None returns the first page.
+
+		Returns:
+			tuple[Sequence[T], Cursor | None, Cursor | None]: Return a tuple with the data,
+			the cursor of the next page and the cursor of the previous page (None when there is no page).
+
+		.. code-block:: python
+
+		        # FastApi endpoint
+		        @app.get("/")
+		        async def get_keyset_fastapi(
+		            db: depend_db_annotated, cursor: str | None = None
+		        ):
+		            cursor_ = Cursor.from_b64(cursor) if cursor else None
+		            data, next_, prev = await get_entity_keyset(
+		                db=db, filter=(), limit=10, order_by="asc", cursor=cursor_
+		            )
+		"""  # noqa: E101
+		if order_by not in ("asc", "desc"):
+			raise ValueError("Order by should be 'asc' or 'desc' ")
+		model = self.model
+		backwards = cursor is not None and cursor.direction == "prev"
+		# Walking to the previous page scans in the opposite order, the rows
+		# are reversed afterwards to keep the requested order.
+		ascending = (order_by == "asc") != backwards
+		fetch = limit + 1
+
+		stmt = lambda_stmt(lambda: select(model))  # type: ignore
+		stmt += lambda s: s.filter(*filter)  # type: ignore
+		if cursor is not None:
+			created_at, last_id = cursor.created_at, cursor.last_id
+			if ascending:
+				stmt += lambda s: s.where(  # type: ignore
+					tuple_(model.created_at, model.id) > tuple_(created_at, last_id)  # type: ignore
+				)
+			else:
+				stmt += lambda s: s.where(  # type: ignore
+					tuple_(model.created_at, model.id) < tuple_(created_at, last_id)  # type: ignore
+				)
+		if ascending:
+			stmt += lambda s: s.order_by(model.created_at.asc(), model.id.asc())  # type: ignore
+		else:
+			stmt += lambda s: s.order_by(model.created_at.desc(), model.id.desc())  # type: ignore
+		stmt += lambda s: s.limit(fetch)  # type: ignore
+
+		items = list((await db.execute(stmt)).scalars().all())
+		has_more = len(items) > limit
+		items = items[:limit]
+		if backwards:
+			items.reverse()
+		if not items:
+			return items, None, None
+
+		has_next = True if backwards else has_more
+		has_prev = has_more if backwards else cursor is not None
+		first, last = items[0], items[-1]
+		next_cursor = (
+			Cursor(last_id=last.id, created_at=last.created_at, direction="next")
+			if has_next
+			else None
+		)
+		prev_cursor = (
+			Cursor(last_id=first.id, created_at=first.created_at, direction="prev")
+			if has_prev
+			else None
+		)
+		return items, next_cursor, prev_cursor
+
 	@override
 	async def get_entity_by_id(self, entity_id: str | int, db: AsyncSession) -> Users:
 		"""Retrieves a single result from the Model
@@ -136,11 +244,17 @@ class UserRepository(GeneralCrudAsync[Users]):
 
 		"""  # noqa: E101
 		model = self.model
+		if self.entity_cache is not None and (
+			cached := await self.entity_cache.get(model, entity_id)
+		):
+			return cached
 		stmt = lambda_stmt(lambda: select(model))  # type: ignore
 		stmt += lambda s: s.where(model.id == entity_id)  # type: ignore
 		result = await db.execute(stmt)
 		if not (entity_result := result.scalar_one_or_none()):
 			raise EntityDoesNotExistError(message="Entity don't exist")
+		if self.entity_cache is not None:
+			await self.entity_cache.set(entity_result)
 		return entity_result
 
 	@override
@@ -174,7 +288,6 @@ class UserRepository(GeneralCrudAsync[Users]):
 				filter_: tuple[Operators] = get_filters(filter_str, model)
 				await delete_entity(db, filter=filter_)
 		"""
-		await self.get_entity_by_id(entity_id=entity_id, db=db)
 		model = self.model
 		stmt = lambda_stmt(lambda: delete(model))  # type: ignore
 		stmt += lambda s: s.where(model.id == entity_id)  # type: ignore
@@ -184,6 +297,9 @@ class UserRepository(GeneralCrudAsync[Users]):
 				message="Entity don't exist",
 			)
 		await db.commit()
+		await self.invalidate_count()
+		if self.entity_cache is not None:
+			await self.entity_cache.invalidate(model, entity_id)
 
 	@override
 	async def get_entity_by_args(
@@ -192,6 +308,7 @@ class UserRepository(GeneralCrudAsync[Users]):
 		entity_schema_value: Any,
 		db: AsyncSession,
 		filter: tuple[Any] | None = None,
+		cached: bool = True,
 	) -> Users | None:
 		"""Function that retrieves one entity, using any args.
 
@@ -200,6 +317,8 @@ class UserRepository(GeneralCrudAsync[Users]):
 			column (InstrumentedAttribute[Any]): A column from the model (that needs/is required) to be used for searching..
 			entity_schema_value (Any): Can be any python variable like an int, str, so on ...
 			filter (tuple[Any]): Filter the data to get.
+			cached (bool): Read the entity cache, False reads Postgres (the cached
+			entities don't have the secret columns, e.g. ``password_hash``).
 
 		Returns:
 			T | None: Can return the result of the entity, if it doesn't find anything, returns None.
@@ -222,6 +341,18 @@ class UserRepository(GeneralCrudAsync[Users]):
 				await get_entity_by_args(db, filter=filter_, column=model.id, entity_schema_value = 1)
 		"""
 		model = self.model
+		# Only a lookup by a unique column without extra filter can be cached
+		cacheable = self.entity_cache is not None and not filter
+		if (
+			cached
+			and cacheable
+			and (
+				cached := await self.entity_cache.get_by(  # type: ignore
+					model, column.key, entity_schema_value
+				)
+			)
+		):
+			return cached
 		stmt = lambda_stmt(lambda: select(model))  # type: ignore
 		stmt += lambda s: s.where(column == entity_schema_value)  # type: ignore
 		if filter:
@@ -229,6 +360,8 @@ class UserRepository(GeneralCrudAsync[Users]):
 		result = await db.execute(stmt)
 		if (entity_result := result.scalar_one_or_none()) is None:
 			return None
+		if cacheable and column.key in self.entity_cache.unique_columns:  # type: ignore
+			await self.entity_cache.set(entity_result)  # type: ignore
 		return entity_result
 
 	@override
@@ -236,15 +369,17 @@ class UserRepository(GeneralCrudAsync[Users]):
 		self,
 		entity_schema: Any,
 		db: AsyncSession,
-	) -> Users:
-		"""Function that creates an entity.
+		returning: bool = True,
+	) -> Users | None:
+		"""Function that creates an entity with a single ``INSERT ... RETURNING``.
 
 		Args:
 		    db (AsyncSession): Async Session from the Context or dependencies.
 		    entity_schema (Any): A valid Pydantic Schema
+		    returning (bool): Read back the created row, when False nothing is returned.
 
 		Returns:
-		    T: Return the result of the entity.
+		    T | None: Return the result of the entity.
 
 		.. code-block:: python
 
@@ -263,12 +398,18 @@ class UserRepository(GeneralCrudAsync[Users]):
 		        await create_entity(db=db, entity_schema=schema)
 
 		"""  # noqa: E101
-		entity_result_ = entity_schema.model_dump()
-		entity_result_ = self.model(**entity_result_)  # type: ignore
-		db.add(entity_result_)  # type: ignore
+		model = self.model
+		stmt = insert(model).values(**entity_schema.model_dump())  # type: ignore
+		entity_result = None
+		if returning:
+			entity_result = await db.scalar(stmt.returning(model))  # type: ignore
+		else:
+			await db.execute(stmt)
 		await db.commit()
-		await db.refresh(entity_result_)  # type: ignore
-		return entity_result_  # type: ignore
+		await self.invalidate_count()
+		if self.entity_cache is not None and entity_result is not None:
+			await self.entity_cache.set(entity_result)
+		return entity_result
 
 	@override
 	async def update_entity(
@@ -277,17 +418,19 @@ class UserRepository(GeneralCrudAsync[Users]):
 		entity_schema: dict[str, Any],
 		db: AsyncSession,
 		filter: tuple[Any] | None = None,
-	) -> Users:
-		"""Function that updates an entity.
+		returning: bool = True,
+	) -> Users | None:
+		"""Function that updates an entity with a single ``UPDATE ... RETURNING``.
 
 		Args:
 		    db (AsyncSession): Async session from the context or dependencies.
 		    entity_schema (dict[str, Any]): A valid Pydantic Schema already dump (converted to dict)
 		    entity_id (int | str): id of the entity to update
 		    filter (tuple[Any]):  Filter the data to get.
+		    returning (bool): Read back the updated row, when False nothing is returned.
 
 		Returns:
-		    T: Return the result of the entity.
+		    T | None: Return the result of the entity.
 
 		.. code-block:: python
 
@@ -316,12 +459,56 @@ class UserRepository(GeneralCrudAsync[Users]):
 			update(model)  # type: ignore
 			.where(model.id == entity_id)  # type: ignore
 			.values(**entity_schema)
-		)  # type: ignore
+		)
 		if filter:
-			stmt.filter(*filter)
-		if (await db.execute(stmt)).rowcount == 0:  # type: ignore
+			stmt = stmt.filter(*filter)
+		# Without returning only the id comes back, enough to know the row existed
+		stmt = (
+			stmt.returning(model).execution_options(populate_existing=True)  # type: ignore
+			if returning
+			else stmt.returning(model.id)  # type: ignore
+		)
+		if (entity_result := (await db.execute(stmt)).scalar_one_or_none()) is None:
 			raise EntityDoesNotExistError(
 				message="No record was updated; it may not exist or values may be the same.",
 			)
 		await db.commit()
-		return await self.get_entity_by_id(entity_id, db)
+		if self.entity_cache is not None:
+			if returning:
+				await self.entity_cache.set(entity_result)
+			else:
+				await self.entity_cache.invalidate(model, entity_id)
+		return entity_result if returning else None
+
+	@override
+	async def update_entities(
+		self,
+		entities_schema: Sequence[Any],
+		db: AsyncSession,
+		chunk_size: int | None = None,
+		returning: bool = True,
+	) -> Sequence[Users]:
+		"""``GeneralCrudAsync.update_entities`` that also drops the updated users
+		from the entity cache"""
+		updated = await super().update_entities(
+			entities_schema, db, chunk_size=chunk_size, returning=returning
+		)
+		if self.entity_cache is not None:
+			await self.entity_cache.invalidate_many(
+				self.model, (row["id"] for row in dump_rows(entities_schema))
+			)
+		return updated
+
+	@override
+	async def delete_entities(
+		self,
+		entities_id: Sequence[int | str],
+		db: AsyncSession,
+		chunk_size: int | None = None,
+	) -> int:
+		"""``GeneralCrudAsync.delete_entities`` that also drops the deleted users
+		from the entity cache"""
+		deleted = await super().delete_entities(entities_id, db, chunk_size=chunk_size)
+		if self.entity_cache is not None:
+			await self.entity_cache.invalidate_many(self.model, entities_id)
+		return deleted
@@ -4,19 +4,20 @@ from datetime import datetime
 from typing import Annotated
 from uuid import uuid4
 
-from argon2 import PasswordHasher
 from fastapi import APIRouter, Body, Depends, Query, Request, status
 from pydantic import EmailStr
 from redis import RedisError
 from redis.asyncio import Redis
 
-from common.broker import broker
+from common.password import password_hasher
 from models.users import Users as UserModels
-from repository.user import UserRepository
+from repository.login_counters import LoginCounters
+from routes.users import user_repository
 from schema.general import (
 	AuthLinks,
 	Embedded,
 	Link,
+	LoginUser,
 	ResendEmailVerification,
 	ResetPassword,
 	ResetPasswordToken,
@@ -27,21 +28,34 @@ from schema.general import (
 	UserSave,
 	WelcomeUser,
 )
-from utils.db.async_db_conf import depend_db_annotated
-from utils.dependencies.redis_cache import get_master, get_replica
-from utils.exceptions import EntityDoesNotExistError, InvalidTokenError, ServiceError
+from utils.cache.login_throttle import LoginThrottle
+from utils.db.async_db_conf import depend_db_annotated, sessionmanager
+from utils.dependencies.redis_cache import get_master, get_replica, redis_master
+from utils.exceptions import (
+	AuthenticationFailed,
+	EntityDoesNotExistError,
+	InvalidTokenError,
+	ServiceError,
+)
 from utils.fastapi.base_url import get_base_url
 from utils.fastapi.utils import verify_token
+from utils.kafka.outbox import enqueue
+from utils.middleware.client_ip import client_ip
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-user_repository = UserRepository(model=UserModels)
-ph = PasswordHasher()
 logger = logging.getLogger("user_events")
 
 REDIS_TOKEN_EXPIRY = 900
 REDIS_PREFIX = "password-reset-token:"
 
+login_throttle = LoginThrottle(redis_master)
+login_counters = LoginCounters(
+	sessionmanager.async_session, entity_cache=user_repository.entity_cache
+)
+# Verified when the email doesn't exist, the response takes the same time
+_dummy_hash: str | None = None
+
 
 def create_auth_links(request: Request, title: str, rel: str = "self") -> AuthLinks:
 	"""
@@ -149,18 +163,20 @@ async def create_user(
 
 	Publishes:
 		- Event 'user.created' with welcome user data
+		- Event 'user.verification_token.created' with the same data
 	"""
 	new_user = UserSave(
 		**body.model_dump(exclude={"password", "password2"}),
-		password_hash=ph.hash(body.password),
+		password_hash=await password_hasher.hash(body.password),
 	)
-	user = await user_repository.create_entity(new_user, db)
-	data_user = ResponseCreationUserData(user=body.email, id=user.id)
+	data_user = ResponseCreationUserData(user=body.email, id=new_user.id)
+	welcome = WelcomeUser(**data_user.model_dump(), full_name=new_user.full_name)
+	# Both from the outbox, a redelivered batch of welcome emails doesn't
+	# publish (or send) anything again
+	for topic in ("user.created", "user.verification_token.created"):
+		enqueue(db, topic=topic, message=welcome, key=str(new_user.id))
+	await user_repository.create_entity(new_user, db, returning=False)
 	return_user_created = ResponseCreationUser(data=data_user)
-	await broker.publish(
-		message=WelcomeUser(**data_user.model_dump(), full_name=user.full_name),
-		topic="user.created",
-	)
 	return Response(
 		_embedded=Embedded(message=return_user_created),
 		_links=create_auth_links(request, title="Register a new user account"),
@@ -235,10 +251,13 @@ async def resend_mail_verification(
 				request=request, title="Resend the email verification link"
 			),
 		)
-	await broker.publish(
-		message=WelcomeUser(user=user.email, id=user.id, full_name=user.full_name),
+	enqueue(
+		db,
 		topic="user.verification_token.created",
+		message=WelcomeUser(user=user.email, id=user.id, full_name=user.full_name),
+		key=str(user.id),
 	)
+	await db.commit()
 	return Response(
 		_embedded=Embedded(
 			message="A verification email has been sent. Please check your inbox or spam folder."
@@ -289,10 +308,13 @@ async def request_password_reset(
 		)
 	except RedisError as redis_error:
 		raise ServiceError("Cache service unavailable") from redis_error
-	await broker.publish(
-		message=ResetPasswordToken(token=str(uuid_reset), user=user.email),
+	enqueue(
+		db,
 		topic="user.reset_requested",
+		message=ResetPasswordToken(token=str(uuid_reset), user=user.email),
+		key=str(user.id),
 	)
+	await db.commit()
 	return Response(
 		_embedded=Embedded(
 			message="A reset password email has been sent. Please check your inbox or spam folder."
@@ -312,19 +334,67 @@ async def reset_password(
 	if redis_value is None:
 		raise InvalidTokenError(message="The token already expired or is incorrect")
 	id: str = json.loads(redis_value)["id"]
-	user = await user_repository.update_entity(
+	user = await user_repository.get_entity_by_id(entity_id=id, db=db)
+	enqueue(db, topic="user.password_reset", message=user.email, key=id)
+	await user_repository.update_entity(
 		db=db,
 		entity_id=id,
 		entity_schema={
-			"password_hash": ph.hash(body.password),
+			"password_hash": await password_hasher.hash(body.password),
 			"login_attempts": 0,
 			"updated_at": datetime.now(),
 		},
+		returning=False,
 	)
-	await broker.publish(message=user.email, topic="user.password_reset")
 	return Response(
 		_embedded=Embedded(
 			message="The password has been update succefully. Please login."
 		),
 		_links=create_auth_links(request=request, title="Reset password"),
 	)
+
+
+@router.post("/login", response_model=Response)
+async def login(body: LoginUser, db: depend_db_annotated, request: Request) -> Response:
+	"""
+	Log in a user with email and password.
+
+	The attempts are throttled in Redis (per ip and per email) before the user
+	is read or the password is hashed, and the counters of the user
+	(``login_attempts``, ``last_login_at``) are written in batches.
+
+	Args:
+		body (LoginUser): Email and password
+		db (depend_db_annotated): The database session
+		request (Request): The FastAPI request object
+
+	Returns:
+		Response: Login confirmation with HATEOAS links
+
+	Raises:
+		TooManyRequest: If the ip or the email reached the attempts limit
+		AuthenticationFailed: If the email or the password are wrong
+	"""
+	global _dummy_hash
+	await login_throttle.check(body.email, client_ip(request.scope))
+	# From Postgres, the cached users don't have the password hash
+	user = await user_repository.get_entity_by_args(
+		column=UserModels.email, entity_schema_value=body.email, db=db, cached=False
+	)
+	# The password is always verified (an unknown or inactive user takes the
+	# same time as a wrong password)
+	if user is None:
+		_dummy_hash = _dummy_hash or await password_hasher.hash(str(uuid4()))
+	password_hash = user.password_hash if user is not None else _dummy_hash
+	verified = await password_hasher.verify(password_hash, body.password)  # type: ignore
+	# The failure was already counted by the check
+	if user is None or not verified or not user.is_active:
+		if user is not None:
+			login_counters.failed(user.id)
+		raise AuthenticationFailed("Wrong email or password")
+	await login_throttle.succeeded(body.email)
+	login_counters.succeeded(user.id)
+	return Response(
+		_embedded=Embedded(message=f"The user {user.id} is logged in"),
+		_links=create_auth_links(request=request, title="Log in to your account"),
+	)
@@ -1,69 +1,128 @@
 from datetime import datetime
+from typing import Any
 
 from fastapi_mail import MessageSchema, MessageType
 from faststream.kafka.fastapi import Logger
 
-from common.broker import kafka_router
+from common.broker import broker, kafka_router
 from schema.general import ResetPasswordToken, WelcomeUser
-from utils.fastapi.email.email_sender import fm
+from utils.fastapi.email.dispatcher import Email, EmailDispatcher
+from utils.fastapi.email.email_sender import (
+	dispatch_config,
+	fm,
+	renderer,
+	smtp_pool,
+)
 from utils.fastapi.utils import url_with_token
 
+dispatcher = EmailDispatcher(
+	fm,
+	smtp_pool,
+	renderer,
+	broker,
+	concurrency=dispatch_config.MAIL_CONCURRENCY,
+	retries=dispatch_config.MAIL_RETRIES,
+)
+batch_options: dict[str, Any] = {
+	"batch": True,
+	"max_records": dispatch_config.MAIL_BATCH_SIZE,
+	"batch_timeout_ms": dispatch_config.MAIL_BATCH_TIMEOUT_MS,
+}
 
-@kafka_router.subscriber("user.created")
-@kafka_router.publisher("user.verification_token.created")
-async def user_created_sub(message: WelcomeUser, logger: Logger) -> WelcomeUser:
-	logger.info(f"Received user with username {message.user} and id {message.id}")
-	logger.info(f"Sending email to user {message.user}")
-	email_message = MessageSchema(
-		subject="Welcome Email to Datahub",
-		recipients=[message.user],
-		template_body={"full_name": message.full_name},
-		subtype=MessageType.html,
-	)
-	await fm.send_message(message=email_message, template_name="welcome_mail.html")
-	return message
 
+@kafka_router.on_broker_shutdown
+async def close_smtp_pool(app: Any) -> None:
+	await smtp_pool.close()
 
-@kafka_router.subscriber("user.verification_token.created")
-async def create_token_verification(message: WelcomeUser, logger: Logger) -> None:
-	logger.info(f"Sending verification email to {message.id}")
-	token = url_with_token(
-		{**message.model_dump(exclude={"id"}), "id": str(message.id)}
-	)
-	link = f"localhost/users/auth/verify-email?token={token}"
-	email_message = MessageSchema(
-		subject="Verification email",
-		recipients=[message.user],
-		template_body={"verification_link": link, "expires_in": 60},
-		subtype=MessageType.html,
-	)
-	await fm.send_message(
-		message=email_message, template_name="email_verification.html"
+
+@kafka_router.subscriber("user.created", **batch_options)
+async def user_created_sub(messages: list[WelcomeUser], logger: Logger) -> None:
+	logger.info(f"Sending welcome email to {len(messages)} users")
+	await dispatcher.dispatch(
+		"user.created",
+		[
+			Email(
+				message=MessageSchema(
+					subject="Welcome Email to Datahub",
+					recipients=[message.user],
+					template_body={"full_name": message.full_name},
+					subtype=MessageType.html,
+				),
+				template_name="welcome_mail.html",
+				event=message,
+			)
+			for message in messages
+		],
 	)
 
 
-@kafka_router.subscriber("user.reset_requested")
-async def reset_password(message: ResetPasswordToken, logger: Logger) -> None:
-	logger.info(f"Sending password reset to {message.user}")
-	link = f"localhost/users/auth/reset-password?token={message.token}"
-	email_message = MessageSchema(
-		subject="Reset password",
-		recipients=[message.user],
-		template_body={"reset_url": link, "expires_in": 60},
-		subtype=MessageType.html,
-	)
-	await fm.send_message(message=email_message, template_name="reset-password.html")
+@kafka_router.subscriber("user.verification_token.created", **batch_options)
+async def create_token_verification(
+	messages: list[WelcomeUser], logger: Logger
+) -> None:
+	logger.info(f"Sending verification email to {len(messages)} users")
+	emails = []
+	for message in messages:
+		token = url_with_token(
+			{**message.model_dump(exclude={"id"}), "id": str(message.id)}
+		)
+		link = f"localhost/users/auth/verify-email?token={token}"
+		emails.append(
+			Email(
+				message=MessageSchema(
+					subject="Verification email",
+					recipients=[message.user],
+					template_body={"verification_link": link, "expires_in": 60},
+					subtype=MessageType.html,
+				),
+				template_name="email_verification.html",
+				event=message,
+			)
+		)
+	await dispatcher.dispatch("user.verification_token.created", emails)
 
 
-@kafka_router.subscriber("user.password_reset")
-async def reset_password(message: str, logger: Logger) -> None:
-	logger.info(
-		f"The user {message} change the password, sending this event to the user"
+@kafka_router.subscriber("user.reset_requested", **batch_options)
+async def reset_password(messages: list[ResetPasswordToken], logger: Logger) -> None:
+	logger.info(f"Sending password reset to {len(messages)} users")
+	await dispatcher.dispatch(
+		"user.reset_requested",
+		[
+			Email(
+				message=MessageSchema(
+					subject="Reset password",
+					recipients=[message.user],
+					template_body={
+						"reset_url": f"localhost/users/auth/reset-password?token={message.token}",
+						"expires_in": 60,
+					},
+					subtype=MessageType.html,
+				),
+				template_name="reset-password.html",
+				event=message,
+			)
+			for message in messages
+		],
 	)
-	email_message = MessageSchema(
-		subject="Reset password",
-		recipients=[message],
-		template_body={"timestamp": datetime.now().isoformat(), "support_url": ""},
-		subtype=MessageType.html,
+
+
+@kafka_router.subscriber("user.password_reset", **batch_options)
+async def password_changed(messages: list[str], logger: Logger) -> None:
+	logger.info(f"Sending password change notice to {len(messages)} users")
+	timestamp = datetime.now().isoformat()
+	await dispatcher.dispatch(
+		"user.password_reset",
+		[
+			Email(
+				message=MessageSchema(
+					subject="Reset password",
+					recipients=[message],
+					template_body={"timestamp": timestamp, "support_url": ""},
+					subtype=MessageType.html,
+				),
+				template_name="change-password.html",
+				event=message,
+			)
+			for message in messages
+		],
 	)
-	await fm.send_message(message=email_message, template_name="change-password.html")
@@ -3,15 +3,36 @@ from typing import Annotated
 
 from fastapi import APIRouter, Query, Request, status
 
+from common.cursor import Cursor
 from models.users import Users as UserModels
 from repository.user import UserRepository
-from schema.general import Link, UserLinks, UserResponse, UserUpdate
+from schema.general import (
+	Link,
+	LinkCollection,
+	PaginatedResponse,
+	UserLinks,
+	UserResponse,
+	UserUpdate,
+)
 from schema.users import FilterParameters, PaginationResponse, Response
+from utils.cache.entity_cache import EntityCache
 from utils.db.async_db_conf import depend_db_annotated
+from utils.db.crud.count import CountCache
+from utils.dependencies.redis_cache import redis_master, redis_replica
 from utils.fastapi.base_url import get_base_url
 
 router = APIRouter(prefix="/users", tags=["users"])
-user_repository = UserRepository(model=UserModels)
+user_repository = UserRepository(
+	model=UserModels,
+	count_cache=CountCache(redis_master),
+	entity_cache=EntityCache(
+		redis_master,
+		redis_replica,
+		ttl=600,
+		unique_columns=("email",),
+		secret_columns=("password_hash",),
+	),
+)
 
 
 def create_user_links(rel: str, request: Request, title: str) -> UserLinks:
@@ -61,24 +82,86 @@ def to_user_response(user: UserModels) -> UserResponse:
 	return UserResponse(**user.__dict__)
 
 
+def create_cursor_links(
+	request: Request, next_cursor: Cursor | None, prev_cursor: Cursor | None
+) -> LinkCollection:
+	base_url: str = get_base_url(request)
+	url = request.url.remove_query_params(["offset", "cursor"]).include_query_params(
+		pagination="keyset"
+	)
+
+	def page_link(cursor: Cursor | None, rel: str, title: str) -> Link:
+		page_url = url.include_query_params(cursor=cursor.to_b64()) if cursor else url
+		return Link(
+			href=f"{base_url}{page_url.path}?{page_url.query}",
+			rel=rel,
+			method="GET",
+			title=title,
+		)
+
+	return LinkCollection(
+		self=Link(
+			href=f"{base_url}{request.url.path}?{request.url.query}",
+			rel="self",
+			method=request.method,
+			title="Retrieve a list of users",
+		),
+		next=page_link(next_cursor, "next", "Next page of users")
+		if next_cursor
+		else None,
+		prev=page_link(prev_cursor, "prev", "Previous page of users")
+		if prev_cursor
+		else None,
+		first=page_link(None, "first", "First page of users"),
+	)
+
+
+async def get_users_keyset(
+	filter_query: FilterParameters, db: depend_db_annotated, request: Request
+) -> PaginatedResponse:
+	cursor = Cursor.from_b64(filter_query.cursor) if filter_query.cursor else None
+	items, next_cursor, prev_cursor = await user_repository.get_entity_keyset(
+		db=db,
+		filter=(),  # type: ignore
+		limit=filter_query.limit,
+		order_by=filter_query.sort,  # type: ignore
+		cursor=cursor,
+	)
+	count = await user_repository.count_entity(
+		db=db,
+		filter=(),  # type: ignore
+		# A keyset page is cheap, a full count would cost more than the page
+		strategy=filter_query.count or "none",
+	)
+	return PaginatedResponse(
+		items=[to_user_response(item) for item in items],
+		cursor=next_cursor.to_b64() if next_cursor else None,
+		links=create_cursor_links(request, next_cursor, prev_cursor),
+		max_items=count,
+	)
+
+
 @router.get(
 	"/",
 	summary="Get Users",
 	description="Get all users",
 	status_code=status.HTTP_200_OK,
-	response_model=PaginationResponse,
+	response_model=PaginationResponse | PaginatedResponse,
 )
 async def get_users(
 	filter_query: Annotated[FilterParameters, Query()],
 	db: depend_db_annotated,
 	request: Request,
-) -> PaginationResponse:
+) -> PaginationResponse | PaginatedResponse:
+	if filter_query.pagination == "keyset" or filter_query.cursor is not None:
+		return await get_users_keyset(filter_query, db, request)
 	items, count = await user_repository.get_entity_pagination(
 		db=db,
 		filter=(),  # type: ignore
 		limit=filter_query.limit,
 		offset=filter_query.offset,
-		order_by=filter_query.sort,
+		order_by=filter_query.sort,  # type: ignore
+		count=filter_query.count or "exact",
 	)
 	return PaginationResponse(
 		result=[to_user_response(item) for item in items],
@@ -144,10 +227,12 @@ async def delete_user(user_uuid: str, db: depend_db_annotated) -> None:
 	description="Soft Delete (only disable from access)",
 	status_code=status.HTTP_200_OK,
 )
-async def soft_delete(user_id: str, db: depend_db_annotated) -> Response:
+async def soft_delete(
+	user_uuid: str, db: depend_db_annotated, request: Request
+) -> Response:
 	body: dict[str, bool] = {"is_active": False}
 	user = await user_repository.update_entity(
-		entity_id=user_id, entity_schema=body, db=db, filter=()
+		entity_id=user_uuid, entity_schema=body, db=db, filter=()
 	)
 	return Response(
 		result=to_user_response(user),
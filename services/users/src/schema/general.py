@@ -177,6 +177,8 @@ class UserAttributes(BaseModel):
 
 
 class UserSave(UserBase, UserAttributes):
+	# Generated here so the events of the user can be written before the INSERT
+	id: UUID = Field(default_factory=uuid4)
 	password_hash: str = Field(...)
 
 
@@ -207,6 +209,11 @@ class CreationPassword(BaseModel):
 class UserCreation(UserBase, CreationPassword): ...
 
 
+class LoginUser(BaseModel):
+	email: EmailStr
+	password: str = Field(..., max_length=128)
+
+
 class UserUpdate(BaseModel):
 	is_active: bool = False
 
@@ -224,6 +231,9 @@ class PaginatedResponse(BaseModel):
 		None, description="Cursor for pagination, used to fetch the next page"
 	)
 	links: LinkCollection = Field(..., description="Links for navigation between pages")
+	max_items: int | None = Field(
+		None, description="Total of items matching the query, if it was requested"
+	)
 
 
 class AuthLinks(BaseModel):
@@ -3,6 +3,8 @@ from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
+from utils.db.crud.count import CountStrategy
+
 from .general import UserLinks, UserResponse
 
 
@@ -21,9 +23,29 @@ class FilterParameters(BaseModel):
 		"asc",
 		description="Sort order, either 'asc' or 'desc', this sort is applied to the 'created_at' field",
 	)
+	pagination: Literal["offset", "keyset"] = Field(
+		"offset",
+		description="Pagination mode, 'keyset' seeks on ('created_at', 'id') and ignores the offset",
+	)
+	cursor: str | None = Field(
+		None,
+		description="Opaque cursor taken from the 'next'/'prev' links, implies keyset pagination",
+	)
+	count: CountStrategy | None = Field(
+		None,
+		description="How 'max_items' is computed: 'exact', 'estimate' (planner estimate), 'cached' (exact count cached in Redis) or 'none'. Defaults to 'exact' with offset pagination and 'none' with keyset pagination",
+	)
 
 	model_config = {
-		"json_schema_extra": {"example": {"limit": 10, "sort": "asc", "offset": 0}}
+		"json_schema_extra": {
+			"example": {
+				"limit": 10,
+				"sort": "asc",
+				"offset": 0,
+				"pagination": "offset",
+				"count": "exact",
+			}
+		}
 	}
 
 
@@ -33,7 +55,7 @@ class Response(BaseModel):
 
 
 class PaginationResponse(Response):
-	max_items: int = Field(..., description="Max items in the database")
+	max_items: int | None = Field(None, description="Max items in the database")
 
 
 class KafkaEvents(BaseModel):
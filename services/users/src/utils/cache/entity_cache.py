@@ -0,0 +1,163 @@
+import hashlib
+import json
+from collections.abc import Iterable
+from datetime import datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+def _encode_value(value: Any) -> Any:
+	if isinstance(value, UUID):
+		return str(value)
+	if isinstance(value, datetime):
+		return value.isoformat()
+	if isinstance(value, Enum):
+		return value.value
+	raise TypeError(f"Type {type(value)} can't be cached")
+
+
+def _decode_value(python_type: type, value: Any) -> Any:
+	if value is None:
+		return None
+	if issubclass(python_type, datetime):
+		return datetime.fromisoformat(value)
+	if issubclass(python_type, (UUID, Enum)):
+		return python_type(value)
+	return value
+
+
+class EntityCache:
+	"""Read-through/write-through cache of single entities in Redis.
+
+	Entities are stored under ``entity:<table>:<schema>:id:<id>`` as a JSON
+	list of the column values (in table order, no column names). Unique
+	columns (e.g. ``email``) are stored as pointers to the id, a lookup by
+	them is verified against the cached row so a stale pointer is a miss.
+	The ``<schema>`` part is a hash of the column names cached, a migration
+	changes the keys instead of reading rows with other layout. The secret
+	columns (``secret_columns`` and the ones marked with ``info={"secret": True}``,
+	e.g. ``password_hash``) never reach Redis, they are ``None`` in the cached
+	entities.
+
+	Args:
+		redis_master (Redis): Client used for writes and invalidations.
+		redis_replica (Redis): Client used for reads.
+		ttl (int): Seconds that an entity lives in the cache.
+		unique_columns (tuple[str, ...]): Columns that can be used to look up an entity.
+		secret_columns (tuple[str, ...]): Columns that are not cached.
+	"""
+
+	def __init__(
+		self,
+		redis_master: Redis,
+		redis_replica: Redis,
+		ttl: int = 300,
+		unique_columns: tuple[str, ...] = (),
+		secret_columns: tuple[str, ...] = (),
+	) -> None:
+		self.redis_master = redis_master
+		self.redis_replica = redis_replica
+		self.ttl = ttl
+		self.unique_columns = unique_columns
+		self.secret_columns = secret_columns
+		self._prefixes: dict[Any, str] = {}
+
+	def _columns(self, model: Any) -> list[Any]:
+		return [
+			column
+			for column in model.__table__.columns
+			if column.key not in self.secret_columns and not column.info.get("secret")
+		]
+
+	def _prefix(self, model: Any) -> str:
+		if (prefix := self._prefixes.get(model)) is None:
+			names = ",".join(column.name for column in self._columns(model))
+			schema = hashlib.sha1(names.encode()).hexdigest()[:8]
+			prefix = f"entity:{model.__table__.fullname}:{schema}"
+			self._prefixes[model] = prefix
+		return prefix
+
+	def _id_key(self, model: Any, entity_id: Any) -> str:
+		return f"{self._prefix(model)}:id:{entity_id}"
+
+	def _column_key(self, model: Any, column: str, value: Any) -> str:
+		return f"{self._prefix(model)}:{column}:{value}"
+
+	def serialize(self, entity: Any) -> str:
+		return json.dumps(
+			[getattr(entity, column.key) for column in self._columns(type(entity))],
+			separators=(",", ":"),
+			default=_encode_value,
+		)
+
+	def deserialize(self, model: Any, payload: str) -> Any:
+		values = json.loads(payload)
+		return model(
+			**{
+				column.key: _decode_value(column.type.python_type, value)
+				for column, value in zip(self._columns(model), values, strict=True)
+			}
+		)
+
+	async def get(self, model: Any, entity_id: Any) -> Any | None:
+		try:
+			payload = await self.redis_replica.get(self._id_key(model, entity_id))
+		except RedisError as redis_error:
+			logger.warning(f"Entity cache unavailable: {redis_error}")
+			return None
+		return self.deserialize(model, payload) if payload is not None else None
+
+	async def get_by(self, model: Any, column: str, value: Any) -> Any | None:
+		if column not in self.unique_columns:
+			return None
+		try:
+			entity_id = await self.redis_replica.get(
+				self._column_key(model, column, value)
+			)
+		except RedisError as redis_error:
+			logger.warning(f"Entity cache unavailable: {redis_error}")
+			return None
+		if entity_id is None:
+			return None
+		entity = await self.get(model, entity_id)
+		if entity is None or getattr(entity, column) != value:
+			return None
+		return entity
+
+	async def set(self, entity: Any) -> None:
+		model = type(entity)
+		try:
+			async with self.redis_master.pipeline(transaction=False) as pipe:
+				pipe.setex(
+					self._id_key(model, entity.id), self.ttl, self.serialize(entity)
+				)
+				for column in self.unique_columns:
+					pipe.setex(
+						self._column_key(model, column, getattr(entity, column)),
+						self.ttl,
+						str(entity.id),
+					)
+				await pipe.execute()
+		except RedisError as redis_error:
+			logger.warning(f"Entity could not be cached: {redis_error}")
+
+	async def invalidate(self, model: Any, entity_id: Any) -> None:
+		"""Drop the entity, the pointers of the unique columns are verified on read"""
+		try:
+			await self.redis_master.delete(self._id_key(model, entity_id))
+		except RedisError as redis_error:
+			logger.warning(f"Entity cache could not be invalidated: {redis_error}")
+
+	async def invalidate_many(self, model: Any, entities_id: Iterable[Any]) -> None:
+		"""Drop the entities with a single ``DEL``"""
+		if not (keys := [self._id_key(model, entity_id) for entity_id in entities_id]):
+			return
+		try:
+			await self.redis_master.delete(*keys)
+		except RedisError as redis_error:
+			logger.warning(f"Entity cache could not be invalidated: {redis_error}")
@@ -0,0 +1,124 @@
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from utils.exceptions import TooManyRequest
+
+# Sliding window counter: the count of the previous fixed window weighted by
+# the part of it still inside the sliding window, plus the current one.
+# The time is the one of the server, every pod sees the same windows.
+SLIDING_WINDOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local function sliding(key, window)
+	local current = math.floor(now / window)
+	local weight = 1 - (now % window) / window
+	local previous = tonumber(redis.call('GET', key .. ':' .. (current - 1)) or '0')
+	local count = previous * weight + tonumber(redis.call('GET', key .. ':' .. current) or '0')
+	return count, key .. ':' .. current, key .. ':' .. (current - 1), window - now % window
+end
+"""
+
+# KEYS: attempts of the ip, failures of the email
+# ARGV: ip limit, ip window (ms), failures limit, failures window (ms)
+# Returns 0 and counts the attempt (and reserves a failure of the email), or
+# the ms to wait if any limit is reached
+ATTEMPT_SCRIPT = (
+	SLIDING_WINDOW
+	+ """
+local ip_count, ip_key, _, ip_retry = sliding(KEYS[1], tonumber(ARGV[2]))
+if ip_count >= tonumber(ARGV[1]) then
+	return ip_retry
+end
+local failures, failures_key, _, failures_retry = sliding(KEYS[2], tonumber(ARGV[4]))
+if failures >= tonumber(ARGV[3]) then
+	return failures_retry
+end
+redis.call('INCR', ip_key)
+redis.call('PEXPIRE', ip_key, tonumber(ARGV[2]) * 2)
+redis.call('INCR', failures_key)
+redis.call('PEXPIRE', failures_key, tonumber(ARGV[4]) * 2)
+return 0
+"""
+)
+
+# KEYS: failures of the email, ARGV: failures window (ms)
+RESET_SCRIPT = (
+	SLIDING_WINDOW
+	+ """
+local _, current, previous = sliding(KEYS[1], tonumber(ARGV[1]))
+return redis.call('DEL', current, previous)
+"""
+)
+
+
+class LoginThrottle:
+	"""Throttle the logins in Redis, before any query or password hash.
+
+	Every attempt of an ip is counted (``ip_limit`` per ``ip_window`` seconds)
+	and the failures of an email lock it after ``max_failures`` in
+	``lockout_window`` seconds. Every attempt is counted as a failure of the
+	email in the same script that checks the limits, before the password is
+	verified, so parallel guesses can't pass the check before their failures
+	are counted. A successful login clears them. The windows are sliding
+	(weighted counters of two fixed windows), each check is a single script
+	call. If Redis is unavailable the logins are not throttled.
+
+	Args:
+		redis_master (Redis): Client of the master (the scripts write).
+		ip_limit (int): Attempts of an ip in ``ip_window``.
+		ip_window (int): Seconds of the ip window.
+		max_failures (int): Failures of an email in ``lockout_window``.
+		lockout_window (int): Seconds of the failures window.
+	"""
+
+	def __init__(
+		self,
+		redis_master: Redis,
+		ip_limit: int = 20,
+		ip_window: int = 60,
+		max_failures: int = 5,
+		lockout_window: int = 900,
+	) -> None:
+		self.redis_master = redis_master
+		self.ip_limit = ip_limit
+		self.ip_window_ms = ip_window * 1000
+		self.max_failures = max_failures
+		self.lockout_window_ms = lockout_window * 1000
+		self._attempt = redis_master.register_script(ATTEMPT_SCRIPT)
+		self._reset = redis_master.register_script(RESET_SCRIPT)
+
+	@staticmethod
+	def _failures_key(email: str) -> str:
+		return f"login:failures:{email.lower()}"
+
+	async def check(self, email: str, ip: str) -> None:
+		"""Count the attempt as a failure until ``succeeded`` is called, raise
+		``TooManyRequest`` if a limit is reached"""
+		try:
+			retry_after_ms: int = await self._attempt(
+				keys=[f"login:ip:{ip}", self._failures_key(email)],
+				args=[
+					self.ip_limit,
+					self.ip_window_ms,
+					self.max_failures,
+					self.lockout_window_ms,
+				],
+			)
+		except RedisError as redis_error:
+			logger.warning(f"Login throttle unavailable: {redis_error}")
+			return
+		if retry_after_ms:
+			raise TooManyRequest(
+				f"Too many login attempts, try again in {-(-retry_after_ms // 1000)} seconds"
+			)
+
+	async def succeeded(self, email: str) -> None:
+		"""Clear the failures of the email, the one reserved by ``check`` too"""
+		try:
+			await self._reset(
+				keys=[self._failures_key(email)], args=[self.lockout_window_ms]
+			)
+		except RedisError as redis_error:
+			logger.warning(f"Login throttle unavailable: {redis_error}")
@@ -0,0 +1,70 @@
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import batched, groupby
+from typing import Any
+
+from sqlalchemy import any_, bindparam, column, delete, insert, update, values
+from sqlalchemy.dialects.postgresql import ARRAY
+
+DEFAULT_CHUNK_SIZE = 1000
+# Bound parameters accepted per statement by the PostgreSQL protocol (asyncpg)
+MAX_BIND_PARAMS = 32767
+
+
+def dump_rows(entities_schema: Iterable[Any]) -> list[dict[str, Any]]:
+	"""Convert Pydantic schemas (or dicts) to the rows used by the bulk statements"""
+	return [
+		entity if isinstance(entity, dict) else entity.model_dump()
+		for entity in entities_schema
+	]
+
+
+def chunks[R](rows: Sequence[R], chunk_size: int) -> Iterator[tuple[R, ...]]:
+	if chunk_size <= 0:
+		raise ValueError("chunk_size should be greater than 0")
+	return batched(rows, chunk_size, strict=False)
+
+
+def insert_statement(model: Any) -> Any:
+	"""``INSERT ... VALUES (...), (...) RETURNING *``, SQLAlchemy packs the
+	parameter list in multi-row VALUES (insertmanyvalues)"""
+	return insert(model).returning(model, sort_by_parameter_order=True)
+
+
+def update_statements(
+	model: Any, rows: Sequence[dict[str, Any]], returning: bool = True
+) -> Iterator[Any]:
+	"""Build ``UPDATE ... FROM (VALUES ...) WHERE model.id = data.id`` statements.
+
+	Rows are grouped by the columns they update, every group is a statement
+	with the rows bound in the ``VALUES`` list, split so no statement binds more
+	than ``MAX_BIND_PARAMS`` values.
+	"""
+	table = model.__table__
+
+	def columns_of(row: dict[str, Any]) -> tuple[str, ...]:
+		return tuple(sorted(row))
+
+	for names, group in groupby(sorted(rows, key=columns_of), key=columns_of):
+		if "id" not in names:
+			raise ValueError("Every row to update needs its 'id'")
+		for batch in batched(group, MAX_BIND_PARAMS // len(names), strict=False):
+			data = values(
+				*(column(name, table.c[name].type) for name in names), name="data"
+			).data([tuple(row[name] for name in names) for row in batch])
+			stmt = (
+				update(model)
+				.where(model.id == data.c.id)
+				.values({name: data.c[name] for name in names if name != "id"})
+				.execution_options(synchronize_session=False)
+			)
+			yield stmt.returning(model) if returning else stmt
+
+
+def delete_statement(model: Any) -> Any:
+	"""``DELETE ... WHERE id = ANY(:ids)``, one array parameter for any number of ids"""
+	ids = bindparam("ids", type_=ARRAY(model.__table__.c.id.type))
+	return (
+		delete(model)
+		.where(model.id == any_(ids))
+		.execution_options(synchronize_session=False)
+	)
@@ -29,8 +29,17 @@ class ReadEnvDatabaseSettings(BaseSettings):
 	host: str = Field(..., description="Database Host")
 	database: str = Field(..., description="Database Name")
 	port: int = Field(..., description="Database Port")
+	query_cache_size: int = Field(
+		500, description="Statements compiled by SQLAlchemy per engine"
+	)
+	prepared_statement_cache_size: int = Field(
+		100,
+		description="Statements prepared by asyncpg per connection, 0 disables it",
+	)
 
-	model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+	model_config = SettingsConfigDict(
+		env_file=".env", env_file_encoding="utf-8", extra="ignore"
+	)
 
 
 class DefineGeneralDb(BaseModel):
@@ -49,6 +58,13 @@ class DefineGeneralDb(BaseModel):
 	host: str = Field(..., description="Database Host")
 	database: str = Field(..., description="Database Name")
 	port: int = Field(..., description="Database Port")
+	query_cache_size: int = Field(
+		500, description="Statements compiled by SQLAlchemy per engine"
+	)
+	prepared_statement_cache_size: int = Field(
+		100,
+		description="Statements prepared by asyncpg per connection, 0 disables it",
+	)
 
 
 class BaseSessionManager:
@@ -94,7 +110,9 @@ class AsyncDatabaseSessionManager(BaseSessionManager, ABC):
 
 	@abstractmethod
 	@asynccontextmanager
-	def async_session(self) -> AsyncIterator[AsyncSession]: ...
+	def async_session(
+		self, expire_on_commit: bool = True
+	) -> AsyncIterator[AsyncSession]: ...
 
 
 class MixInNameTable:
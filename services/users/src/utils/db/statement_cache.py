@@ -0,0 +1,80 @@
+from dataclasses import asdict, dataclass
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Connection, Engine, event
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+@dataclass
+class StatementCacheStats:
+	"""Hit/miss counters of the statement caches of an engine.
+
+	``compiled_*`` is the SQL compiled by SQLAlchemy (one cache per engine,
+	``query_cache_size``), ``uncached`` the statements executed without cache
+	key. ``prepared_*`` is the statement prepared by asyncpg (one cache per
+	connection, ``prepared_statement_cache_size``).
+	"""
+
+	compiled_hits: int = 0
+	compiled_misses: int = 0
+	uncached: int = 0
+	prepared_hits: int = 0
+	prepared_misses: int = 0
+
+	def as_dict(self) -> dict[str, int]:
+		return asdict(self)
+
+
+def prepared_statement_cache(cursor: Any) -> Any:
+	"""Prepared statements of the asyncpg connection of the cursor, keyed by the
+	SQL, ``None`` if disabled or unknown.
+
+	They are private attributes of the asyncpg adapter of SQLAlchemy (checked
+	against 2.0.40 and 2.1.4), a version without them only counts misses.
+	"""
+	adapt_connection = getattr(cursor, "_adapt_connection", None)
+	return getattr(adapt_connection, "_prepared_statement_cache", None)
+
+
+_engine_stats: WeakKeyDictionary[Engine, StatementCacheStats] = WeakKeyDictionary()
+
+
+def instrument_statement_cache(engine: AsyncEngine | Engine) -> StatementCacheStats:
+	"""Count the hits/misses of the statement caches of the engine (once per engine)"""
+	sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+	if (stats := _engine_stats.get(sync_engine)) is not None:
+		return stats
+	stats = _engine_stats[sync_engine] = StatementCacheStats()
+
+	@event.listens_for(sync_engine, "before_cursor_execute")
+	def count(
+		conn: Connection,
+		cursor: Any,
+		statement: str,
+		parameters: Any,
+		context: Any,
+		executemany: bool,
+	) -> None:
+		if context is not None:
+			if context.cache_hit is CacheStats.CACHE_HIT:
+				stats.compiled_hits += 1
+			elif context.cache_hit is CacheStats.CACHE_MISS:
+				stats.compiled_misses += 1
+			else:
+				stats.uncached += 1
+		if conn.dialect.driver == "asyncpg":
+			# Without cache every statement is prepared again
+			prepared = prepared_statement_cache(cursor)
+			if prepared is not None and statement in prepared:
+				stats.prepared_hits += 1
+			else:
+				stats.prepared_misses += 1
+
+	return stats
+
+
+def statement_cache_stats(bind: Engine | Connection) -> StatementCacheStats | None:
+	"""Counters of the engine of ``bind``, ``None`` if it isn't instrumented"""
+	return _engine_stats.get(bind.engine)
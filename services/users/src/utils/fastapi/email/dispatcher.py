@@ -0,0 +1,150 @@
+import asyncio
+import time
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import aiosmtplib
+from fastapi_mail import FastMail, MessageSchema
+from faststream.kafka import KafkaBroker
+from loguru import logger
+
+from .renderer import TemplateRenderer
+from .smtp_pool import SMTPPool
+
+
+def is_transient(error: Exception) -> bool:
+	"""Network errors, timeouts and ``4xx`` replies can succeed later, a ``5xx``
+	reply (e.g. every recipient refused) fails again"""
+	if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+		return any(refused.code < 500 for refused in error.recipients)
+	if isinstance(error, aiosmtplib.SMTPResponseException):
+		return error.code < 500
+	return isinstance(error, OSError)
+
+
+@dataclass
+class DispatchStats:
+	"""Emails sent, retried, dead-lettered and lost (the dead letter failed),
+	and the time spent sending"""
+
+	sent: int = 0
+	retried: int = 0
+	dead_lettered: int = 0
+	lost: int = 0
+	batches: int = 0
+	busy_seconds: float = 0.0
+
+	@property
+	def messages_per_second(self) -> float:
+		return self.sent / self.busy_seconds if self.busy_seconds else 0.0
+
+	def as_dict(self) -> dict[str, Any]:
+		return asdict(self) | {"messages_per_second": self.messages_per_second}
+
+
+@dataclass
+class Email:
+	"""An email to send and the event that produced it (sent to the DLQ)"""
+
+	message: MessageSchema
+	template_name: str
+	event: Any
+
+
+class EmailDispatcher:
+	"""Send the emails of a batch of events concurrently through the SMTP pool.
+
+	Up to ``concurrency`` emails of a batch are sent at the same time. The
+	transient errors (see ``is_transient``) are retried ``retries`` times with
+	exponential backoff (``backoff`` seconds the first time). The emails that
+	still fail, fail with a permanent error or fail to render are published
+	with their event to ``<topic>.dlq``, a dead letter that can't be published
+	is logged and doesn't fail the batch (it would send the batch again).
+
+	Args:
+		fm (FastMail): Builds the messages (sender, MIME).
+		pool (SMTPPool): Persistent SMTP connections.
+		renderer (TemplateRenderer): Renders the templates, compiled once.
+		broker (KafkaBroker): Broker used to publish the dead letters.
+		concurrency (int): Emails of a batch sent at the same time.
+		retries (int): Retries of a failed send.
+		backoff (float): Seconds to wait before the first retry.
+	"""
+
+	def __init__(
+		self,
+		fm: FastMail,
+		pool: SMTPPool,
+		renderer: TemplateRenderer,
+		broker: KafkaBroker,
+		concurrency: int = 8,
+		retries: int = 3,
+		backoff: float = 0.5,
+	) -> None:
+		self.fm = fm
+		self.pool = pool
+		self.renderer = renderer
+		self.broker = broker
+		self.concurrency = concurrency
+		self.retries = retries
+		self.backoff = backoff
+		self.stats = DispatchStats()
+
+	async def _send(self, email: Email) -> None:
+		html = self.renderer.render(
+			email.template_name,
+			email.message.template_body or {},  # type: ignore
+		)
+		message = await self.fm.get_message(
+			email.message.model_copy(update={"body": html, "template_body": None})
+		)
+		for attempt in range(self.retries + 1):
+			try:
+				await self.pool.send(message)  # type: ignore
+				return
+			except (aiosmtplib.SMTPException, OSError) as error:
+				if attempt == self.retries or not is_transient(error):
+					raise
+				self.stats.retried += 1
+				await asyncio.sleep(self.backoff * 2**attempt)
+
+	async def dead_letter(self, topic: str, email: Email, error: Exception) -> None:
+		try:
+			await self.broker.publish(
+				email.event, f"{topic}.dlq", headers={"error": str(error)[:512]}
+			)
+		except Exception as publish_error:
+			self.stats.lost += 1
+			logger.error(
+				f"Email of {topic} lost, the dead letter could not be published "
+				f"({publish_error}): {error}"
+			)
+			return
+		self.stats.dead_lettered += 1
+		logger.error(f"Email of {topic} sent to the dead letter topic: {error}")
+
+	async def dispatch(self, topic: str, emails: Sequence[Email]) -> int:
+		"""Send the emails of a batch, returns how many were sent"""
+		start = time.perf_counter()
+		limit = asyncio.Semaphore(self.concurrency)
+
+		async def send(email: Email) -> bool:
+			async with limit:
+				try:
+					await self._send(email)
+				except Exception as error:
+					await self.dead_letter(topic, email, error)
+					return False
+				return True
+
+		sent = sum(await asyncio.gather(*(send(email) for email in emails)))
+		elapsed = time.perf_counter() - start
+		self.stats.sent += sent
+		self.stats.batches += 1
+		self.stats.busy_seconds += elapsed
+		logger.info(
+			f"{topic}: {sent}/{len(emails)} emails sent in {elapsed:.3f}s "
+			f"({sent / elapsed if elapsed else 0:.1f} msg/s)"
+		)
+		return sent
@@ -4,6 +4,9 @@ from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from .renderer import TemplateRenderer
+from .smtp_pool import SMTPPool
+
 
 class EmailConfig(BaseSettings):
 	"""Email configuration for FastMail"""
@@ -19,13 +22,39 @@ class EmailConfig(BaseSettings):
 	VALIDATE_CERTS: bool = Field(...)
 
 	model_config = SettingsConfigDict(
-		env_file="other_env.env", env_file_encoding="utf-8"
+		env_file="other_env.env", env_file_encoding="utf-8", extra="ignore"
+	)
+
+
+class EmailDispatchConfig(BaseSettings):
+	"""Batching, pooling and retries of the emails sent by the consumers"""
+
+	MAIL_POOL_SIZE: int = Field(4, description="SMTP connections kept open")
+	MAIL_POOL_MAX_MESSAGES: int = Field(
+		100, description="Messages sent by a connection before it's replaced"
+	)
+	MAIL_CONCURRENCY: int = Field(8, description="Emails of a batch sent at once")
+	MAIL_RETRIES: int = Field(3, description="Retries of a failed send")
+	MAIL_BATCH_SIZE: int = Field(100, description="Max events per batch")
+	MAIL_BATCH_TIMEOUT_MS: int = Field(200, description="Max wait to fill a batch")
+
+	model_config = SettingsConfigDict(
+		env_file="other_env.env", env_file_encoding="utf-8", extra="ignore"
 	)
 
 
 _env = EmailConfig()  # type: ignore
+dispatch_config = EmailDispatchConfig()
+TEMPLATE_FOLDER = Path(__file__).parent / "templates"
 conf: ConnectionConfig = ConnectionConfig(
-	**_env.model_dump(), TEMPLATE_FOLDER=Path(__file__).parent / "templates"
+	**_env.model_dump(), TEMPLATE_FOLDER=TEMPLATE_FOLDER
 )
 
 fm = FastMail(conf)
+# Loaded and compiled at startup, FastMail would read and compile them per message
+renderer = TemplateRenderer(TEMPLATE_FOLDER)
+smtp_pool = SMTPPool(
+	conf,
+	size=dispatch_config.MAIL_POOL_SIZE,
+	max_messages=dispatch_config.MAIL_POOL_MAX_MESSAGES,
+)
@@ -0,0 +1,112 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from jinja2 import BaseLoader, BytecodeCache, Environment, FileSystemLoader, nodes
+from jinja2.bccache import Bucket
+from markupsafe import escape
+
+Part = str | Callable[[dict[str, Any]], Any]
+
+
+class MemoryBytecodeCache(BytecodeCache):
+	"""Keep the compiled bytecode of the templates in memory, an environment
+	created again (e.g. a reload) doesn't compile them again"""
+
+	def __init__(self) -> None:
+		self._buckets: dict[str, bytes] = {}
+
+	def load_bytecode(self, bucket: Bucket) -> None:
+		if (code := self._buckets.get(bucket.key)) is not None:
+			bucket.bytecode_from_string(code)
+
+	def dump_bytecode(self, bucket: Bucket) -> None:
+		self._buckets[bucket.key] = bucket.bytecode_to_string()
+
+	def clear(self) -> None:
+		self._buckets.clear()
+
+
+def _compile_expression(node: nodes.Node) -> Callable[[dict[str, Any]], Any] | None:
+	"""Evaluate the simple expressions of the templates (``name``, constants and
+	``or``/``and`` of them), ``None`` if the expression is not supported"""
+	if isinstance(node, nodes.Name):
+		name = node.name
+		return lambda context: context.get(name, "")
+	if isinstance(node, nodes.Const):
+		value = node.value
+		return lambda context: value
+	if isinstance(node, nodes.Or | nodes.And):
+		left, right = _compile_expression(node.left), _compile_expression(node.right)
+		if left is None or right is None:
+			return None
+		if isinstance(node, nodes.Or):
+			return lambda context: left(context) or right(context)
+		return lambda context: left(context) and right(context)
+	return None
+
+
+def _split(template: nodes.Template) -> list[Part] | None:
+	"""Split a template in its static text (rendered once) and the expressions
+	substituted on every render, ``None`` if it uses any other construct"""
+	parts: list[Part] = []
+	for node in template.body:
+		if not isinstance(node, nodes.Output):
+			return None
+		for child in node.nodes:
+			if isinstance(child, nodes.TemplateData):
+				if parts and isinstance(parts[-1], str):
+					parts[-1] += child.data
+				else:
+					parts.append(child.data)
+			elif (expression := _compile_expression(child)) is not None:
+				parts.append(expression)
+			else:
+				return None
+	return parts
+
+
+class TemplateRenderer:
+	"""Render the email templates, loaded and compiled once at startup.
+
+	Templates made only of static text and simple variables (every email
+	template of the service) are split in their static parts, a render just
+	escapes the variables and joins the parts. The rest are rendered by
+	Jinja from the compiled template.
+
+	Args:
+		folder (Path): Folder of the templates.
+		loader (BaseLoader | None): Loader of the templates, by default the folder.
+
+	.. code-block:: python
+
+	        renderer = TemplateRenderer(Path(__file__).parent / "templates")
+	        html = renderer.render("welcome_mail.html", {"full_name": "Jane"})
+	"""  # noqa: E101
+
+	def __init__(self, folder: Path, loader: BaseLoader | None = None) -> None:
+		self.bytecode_cache = MemoryBytecodeCache()
+		self.environment = Environment(
+			loader=loader or FileSystemLoader(folder),
+			autoescape=True,
+			auto_reload=False,
+			bytecode_cache=self.bytecode_cache,
+		)
+		self._parts: dict[str, list[Part] | None] = {}
+		for name in self.environment.list_templates():
+			self.load(name)
+
+	def load(self, name: str) -> None:
+		source, _, _ = self.environment.loader.get_source(self.environment, name)  # type: ignore
+		self.environment.get_template(name)
+		self._parts[name] = _split(self.environment.parse(source))
+
+	def render(self, name: str, context: dict[str, Any]) -> str:
+		if name not in self._parts:
+			self.load(name)
+		if (parts := self._parts[name]) is None:
+			return self.environment.get_template(name).render(**context)
+		return "".join(
+			part if isinstance(part, str) else str(escape(part(context)))
+			for part in parts
+		)
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.message import EmailMessage, Message
+
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
+
+
+@dataclass
+class _Connection:
+	smtp: aiosmtplib.SMTP
+	sent: int = 0
+	last_used: float = field(default_factory=time.monotonic)
+
+
+class SMTPPool:
+	"""Pool of persistent, authenticated SMTP connections.
+
+	``FastMail.send_message`` connects, negotiates TLS and logs in for every
+	message. The pool keeps up to ``size`` connections open and reuses them,
+	a connection is replaced after ``max_messages`` messages (servers limit
+	them per session) or ``idle_timeout`` seconds without use. A send that
+	finds the connection closed by the server is retried once on a new one.
+
+	Args:
+		config (ConnectionConfig): Config of FastMail, same server and credentials.
+		size (int): Max connections open (and sends at the same time).
+		max_messages (int): Messages sent by a connection before it's replaced.
+		idle_timeout (float): Seconds that an idle connection is kept.
+	"""
+
+	def __init__(
+		self,
+		config: ConnectionConfig,
+		size: int = 4,
+		max_messages: int = 100,
+		idle_timeout: float = 60.0,
+	) -> None:
+		self.config = config
+		self.max_messages = max_messages
+		self.idle_timeout = idle_timeout
+		self._slots = asyncio.Semaphore(size)
+		self._idle: list[_Connection] = []
+
+	async def _connect(self) -> _Connection:
+		config = self.config
+		smtp = aiosmtplib.SMTP(
+			hostname=config.MAIL_SERVER,
+			port=config.MAIL_PORT,
+			timeout=config.TIMEOUT,
+			use_tls=config.MAIL_SSL_TLS,
+			start_tls=config.MAIL_STARTTLS,
+			validate_certs=config.VALIDATE_CERTS,
+			local_hostname=config.LOCAL_HOSTNAME,
+			cert_bundle=config.CERT_BUNDLE,
+		)
+		await smtp.connect()
+		if config.USE_CREDENTIALS:
+			await smtp.login(
+				config.MAIL_USERNAME, config.MAIL_PASSWORD.get_secret_value()
+			)
+		return _Connection(smtp)
+
+	@staticmethod
+	async def _close(connection: _Connection) -> None:
+		try:
+			await connection.smtp.quit()
+		except aiosmtplib.SMTPException:
+			connection.smtp.close()
+
+	def _reusable(self, connection: _Connection) -> bool:
+		return (
+			connection.smtp.is_connected
+			and connection.sent < self.max_messages
+			and time.monotonic() - connection.last_used < self.idle_timeout
+		)
+
+	@asynccontextmanager
+	async def connection(self) -> AsyncIterator[_Connection]:
+		async with self._slots:
+			connection = None
+			while self._idle and connection is None:
+				candidate = self._idle.pop()
+				if self._reusable(candidate):
+					connection = candidate
+				else:
+					await self._close(candidate)
+			if connection is None:
+				connection = await self._connect()
+			try:
+				yield connection
+			except BaseException:
+				connection.smtp.close()
+				raise
+			connection.last_used = time.monotonic()
+			self._idle.append(connection)
+
+	async def send(self, message: EmailMessage | Message) -> None:
+		if self.config.SUPPRESS_SEND:
+			return
+		try:
+			async with self.connection() as connection:
+				await connection.smtp.send_message(message)
+				connection.sent += 1
+		except aiosmtplib.SMTPServerDisconnected:
+			# The server closed an idle connection, likely the rest of them too
+			await self.close()
+			async with self.connection() as connection:
+				await connection.smtp.send_message(message)
+				connection.sent += 1
+
+	async def close(self) -> None:
+		while self._idle:
+			await self._close(self._idle.pop())
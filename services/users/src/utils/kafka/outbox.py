@@ -0,0 +1,146 @@
+import asyncio
+import contextlib
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
+from typing import Any
+
+from faststream.kafka import KafkaBroker
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.outbox import Outbox
+from utils.db.crud.bulk import delete_statement
+
+# Set when a transaction with outbox rows commits, wakes the relay of the process
+outbox_written = asyncio.Event()
+
+
+def _wake_relay(session: Any) -> None:
+	if session.info.pop("outbox_pending", False):
+		outbox_written.set()
+
+
+def _discard_pending(session: Any) -> None:
+	session.info.pop("outbox_pending", None)
+
+
+def enqueue(db: AsyncSession, topic: str, message: Any, key: str | None = None) -> None:
+	"""
+	Add an event to the outbox, it's written with the rest of the changes of
+	the session and published by the relay only if the transaction commits.
+
+	Args:
+		db (AsyncSession): Session of the change that produces the event.
+		topic (str): Kafka topic.
+		message (Any): Pydantic model or any JSON value.
+		key (str | None): Kafka key, the events with the same key keep their order.
+
+	.. code-block:: python
+
+	        enqueue(db, "user.created", WelcomeUser(...), key=str(user_id))
+	        await user_repository.create_entity(new_user, db)  # commits both
+	"""  # noqa: E101
+	payload = (
+		message.model_dump(mode="json") if isinstance(message, BaseModel) else message
+	)
+	db.add(Outbox(topic=topic, key=key, payload=payload))
+	session = db.sync_session
+	session.info["outbox_pending"] = True
+	# Registered once per session, a rollback discards the pending wake up
+	if not session.info.get("outbox_listeners"):
+		event.listen(session, "after_commit", _wake_relay)
+		event.listen(session, "after_rollback", _discard_pending)
+		session.info["outbox_listeners"] = True
+
+
+class OutboxRelay:
+	"""Publish the outbox rows to Kafka in batches, in a background task.
+
+	Rows are claimed with ``FOR UPDATE SKIP LOCKED`` (several pods can relay
+	at the same time), published concurrently (one after the other for the
+	same topic and key, to keep their order, the producer packs them following
+	``linger_ms``/``max_batch_size``) and deleted once all the batch is
+	acknowledged. A failure rolls back the
+	claim and the rows are retried, the delivery is at least once.
+
+	Args:
+		session_factory (Callable): Opens a session, e.g. ``sessionmanager.async_session``.
+		broker (KafkaBroker): Broker used to publish.
+		batch_size (int): Rows published per transaction.
+		interval (float): Seconds between polls when nothing is committed in the process.
+		retry_delay (float): Seconds to wait after a failure.
+	"""
+
+	def __init__(
+		self,
+		session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]],
+		broker: KafkaBroker,
+		batch_size: int = 500,
+		interval: float = 1.0,
+		retry_delay: float = 5.0,
+	) -> None:
+		self.session_factory = session_factory
+		self.broker = broker
+		self.batch_size = batch_size
+		self.interval = interval
+		self.retry_delay = retry_delay
+		self._task: asyncio.Task[None] | None = None
+
+	async def _publish(self, rows: list[Outbox]) -> None:
+		"""Publish the rows in order, each one waits for its ack"""
+		for row in rows:
+			# The producer has no key serializer, it only takes bytes
+			key = row.key.encode() if row.key is not None else None
+			await self.broker.publish(row.payload, row.topic, key=key)
+
+	async def publish_batch(self) -> int:
+		"""Publish (and delete) the oldest rows of the outbox, returns how many"""
+		async with self.session_factory() as db:
+			rows = (
+				await db.scalars(
+					select(Outbox)
+					.order_by(Outbox.id)
+					.limit(self.batch_size)
+					.with_for_update(skip_locked=True)
+				)
+			).all()
+			if not rows:
+				return 0
+			by_key: dict[tuple[str, Any], list[Outbox]] = {}
+			for row in rows:
+				key = row.key if row.key is not None else row.id
+				by_key.setdefault((row.topic, key), []).append(row)
+			await asyncio.gather(*(self._publish(group) for group in by_key.values()))
+			await db.execute(
+				delete_statement(Outbox), {"ids": [row.id for row in rows]}
+			)
+			await db.commit()
+		return len(rows)
+
+	async def run(self) -> None:
+		while True:
+			outbox_written.clear()
+			try:
+				published = await self.publish_batch()
+			except Exception as error:
+				logger.warning(f"Outbox relay failed, retrying: {error}")
+				await asyncio.sleep(self.retry_delay)
+				continue
+			if published < self.batch_size:
+				with contextlib.suppress(TimeoutError):
+					async with asyncio.timeout(self.interval):
+						await outbox_written.wait()
+
+	def start(self) -> asyncio.Task[None]:
+		if self._task is None or self._task.done():
+			self._task = asyncio.create_task(self.run())
+		return self._task
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+			self._task = None
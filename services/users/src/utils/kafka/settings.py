@@ -16,6 +16,24 @@ class ReadEnvKafkaSettings(BaseSettings):
 
 	host: str = Field(..., description="Host for Kafka Bootstrap", alias="KAFKA_HOST")
 	port: int = Field(..., description="Database Port", alias="KAFKA_PORT")
+	linger_ms: int = Field(
+		5, description="Wait to fill the producer batches", alias="KAFKA_LINGER_MS"
+	)
+	max_batch_size: int = Field(
+		65536,
+		description="Max size in bytes of a producer batch",
+		alias="KAFKA_MAX_BATCH_SIZE",
+	)
+	outbox_batch_size: int = Field(
+		500,
+		description="Outbox rows published per transaction",
+		alias="OUTBOX_BATCH_SIZE",
+	)
+	outbox_interval: float = Field(
+		1.0,
+		description="Seconds between polls of the outbox when it is empty",
+		alias="OUTBOX_INTERVAL",
+	)
 
 	model_config = SettingsConfigDict(
 		env_file=".env", env_file_encoding="utf-8", case_sensitive=True, extra="ignore"
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+from utils.exceptions import TooManyRequest
+
+
+@dataclass
+class HashingStats:
+	"""Counters and timings (seconds) of the hashing pool"""
+
+	hashed: int = 0
+	verified: int = 0
+	rejected: int = 0
+	queue_wait: float = 0.0
+	max_queue_wait: float = 0.0
+	hash_time: float = 0.0
+	max_hash_time: float = 0.0
+
+	def as_dict(self) -> dict[str, Any]:
+		return asdict(self)
+
+
+class PasswordHashingService:
+	"""Run argon2 hash/verify out of the event loop, in a bounded thread pool.
+
+	argon2-cffi releases the GIL while hashing, so the threads run in parallel
+	and the loop keeps serving requests. At most ``workers`` hashes run at the
+	same time (each one allocates ``memory_cost`` KiB), up to ``max_pending``
+	wait for a worker and the rest are rejected with ``TooManyRequest``, as
+	the ones that wait more than ``queue_timeout`` seconds.
+
+	Args:
+		hasher (PasswordHasher): Hasher with the cost parameters.
+		workers (int): Hashes running at the same time.
+		max_pending (int): Hashes waiting for a worker.
+		queue_timeout (float): Seconds that a hash can wait for a worker.
+
+	.. code-block:: python
+
+	        password_hasher = PasswordHashingService(PasswordHasher(), workers=2)
+	        password_hash = await password_hasher.hash("secret")
+	        await password_hasher.verify(password_hash, "secret")
+	"""  # noqa: E101
+
+	def __init__(
+		self,
+		hasher: PasswordHasher,
+		workers: int = 2,
+		max_pending: int = 32,
+		queue_timeout: float = 2.0,
+	) -> None:
+		self.hasher = hasher
+		self.max_pending = max_pending
+		self.queue_timeout = queue_timeout
+		self.stats = HashingStats()
+		self._executor = ThreadPoolExecutor(workers, thread_name_prefix="argon2")
+		self._workers = asyncio.Semaphore(workers)
+		self._pending = 0
+
+	@property
+	def pending(self) -> int:
+		return self._pending
+
+	async def _run[R](self, func: Callable[..., R], *args: Any) -> R:
+		if self._pending >= self.max_pending:
+			self.stats.rejected += 1
+			raise TooManyRequest("The server is busy, try again later")
+		self._pending += 1
+		start = time.perf_counter()
+		try:
+			async with asyncio.timeout(self.queue_timeout):
+				await self._workers.acquire()
+		except TimeoutError:
+			self.stats.rejected += 1
+			raise TooManyRequest("The server is busy, try again later") from None
+		finally:
+			self._pending -= 1
+		waited = time.perf_counter() - start
+		self.stats.queue_wait += waited
+		self.stats.max_queue_wait = max(self.stats.max_queue_wait, waited)
+		start = time.perf_counter()
+		try:
+			loop = asyncio.get_running_loop()
+			return await loop.run_in_executor(self._executor, func, *args)
+		finally:
+			elapsed = time.perf_counter() - start
+			self.stats.hash_time += elapsed
+			self.stats.max_hash_time = max(self.stats.max_hash_time, elapsed)
+			self._workers.release()
+
+	async def hash(self, password: str) -> str:
+		password_hash = await self._run(self.hasher.hash, password)
+		self.stats.hashed += 1
+		return password_hash
+
+	async def verify(self, password_hash: str, password: str) -> bool:
+		"""Returns ``False`` on a wrong password or a malformed hash"""
+		try:
+			valid = await self._run(self.hasher.verify, password_hash, password)
+		except (VerificationError, InvalidHashError):
+			valid = False
+		self.stats.verified += 1
+		return valid
+
+	def check_needs_rehash(self, password_hash: str) -> bool:
+		"""The hash was made with other cost parameters (cheap, no hashing)"""
+		return self.hasher.check_needs_rehash(password_hash)
+
+	def shutdown(self) -> None:
+		self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,38 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class ReadEnvPasswordSettings(BaseSettings):
+	"""
+	Read Environment variables to get the cost parameters of argon2 and the
+	limits of the hashing pool. Every value has a default, the `.env` file is
+	optional.
+
+	If you want to use other file
+	.. code-block:: python
+	    ReadEnvPasswordSettings(_env_file="name_of_env_file")
+
+	"""  # noqa: E101
+
+	time_cost: int = Field(3, description="Argon2 iterations", alias="ARGON2_TIME_COST")
+	memory_cost: int = Field(
+		65536, description="Argon2 memory in KiB", alias="ARGON2_MEMORY_COST"
+	)
+	parallelism: int = Field(
+		4, description="Argon2 lanes per hash", alias="ARGON2_PARALLELISM"
+	)
+	workers: int = Field(
+		2, description="Hashes running at the same time", alias="PASSWORD_WORKERS"
+	)
+	max_pending: int = Field(
+		32, description="Hashes waiting for a worker", alias="PASSWORD_MAX_PENDING"
+	)
+	queue_timeout: float = Field(
+		2.0,
+		description="Seconds that a hash can wait for a worker",
+		alias="PASSWORD_QUEUE_TIMEOUT",
+	)
+
+	model_config = SettingsConfigDict(
+		env_file=".env", env_file_encoding="utf-8", case_sensitive=True, extra="ignore"
+	)
@@ -0,0 +1,47 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from models.users import Users
+from utils.db.crud.bulk import MAX_BIND_PARAMS, chunks, update_statements
+
+
+def test_update_statements_group_the_rows_by_columns() -> None:
+	rows = [
+		{"id": uuid4(), "is_active": False},
+		{"id": uuid4(), "full_name": "Ada"},
+		{"id": uuid4(), "is_active": True},
+	]
+
+	statements = list(update_statements(Users, rows))
+
+	assert len(statements) == 2
+	assert sorted(
+		len(statement.compile(dialect=postgresql.dialect()).params)
+		for statement in statements
+	) == [2, 4]
+
+
+def test_update_statements_stay_under_the_bind_limit() -> None:
+	names = [column.key for column in Users.__table__.columns]
+	row = dict.fromkeys(names)
+	rows = [row | {"id": uuid4()} for _ in range(MAX_BIND_PARAMS // len(names) + 1)]
+
+	statements = list(update_statements(Users, rows, returning=False))
+
+	assert len(statements) == 2
+	for statement in statements:
+		params = statement.compile(dialect=postgresql.dialect()).params
+		assert len(params) <= MAX_BIND_PARAMS
+
+
+def test_update_needs_the_id() -> None:
+	with pytest.raises(ValueError):
+		list(update_statements(Users, [{"is_active": False}]))
+
+
+def test_chunks() -> None:
+	assert list(chunks([1, 2, 3], 2)) == [(1, 2), (3,)]
+	with pytest.raises(ValueError):
+		chunks([1], 0)
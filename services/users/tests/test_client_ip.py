@@ -0,0 +1,31 @@
+from utils.middleware.client_ip import forwarded_client_ip
+
+
+def scope(forwarded: list[str] | None = None, peer: str = "10.0.0.2") -> dict:
+	headers = [(b"x-forwarded-for", value.encode()) for value in forwarded or []]
+	return {"type": "http", "client": (peer, 5123), "headers": headers}
+
+
+def test_client_behind_ingress() -> None:
+	assert forwarded_client_ip(scope(["203.0.113.7"]), depth=1) == "203.0.113.7"
+
+
+def test_spoofed_entries_are_ignored() -> None:
+	request = scope(["1.1.1.1, 203.0.113.7"])
+	assert forwarded_client_ip(request, depth=1) == "203.0.113.7"
+	assert forwarded_client_ip(request, depth=2) == "1.1.1.1"
+
+
+def test_repeated_headers_are_joined() -> None:
+	request = scope(["1.1.1.1", "198.51.100.4, 203.0.113.7"])
+	assert forwarded_client_ip(request, depth=2) == "198.51.100.4"
+
+
+def test_fewer_entries_than_proxies() -> None:
+	assert forwarded_client_ip(scope(["203.0.113.7"]), depth=3) == "203.0.113.7"
+
+
+def test_without_header_or_depth_the_peer() -> None:
+	assert forwarded_client_ip(scope(), depth=1) == "10.0.0.2"
+	assert forwarded_client_ip(scope(["203.0.113.7"]), depth=0) == "10.0.0.2"
+	assert forwarded_client_ip({"type": "http", "headers": []}, depth=1) == "unknown"
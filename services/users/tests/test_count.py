@@ -0,0 +1,15 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from models.users import Users
+from utils.db.crud.count import Explain
+
+
+def test_explain_keeps_the_values_bound() -> None:
+	statement = select(Users).filter(Users.full_name == "it's :word 100%")
+
+	compiled = Explain(statement).compile(dialect=postgresql.dialect())
+
+	assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+	assert ":word" not in str(compiled)
+	assert list(compiled.params.values()) == ["it's :word 100%"]
@@ -0,0 +1,89 @@
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from models.users import Users
+from utils.db.dynamic_filter import InvalidFilter, get_filters
+from utils.exceptions import InvalidParameter
+
+dialect = postgresql.dialect()
+
+
+def bound(filters: str) -> list[Any]:
+	return [
+		value
+		for condition in get_filters(filters, Users)
+		for value in condition.compile(dialect=dialect).params.values()
+	]
+
+
+def test_empty_filter() -> None:
+	assert get_filters("", Users) == ()
+
+
+@pytest.mark.parametrize(
+	("filters", "values"),
+	[
+		('[["login_attempts", ">", "3"]]', [3]),
+		('[["login_attempts", ">", 3.0]]', [3]),
+		('[["login_attempts", "btw", [1, "5"]]]', [1, 5]),
+		('[["is_active", "=", "true"]]', [True]),
+		(
+			'[["created_at", ">=", "2024-01-31T00:00:00+00:00"]]',
+			[datetime(2024, 1, 31, tzinfo=UTC)],
+		),
+		('[["email", "=", "a@x.co"], ["is_active", "=", false]]', ["a@x.co", False]),
+	],
+)
+def test_values_are_coerced_to_the_column_type(filters: str, values: list[Any]) -> None:
+	assert bound(filters) == values
+
+
+def test_in_takes_the_coerced_values() -> None:
+	(condition,) = get_filters('[["login_attempts", "in", ["1", 2]]]', Users)
+
+	assert condition.right.value == [1, 2]
+
+
+@pytest.mark.parametrize(
+	"filters",
+	[
+		'[["login_attempts", "=", 1.5]]',
+		'[["login_attempts", "=", "1.5"]]',
+		'[["login_attempts", "=", true]]',
+		'[["login_attempts", "in", [1, 2.5]]]',
+		'[["created_at", ">", "yesterday"]]',
+		'[["id", "=", "not-a-uuid"]]',
+		'[["email", "like", 1]]',
+		'[["email", "btw", ["a"]]]',
+		'[["email", "is_null", "yes"]]',
+		'[["password", "=", "x"]]',
+		'[["email", "~", "x"]]',
+		'[["email", "="]]',
+		"[[",
+	],
+)
+def test_invalid_filter_is_a_bad_request(filters: str) -> None:
+	with pytest.raises(InvalidFilter) as error:
+		get_filters(filters, Users)
+
+	assert isinstance(error.value, InvalidParameter)
+
+
+def test_only_allowed_columns_are_filtered() -> None:
+	assert get_filters('[["email", "=", "a@x.co"]]', Users, allowed=("email",))
+	with pytest.raises(InvalidFilter):
+		get_filters('[["password_hash", "=", "x"]]', Users, allowed=("email",))
+
+
+@pytest.mark.parametrize("operator", ["=", "like", "ilike", "is_null"])
+def test_secret_columns_are_never_filtered(operator: str) -> None:
+	value = "false" if operator == "is_null" else '"$argon2id$%"'
+	filters = f'[["password_hash", "{operator}", {value}]]'
+
+	with pytest.raises(InvalidFilter):
+		get_filters(filters, Users)
+	with pytest.raises(InvalidFilter):
+		get_filters(filters, Users, allowed=("password_hash",))
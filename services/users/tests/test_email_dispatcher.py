@@ -0,0 +1,88 @@
+from typing import Any
+
+import aiosmtplib
+import pytest
+
+from utils.fastapi.email.dispatcher import Email, EmailDispatcher, is_transient
+
+
+@pytest.fixture
+def dispatcher(mocker: Any) -> EmailDispatcher:
+	return EmailDispatcher(
+		fm=mocker.AsyncMock(),
+		pool=mocker.AsyncMock(),
+		renderer=mocker.Mock(),
+		broker=mocker.AsyncMock(),
+		retries=2,
+		backoff=0,
+	)
+
+
+def email(mocker: Any, event: Any = "event") -> Email:
+	return Email(message=mocker.Mock(), template_name="welcome.html", event=event)
+
+
+def refused(*codes: int) -> aiosmtplib.SMTPRecipientsRefused:
+	return aiosmtplib.SMTPRecipientsRefused(
+		[
+			aiosmtplib.SMTPRecipientRefused(code, "refused", f"{code}@x.co")
+			for code in codes
+		]
+	)
+
+
+@pytest.mark.parametrize(
+	("error", "transient"),
+	[
+		(aiosmtplib.SMTPServerDisconnected("closed"), True),
+		(aiosmtplib.SMTPReadTimeoutError("timeout"), True),
+		(ConnectionResetError(), True),
+		(aiosmtplib.SMTPDataError(451, "try later"), True),
+		(aiosmtplib.SMTPDataError(554, "rejected"), False),
+		(aiosmtplib.SMTPSenderRefused(553, "no", "noreply@x.co"), False),
+		(refused(550, 550), False),
+		(refused(550, 450), True),
+		(aiosmtplib.SMTPNotSupported("no STARTTLS"), False),
+	],
+)
+def test_transient_errors(error: Exception, transient: bool) -> None:
+	assert is_transient(error) is transient
+
+
+async def test_transient_errors_are_retried(
+	mocker: Any, dispatcher: EmailDispatcher
+) -> None:
+	dispatcher.pool.send.side_effect = [  # type: ignore
+		aiosmtplib.SMTPServerDisconnected("closed"),
+		aiosmtplib.SMTPDataError(421, "busy"),
+		None,
+	]
+
+	assert await dispatcher.dispatch("user.created", [email(mocker)]) == 1
+	assert (dispatcher.stats.retried, dispatcher.stats.dead_lettered) == (2, 0)
+
+
+async def test_permanent_errors_are_dead_lettered_at_once(
+	mocker: Any, dispatcher: EmailDispatcher
+) -> None:
+	dispatcher.pool.send.side_effect = refused(550)  # type: ignore
+
+	assert await dispatcher.dispatch("user.created", [email(mocker)]) == 0
+	dispatcher.pool.send.assert_awaited_once()  # type: ignore
+	dispatcher.broker.publish.assert_awaited_once()  # type: ignore
+	assert dispatcher.broker.publish.await_args.args[:2] == (  # type: ignore
+		"event",
+		"user.created.dlq",
+	)
+	assert (dispatcher.stats.retried, dispatcher.stats.dead_lettered) == (0, 1)
+
+
+async def test_failed_dead_letter_does_not_fail_the_batch(
+	mocker: Any, dispatcher: EmailDispatcher
+) -> None:
+	dispatcher.pool.send.side_effect = [refused(550), None, refused(550)]  # type: ignore
+	dispatcher.broker.publish.side_effect = [OSError("kafka down"), None]  # type: ignore
+
+	emails = [email(mocker, event) for event in ("lost", "sent", "dead")]
+	assert await dispatcher.dispatch("user.created", emails) == 1
+	assert (dispatcher.stats.lost, dispatcher.stats.dead_lettered) == (1, 1)
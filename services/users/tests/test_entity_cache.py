@@ -0,0 +1,118 @@
+from datetime import UTC, datetime
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+from common.role import Role
+from models.users import Users
+from repository.user import UserRepository
+from utils.cache.entity_cache import EntityCache
+
+
+@pytest.fixture
+def redis(mocker: Any) -> Any:
+	return mocker.AsyncMock()
+
+
+@pytest.fixture
+def cache(redis: Any) -> EntityCache:
+	return EntityCache(
+		redis, redis, unique_columns=("email",), secret_columns=("password_hash",)
+	)
+
+
+@pytest.fixture
+def db(mocker: Any) -> Any:
+	session = mocker.AsyncMock()
+	session.execute.return_value = mocker.Mock(rowcount=1)
+	return session
+
+
+def user() -> Users:
+	return Users(
+		id=uuid4(),
+		full_name="Ada",
+		email="ada@x.co",
+		password_hash="$argon2id$secret",
+		role=list(Role)[0],
+		email_verified=True,
+		created_at=datetime(2024, 1, 1, tzinfo=UTC),
+		is_active=True,
+		login_attempts=0,
+	)
+
+
+def test_secret_columns_are_not_cached(cache: EntityCache) -> None:
+	entity = user()
+
+	payload = cache.serialize(entity)
+	cached = cache.deserialize(Users, payload)
+
+	assert "argon2" not in payload
+	assert cached.password_hash is None
+	assert (cached.id, cached.email, cached.created_at) == (
+		entity.id,
+		entity.email,
+		entity.created_at,
+	)
+
+
+def test_secret_columns_change_the_keys(redis: Any, cache: EntityCache) -> None:
+	entity_id = uuid4()
+
+	other = EntityCache(redis, redis, secret_columns=("full_name",))
+
+	assert cache._id_key(Users, entity_id) != other._id_key(Users, entity_id)
+
+
+async def test_invalidate_many_is_a_single_delete(
+	redis: Any, cache: EntityCache
+) -> None:
+	ids = [uuid4(), uuid4()]
+
+	await cache.invalidate_many(Users, ids)
+	await cache.invalidate_many(Users, [])
+
+	redis.delete.assert_awaited_once_with(
+		*(cache._id_key(Users, entity_id) for entity_id in ids)
+	)
+
+
+async def test_bulk_writes_invalidate_the_entities(
+	redis: Any, cache: EntityCache, db: Any
+) -> None:
+	repository = UserRepository(Users, entity_cache=cache)
+	ids = [uuid4(), uuid4()]
+
+	await repository.update_entities(
+		[{"id": entity_id, "is_active": False} for entity_id in ids],
+		db,
+		returning=False,
+	)
+	await repository.delete_entities(ids, db)
+
+	keys = [cache._id_key(Users, entity_id) for entity_id in ids]
+	assert [call.args for call in redis.delete.await_args_list] == [
+		tuple(keys),
+		tuple(keys),
+	]
+
+
+async def test_login_lookup_skips_the_cache(
+	mocker: Any, cache: EntityCache, db: Any
+) -> None:
+	repository = UserRepository(Users, entity_cache=cache)
+	get_by = mocker.patch.object(cache, "get_by")
+	db.execute.return_value.scalar_one_or_none.return_value = None
+
+	await repository.get_entity_by_args(Users.email, "ada@x.co", db, cached=False)
+
+	get_by.assert_not_called()
+	db.execute.assert_awaited_once()
+
+
+def test_columns_marked_secret_are_not_cached(redis: Any) -> None:
+	payload = EntityCache(redis, redis).serialize(user())
+
+	assert "argon2" not in payload
@@ -0,0 +1,56 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from utils.cache.login_throttle import LoginThrottle
+from utils.exceptions import TooManyRequest
+
+fakeredis = pytest.importorskip("fakeredis", reason="needs fakeredis[lua]")
+
+
+@pytest.fixture
+async def redis() -> AsyncIterator[Any]:
+	client = fakeredis.FakeAsyncRedis()
+	yield client
+	await client.aclose()
+
+
+async def attempt(throttle: LoginThrottle, email: str, ip: str) -> bool:
+	try:
+		await throttle.check(email, ip)
+	except TooManyRequest:
+		return False
+	return True
+
+
+async def test_parallel_guesses_are_counted_before_the_verify(redis: Any) -> None:
+	throttle = LoginThrottle(redis, ip_limit=100, max_failures=5)
+
+	# Every guess from its own ip, none of them has failed yet
+	allowed = await asyncio.gather(
+		*(attempt(throttle, "ada@x.co", f"10.0.0.{n}") for n in range(20))
+	)
+
+	assert sum(allowed) == 5
+	assert await attempt(throttle, "other@x.co", "10.0.0.1")
+
+
+async def test_success_clears_the_reserved_failures(redis: Any) -> None:
+	throttle = LoginThrottle(redis, ip_limit=100, max_failures=2)
+
+	for _ in range(3):
+		assert await attempt(throttle, "ada@x.co", "10.0.0.1")
+		await throttle.succeeded("ada@x.co")
+	assert await attempt(throttle, "ada@x.co", "10.0.0.1")
+	assert await attempt(throttle, "ada@x.co", "10.0.0.1")
+	assert not await attempt(throttle, "ada@x.co", "10.0.0.1")
+
+
+async def test_ip_limit(redis: Any) -> None:
+	throttle = LoginThrottle(redis, ip_limit=3, max_failures=100)
+
+	allowed = [await attempt(throttle, f"{n}@x.co", "10.0.0.1") for n in range(4)]
+
+	assert allowed == [True, True, True, False]
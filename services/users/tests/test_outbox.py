@@ -0,0 +1,71 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pytest
+from aiokafka import AIOKafkaProducer
+from aiokafka.client import AIOKafkaClient
+from aiokafka.producer.message_accumulator import MessageAccumulator
+from faststream.kafka import KafkaBroker
+
+from models.outbox import Outbox
+from utils.kafka.outbox import OutboxRelay
+
+
+@pytest.fixture
+async def sent(mocker: Any) -> AsyncIterator[list[tuple[str, Any, Any]]]:
+	"""Records sent by the real aiokafka producer (serialized), without a cluster"""
+	records: list[tuple[str, Any, Any]] = []
+
+	async def add_message(
+		self: Any, tp: Any, key: Any, value: Any, timeout: Any, **kwargs: Any
+	) -> Any:
+		records.append((tp.topic, key, value))
+		future = asyncio.get_running_loop().create_future()
+		future.set_result(None)
+		return future
+
+	for method in ("bootstrap", "close", "_wait_on_metadata"):
+		mocker.patch.object(AIOKafkaClient, method, mocker.AsyncMock())
+	mocker.patch.object(AIOKafkaProducer, "start", mocker.AsyncMock())
+	mocker.patch.object(AIOKafkaProducer, "stop", mocker.AsyncMock())
+	mocker.patch.object(AIOKafkaProducer, "_partition", return_value=0)
+	mocker.patch.object(MessageAccumulator, "add_message", add_message)
+	yield records
+
+
+@pytest.fixture
+async def broker(sent: list[Any]) -> AsyncIterator[KafkaBroker]:
+	# Like the broker of common/broker.py, without key serializer
+	broker = KafkaBroker("localhost:9092")
+	await broker.connect()
+	yield broker
+	await broker.stop()
+
+
+def session_factory(mocker: Any, rows: list[Outbox]) -> Any:
+	db = mocker.AsyncMock()
+	db.scalars.return_value.all = mocker.Mock(return_value=rows)
+
+	@asynccontextmanager
+	async def session() -> AsyncIterator[Any]:
+		yield db
+
+	return session
+
+
+async def test_keyed_rows_go_through_the_producer(
+	mocker: Any, broker: KafkaBroker, sent: list[tuple[str, Any, Any]]
+) -> None:
+	rows = [
+		Outbox(id=1, topic="user.created", key="user-1", payload={"user": "a"}),
+		Outbox(id=2, topic="user.created", key=None, payload={"user": "b"}),
+	]
+	relay = OutboxRelay(session_factory(mocker, rows), broker)
+
+	assert await relay.publish_batch() == 2
+	assert sorted(sent, key=lambda record: record[2]) == [
+		("user.created", b"user-1", b'{"user":"a"}'),
+		("user.created", None, b'{"user":"b"}'),
+	]
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from utils.cache.codec import Codec
+from utils.cache.redis_cache import decode_entry
+
+codec = Codec(serializer="json", compression="zlib", threshold=64)
+
+
+def test_entry_is_decoded() -> None:
+	entry = {"value": {"users": [1, 2]}, "delta": 0.1, "expires_at": 1.0}
+
+	assert decode_entry(codec, codec.encode(entry)) == entry
+	assert decode_entry(codec, codec.encode(entry | {"value": "x" * 200})) is not None
+
+
+@pytest.mark.parametrize(
+	"payload",
+	[
+		# Legacy payloads, ``json.dumps(result)`` without the entry
+		json.dumps({"users": [1, 2]}).encode(),
+		json.dumps({"value": 1}),
+		json.dumps([1, 2]).encode(),
+		json.dumps("text").encode(),
+		json.dumps(1).encode(),
+		b"null",
+		# Corrupted
+		b"{not json",
+		bytes((0x01,)) + b"not zlib",
+	],
+)
+def test_payload_without_entry_is_a_miss(payload: bytes | str) -> None:
+	assert decode_entry(codec, payload) is None
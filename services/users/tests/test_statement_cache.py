@@ -0,0 +1,206 @@
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select
+from sqlalchemy.dialects import postgresql
+
+from common.cursor import Cursor
+from models.users import Users
+from repository.user import UserRepository
+from utils.db.dynamic_filter import get_filters
+from utils.db.statement_cache import (
+	instrument_statement_cache,
+	prepared_statement_cache,
+	statement_cache_stats,
+)
+
+dialect = postgresql.dialect()
+items = Table("items", MetaData(), Column("id", Integer, primary_key=True))
+
+
+@pytest.fixture
+def repository() -> UserRepository:
+	return UserRepository(Users)
+
+
+@pytest.fixture
+def db(mocker: Any) -> Any:
+	"""Session that records the statements executed"""
+	session = mocker.AsyncMock()
+	session.execute.return_value = mocker.Mock()
+	return session
+
+
+def executed(db: Any) -> Any:
+	statement = db.execute.call_args.args[0]
+	db.execute.reset_mock()
+	return statement
+
+
+def cache_key(statement: Any) -> Any:
+	return statement._generate_cache_key().key
+
+
+def params(statement: Any) -> dict[str, Any]:
+	return statement.compile(dialect=dialect).params
+
+
+async def paginate(repository: UserRepository, db: Any, filters: str, **page: Any):
+	await repository.get_entity_pagination(
+		db, order_by="asc", filter=get_filters(filters, Users), count="none", **page
+	)
+	return executed(db)
+
+
+async def test_pagination_key_is_stable_and_params_follow_the_request(
+	repository: UserRepository, db: Any
+) -> None:
+	first = await paginate(
+		repository, db, '[["email", "=", "a@x.co"]]', limit=10, offset=0
+	)
+	second = await paginate(
+		repository, db, '[["email", "=", "b@x.co"]]', limit=20, offset=40
+	)
+
+	assert cache_key(first) == cache_key(second)
+	assert params(first) == {"email_1": "a@x.co", "limit_1": 10, "offset_1": 0}
+	assert params(second) == {"email_1": "b@x.co", "limit_1": 20, "offset_1": 40}
+
+
+async def test_pagination_key_changes_with_the_filter_shape(
+	repository: UserRepository, db: Any
+) -> None:
+	keys = {
+		cache_key(await paginate(repository, db, filters, limit=10, offset=0))
+		for filters in (
+			"",
+			'[["email", "=", "a@x.co"]]',
+			'[["full_name", "=", "a@x.co"]]',
+			'[["email", "ilike", "a%"]]',
+			'[["email", "=", "a@x.co"], ["login_attempts", ">", 3]]',
+		)
+	}
+
+	assert len(keys) == 5
+
+
+async def test_lookup_column_is_part_of_the_key(
+	repository: UserRepository, db: Any
+) -> None:
+	db.execute.return_value.scalar_one_or_none.return_value = None
+	await repository.get_entity_by_args(Users.email, "a@x.co", db)
+	by_email = executed(db)
+	await repository.get_entity_by_args(Users.email, "b@x.co", db)
+	by_other_email = executed(db)
+	await repository.get_entity_by_args(Users.full_name, "a@x.co", db)
+	by_name = executed(db)
+
+	assert cache_key(by_email) == cache_key(by_other_email)
+	assert cache_key(by_email) != cache_key(by_name)
+	assert list(params(by_other_email).values()) == ["b@x.co"]
+	assert "users.full_name" in str(by_name.compile(dialect=dialect))
+
+
+async def test_entity_id_is_bound(repository: UserRepository, db: Any) -> None:
+	ids = [uuid4(), uuid4()]
+	statements = []
+	for entity_id in ids:
+		await repository.get_entity_by_id(entity_id, db)
+		statements.append(executed(db))
+
+	assert cache_key(statements[0]) == cache_key(statements[1])
+	assert [list(params(statement).values()) for statement in statements] == [
+		[entity_id] for entity_id in ids
+	]
+
+
+async def test_keyset_cursor_is_bound(repository: UserRepository, db: Any) -> None:
+	db.execute.return_value.scalars.return_value.all.return_value = []
+	cursors = [
+		Cursor(last_id=uuid4(), created_at=datetime(2024, 1, day, tzinfo=UTC))
+		for day in (1, 2)
+	]
+	statements = []
+	for cursor in cursors:
+		await repository.get_entity_keyset(
+			db, limit=10, order_by="asc", filter=(), cursor=cursor
+		)
+		statements.append(executed(db))
+	await repository.get_entity_keyset(db, limit=10, order_by="asc", filter=())
+	first_page = executed(db)
+
+	assert cache_key(statements[0]) == cache_key(statements[1])
+	assert cache_key(statements[0]) != cache_key(first_page)
+	for statement, cursor in zip(statements, cursors, strict=True):
+		bound = params(statement).values()
+		assert cursor.created_at in bound
+		assert cursor.last_id in bound
+		assert 11 in bound
+
+
+@pytest.fixture
+def engine() -> Any:
+	engine = create_engine("sqlite://")
+	items.create(engine)
+	return engine
+
+
+def test_compiled_cache_hits_and_misses(engine: Any) -> None:
+	stats = instrument_statement_cache(engine)
+	with engine.connect() as connection:
+		for item_id in (1, 2, 3):
+			connection.execute(select(items).where(items.c.id == item_id))
+		connection.exec_driver_sql("SELECT 1")
+
+	assert stats.as_dict() == {
+		"compiled_hits": 2,
+		"compiled_misses": 1,
+		"uncached": 1,
+		"prepared_hits": 0,
+		"prepared_misses": 0,
+	}
+
+
+def test_engine_is_instrumented_once(engine: Any) -> None:
+	stats = instrument_statement_cache(engine)
+
+	assert instrument_statement_cache(engine) is stats
+	with engine.connect() as connection:
+		assert statement_cache_stats(connection) is stats
+	assert statement_cache_stats(create_engine("sqlite://")) is None
+
+
+def asyncpg_cursor(cache: Any) -> Any:
+	return SimpleNamespace(
+		_adapt_connection=SimpleNamespace(_prepared_statement_cache=cache)
+	)
+
+
+def test_prepared_statement_cache_of_the_cursor() -> None:
+	cache = {"SELECT 1": object()}
+
+	assert prepared_statement_cache(asyncpg_cursor(cache)) is cache
+	assert prepared_statement_cache(asyncpg_cursor(None)) is None
+	assert prepared_statement_cache(SimpleNamespace()) is None
+	assert prepared_statement_cache(SimpleNamespace(_adapt_connection=None)) is None
+
+
+def test_prepared_hits_and_misses_of_asyncpg(engine: Any) -> None:
+	stats = instrument_statement_cache(engine)
+	connection = SimpleNamespace(dialect=SimpleNamespace(driver="asyncpg"))
+
+	def execute(cursor: Any, statement: str) -> None:
+		engine.dispatch.before_cursor_execute(
+			connection, cursor, statement, (), None, False
+		)
+
+	execute(asyncpg_cursor({"SELECT 1": object()}), "SELECT 1")
+	execute(asyncpg_cursor({"SELECT 1": object()}), "SELECT 2")
+	# Cache disabled (prepared_statement_cache_size=0) or unknown adapter
+	execute(asyncpg_cursor(None), "SELECT 1")
+	execute(SimpleNamespace(), "SELECT 1")
+
+	assert (stats.prepared_hits, stats.prepared_misses) == (1, 3)